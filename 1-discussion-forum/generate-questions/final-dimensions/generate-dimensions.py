@@ -1,27 +1,62 @@
 """
 Script to generate dimensions analysis of discussion forum threads using AI.
 
-Input data sources: ../threads_cleaned.json  
-Output destinations: results.md
-Dependencies: Google Vertex AI API, langchain libraries
+Input data sources: ../threads_cleaned.json (or .jsonl, or the columnar ../threads_cleaned.cols, see shared/thread_store.py)
+Output destinations: results.md, results.metrics.jsonl / results.prom (per-call telemetry)
+Dependencies: Google Vertex AI API, langchain libraries (imported only when a model call is made)
 Key exports: main()
-Side effects: Creates results.md file, makes AI API calls
+Side effects: Creates results.md file, makes AI API calls, reads/writes the shared LLM response cache
+
+Usage: python generate-dimensions.py [--no-cache] [--sharded] [--shard-tokens N] [--concurrency N]
+       [--preflight] [--max-total-tokens N] [--max-call-tokens N]
+       [--threads PATH] [--since DATE] [--until DATE] [--author ID ...]
 """
 
+import argparse
+import asyncio
 import json
 import os
+import re
+import sys
 from pathlib import Path
-from dotenv import load_dotenv
-from langchain_google_vertexai import ChatVertexAI
-from langchain_core.messages import HumanMessage
-
-# Load environment variables from .env file
-load_dotenv()
 
+# Make the repo-level shared helpers importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+from shared.concurrency import gather_in_order
+from shared.llm_cache import LLMCache, print_cache_stats
+from shared.token_budget import (
+    BudgetExceeded,
+    check_budget,
+    count_tokens,
+    preflight,
+    print_preflight_report,
+)
+from shared.telemetry import CallMetrics, MeteredChatModel, metrics_paths_for
+
+MODEL_NAME = "gemini-2.5-pro"
+
+
+def load_threads_data(filepath, since=None, until=None, authors=None):
+    """Load and return the threads data from JSON file (or JSONL from process_threads.py --stream).
+
+    A columnar store (.cols, written by process_threads.py) is memory-mapped instead, and
+    only the threads dated in [since, until) and written by one of `authors` are decoded.
+    """
+    if str(filepath).endswith(".cols"):
+        from shared.thread_store import ThreadStore
+
+        store = ThreadStore(str(filepath))
+        rows = store.select(since, until, authors)
+        return {"threads": list(store.threads(rows)), "metadata": store.metadata}
+    if since or until or authors is not None:
+        raise ValueError(
+            f"Date/author filters need the columnar store (threads_cleaned.cols), not {filepath}"
+        )
 
-def load_threads_data(filepath):
-    """Load and return the threads data from JSON file."""
     with open(filepath, "r", encoding="utf-8") as f:
+        if str(filepath).endswith(".jsonl"):
+            return {"threads": [json.loads(line) for line in f if line.strip()]}
         return json.load(f)
 
 
@@ -154,31 +189,341 @@ Provide a comprehensive summary (3-5 paragraphs) highlighting:
     return prompt
 
 
-def main():
-    """Main function to generate dimensions analysis."""
+def shard_threads(threads, max_tokens_per_shard):
+    """Split threads into consecutive shards whose conversation text fits the token budget."""
+    shards = []
+    current = []
+    current_tokens = 0
+
+    for thread in threads:
+        # Count the line as prepare_conversations_text() will render it
+        entry = f"{len(current) + 1}. {thread['thread_body']}\n\n"
+        thread_tokens = count_tokens(entry, MODEL_NAME)
+        if current and current_tokens + thread_tokens > max_tokens_per_shard:
+            shards.append(current)
+            current = []
+            current_tokens = 0
+
+        current.append(thread)
+        current_tokens += thread_tokens
+
+    if current:
+        shards.append(current)
+
+    return shards
+
+
+def parse_dimensions_json(response_text):
+    """Extract the dimensions JSON object from a model response."""
+    match = re.search(r"```json\s*(.*?)```", response_text, re.DOTALL)
+    if match:
+        return json.loads(match.group(1))
+
+    return json.loads(
+        response_text[response_text.find("{") : response_text.rfind("}") + 1]
+    )
+
+
+def parse_shard_dimensions(response_text):
+    """Dimensions JSON of one shard response; ValueError if it is missing or malformed."""
+    try:
+        dimensions = parse_dimensions_json(response_text)
+    except ValueError as e:
+        raise ValueError(f"shard response has no usable dimensions JSON ({e})") from e
+    if not isinstance(dimensions, dict) or not all(
+        isinstance(dimension, dict) and "dimension" in dimension
+        for entries in dimensions.values()
+        if isinstance(entries, list)
+        for dimension in entries
+    ):
+        raise ValueError("shard response has no usable dimensions JSON")
+    return dimensions
+
+
+def parse_summary(response_text):
+    match = re.search(r"<summary>(.*?)</summary>", response_text, re.DOTALL)
+    return match.group(1).strip() if match else ""
+
+
+def normalize_name(name):
+    """Case/punctuation-insensitive key so "Intent & Task Type" matches "intent and task type"."""
+    words = re.findall(r"[a-z0-9]+", name.lower())
+    return " ".join(word for word in words if word != "and")
+
+
+def merge_dimensions(shard_dimensions, max_examples=5):
+    """Reduce step: merge per-shard dimension JSON into one set of categories.
+
+    Categories and dimensions with the same normalized name are merged, the most
+    detailed description wins, and examples are deduplicated (ignoring whitespace
+    and case) up to max_examples. Dimensions found in more shards sort first.
+    """
+    merged = {}
+
+    for result in shard_dimensions:
+        for category, dimensions in result.items():
+            if not isinstance(dimensions, list):
+                continue
+
+            category_entry = merged.setdefault(
+                normalize_name(category), {"name": category, "dimensions": {}}
+            )
+
+            for dimension in dimensions:
+                entry = category_entry["dimensions"].setdefault(
+                    normalize_name(dimension["dimension"]),
+                    {
+                        "dimension": dimension["dimension"],
+                        "description": "",
+                        "examples": [],
+                        "seen_examples": set(),
+                        "shard_count": 0,
+                    },
+                )
+                entry["shard_count"] += 1
+
+                description = dimension.get("description", "")
+                if len(description) > len(entry["description"]):
+                    entry["description"] = description
+
+                for example in dimension.get("examples", []):
+                    example_key = " ".join(example.split()).lower()
+                    if (
+                        example_key in entry["seen_examples"]
+                        or len(entry["examples"]) >= max_examples
+                    ):
+                        continue
+                    entry["seen_examples"].add(example_key)
+                    entry["examples"].append(example)
+
+    return {
+        category_entry["name"]: [
+            {
+                "dimension": entry["dimension"],
+                "description": entry["description"],
+                "examples": entry["examples"],
+            }
+            for entry in sorted(
+                category_entry["dimensions"].values(),
+                key=lambda entry: -entry["shard_count"],
+            )
+        ]
+        for category_entry in merged.values()
+    }
+
+
+def create_llm():
+    """Build the Vertex AI model; the langchain/dotenv imports are deferred to this point."""
+    from dotenv import load_dotenv
+    from langchain_google_vertexai import ChatVertexAI
+
+    load_dotenv()
+    return ChatVertexAI(model=MODEL_NAME)
+
+
+async def analyze_shards(llm, pending, total, concurrency, metrics, on_result=None):
+    """Map step: run the dimension analysis for every pending (index, prompt) concurrently.
+
+    on_result(i, prompt, response_text) is called as soon as each shard's call returns, so
+    its response can be cached even if another shard fails and aborts the run. An
+    exception from on_result (e.g. an unparseable response) fails that shard.
+    """
+
+    from langchain_core.messages import HumanMessage
+
+    async def analyze_one(i, prompt):
+        metrics.start(i, f"shard {i}/{total}")
+        try:
+            response = await llm.ainvoke(
+                [HumanMessage(content=prompt)], config={"metadata": {"call_id": i}}
+            )
+            if on_result is not None:
+                on_result(i, prompt, response.content)
+        except Exception as e:
+            metrics.finish(i, error=e)
+            raise
+        metrics.finish(i)
+        print(f"Analyzed shard {i}/{total}")
+        return response.content
+
+    return await gather_in_order(pending, analyze_one, concurrency)
+
+
+def create_shard_prompts(threads, shard_tokens):
+    """Shard threads by token budget and render the analysis prompt for each shard."""
+    shards = shard_threads(threads, shard_tokens)
+    print(f"Split {len(threads)} threads into {len(shards)} shards")
+
+    return [
+        create_full_prompt(prepare_conversations_text({"threads": shard}))
+        for shard in shards
+    ]
+
+
+def run_sharded_analysis(prompts, thread_count, concurrency, cache, metrics):
+    """Analyze shard prompts concurrently and merge the results.
+
+    Each shard's response is parsed and cached the moment it arrives: if a shard fails
+    or returns no usable dimensions JSON, the run aborts, and a re-run only calls the
+    model again for the shards that did not finish. Unparseable responses are never
+    cached, and any already in the cache are ignored.
+    """
+    responses = [None] * len(prompts)
+    dimensions = [None] * len(prompts)
+
+    def record(i, prompt, response_text):
+        dimensions[i - 1] = parse_shard_dimensions(response_text)
+        responses[i - 1] = response_text
+        if cache is not None:
+            cache.put(MODEL_NAME, prompt, response_text)
+
+    for i, prompt in enumerate(prompts, 1):
+        cached = cache.get(MODEL_NAME, prompt) if cache is not None else None
+        if cached is not None:
+            try:
+                dimensions[i - 1] = parse_shard_dimensions(cached)
+                responses[i - 1] = cached
+            except ValueError:
+                pass
+
+    pending = [
+        (i, prompt)
+        for i, (prompt, response) in enumerate(zip(prompts, responses), 1)
+        if response is None
+    ]
+    print(f"{len(prompts) - len(pending)} shards served from cache")
+
+    if pending:
+        print("Initializing AI model...")
+        llm = MeteredChatModel(create_llm(), metrics)
+        asyncio.run(
+            analyze_shards(llm, pending, len(prompts), concurrency, metrics, record)
+        )
+
+    print("Merging shard results...")
+    merged = merge_dimensions(dimensions)
+    summaries = "\n\n".join(
+        f"### Shard {i}\n\n{parse_summary(text)}" for i, text in enumerate(responses, 1)
+    )
+
+    return (
+        f"Dimensions merged from {len(prompts)} shards of {thread_count} threads.\n\n"
+        f"```json\n{json.dumps(merged, indent=2, ensure_ascii=False)}\n```\n\n"
+        f"<summary>\n{summaries}\n</summary>\n"
+    )
+
+
+def main(
+    use_cache=True,
+    sharded=False,
+    shard_tokens=150_000,
+    concurrency=4,
+    preflight_only=False,
+    max_total_tokens=None,
+    max_call_tokens=None,
+    threads_path=None,
+    since=None,
+    until=None,
+    authors=None,
+):
+    """Main function to generate dimensions analysis.
+
+    With sharded=True the threads are split into shards of at most shard_tokens
+    conversation tokens, analyzed concurrently, and merged in a reduce step.
+
+    The prompts are token-counted before any call. A single prompt that would exceed
+    max_call_tokens (default: the model's context window) is switched to sharded
+    mode automatically; a run over max_total_tokens is refused.
+
+    Each model call's wall time, token usage and outcome is recorded in
+    results.metrics.jsonl and summarized in results.prom.
+
+    threads_path overrides ../../threads_cleaned.json. With the columnar store
+    (threads_cleaned.cols), since/until (thread_date window, until exclusive) and
+    authors (author ids) restrict the analysis to the matching threads.
+    """
 
     # Setup paths
     current_dir = Path(__file__).parent
-    threads_file = current_dir.parent.parent / "threads_cleaned.json"
+    threads_file = threads_path or current_dir.parent.parent / "threads_cleaned.json"
     results_file = current_dir / "results.md"
 
     print("Loading threads data...")
-    threads_data = load_threads_data(threads_file)
-    print(f"Loaded {len(threads_data['threads'])} threads")
+    threads_data = load_threads_data(threads_file, since, until, authors)
+    threads = threads_data["threads"]
+    print(f"Loaded {len(threads)} threads")
+
+    if not sharded:
+        print("Preparing all conversations for analysis...")
+        conversations_text = prepare_conversations_text(threads_data)
+
+        print("Creating full prompt...")
+        final_prompt = create_full_prompt(conversations_text)
+
+        report = preflight([final_prompt], MODEL_NAME)
+        print_preflight_report(report)
+
+        call_limit = max_call_tokens or report["context_tokens"]
+        if report["max_input_tokens"] > call_limit:
+            template_tokens = count_tokens(create_full_prompt(""), MODEL_NAME)
+            # Leave a small margin: per-thread counts don't add up exactly
+            shard_tokens = min(shard_tokens, int((call_limit - template_tokens) * 0.97))
+            sharded = True
+            print(
+                f"Prompt exceeds {call_limit:,} tokens; "
+                f"auto-sharding at {shard_tokens:,} conversation tokens per shard"
+            )
+
+    if sharded:
+        prompts = create_shard_prompts(threads, shard_tokens)
+        report = preflight(prompts, MODEL_NAME, concurrency=concurrency)
+        print_preflight_report(report)
 
-    print("Preparing all conversations for analysis...")
-    conversations_text = prepare_conversations_text(threads_data)
+    try:
+        check_budget(report, max_total_tokens, max_call_tokens)
+    except BudgetExceeded as e:
+        print(f"❌ Refusing to run: {e}")
+        return 1
 
-    print("Creating full prompt...")
-    final_prompt = create_full_prompt(conversations_text)
+    if preflight_only:
+        return 0
 
-    print("Initializing AI model...")
-    llm = ChatVertexAI(model="gemini-2.5-pro")
+    cache = LLMCache() if use_cache else None
+    metrics_path, prometheus_path = metrics_paths_for(str(results_file))
+    metrics = CallMetrics(metrics_path, "generate-dimensions", MODEL_NAME)
 
     print("Generating dimensions analysis...")
     try:
-        response = llm.invoke([HumanMessage(content=final_prompt)])
-        response_text = response.content
+        if sharded:
+            response_text = run_sharded_analysis(
+                prompts, len(threads), concurrency, cache, metrics
+            )
+        else:
+            response_text = (
+                cache.get(MODEL_NAME, final_prompt) if cache is not None else None
+            )
+            if response_text is None:
+                print("Initializing AI model...")
+                from langchain_core.messages import HumanMessage
+
+                llm = MeteredChatModel(create_llm(), metrics)
+
+                metrics.start(1, "all threads")
+                try:
+                    response = llm.invoke(
+                        [HumanMessage(content=final_prompt)],
+                        config={"metadata": {"call_id": 1}},
+                    )
+                except Exception as e:
+                    metrics.finish(1, error=e)
+                    raise
+                metrics.finish(1)
+                response_text = response.content
+
+                if cache is not None:
+                    cache.put(MODEL_NAME, final_prompt, response_text)
+            else:
+                print("Using cached response")
 
         print("Saving results...")
         with open(results_file, "w", encoding="utf-8") as f:
@@ -198,8 +543,90 @@ def main():
         print(f"Error during AI generation: {e}")
         return 1
 
+    finally:
+        metrics.close()
+        if metrics.records:
+            metrics.write_prometheus(prometheus_path)
+            metrics.print_summary()
+            print(f"📈 Call metrics: {metrics_path}, {prometheus_path}")
+        if cache is not None:
+            print_cache_stats(cache)
+            cache.close()
+
     return 0
 
 
 if __name__ == "__main__":
-    exit(main())
+    parser = argparse.ArgumentParser(description="Generate dimensions analysis")
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Bypass the on-disk LLM response cache",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Map-reduce over token-budgeted shards instead of one prompt",
+    )
+    parser.add_argument(
+        "--shard-tokens",
+        type=int,
+        default=150_000,
+        help="Max conversation tokens per shard (--sharded)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Shards analyzed at once (--sharded)"
+    )
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="Only render and token-count the prompt(s), then print the report",
+    )
+    parser.add_argument(
+        "--max-total-tokens",
+        type=int,
+        default=None,
+        help="Refuse to run if all prompts together exceed this many input tokens",
+    )
+    parser.add_argument(
+        "--max-call-tokens",
+        type=int,
+        default=None,
+        help="Auto-shard if the prompt exceeds this many tokens (default: context window)",
+    )
+    parser.add_argument(
+        "--threads",
+        default=None,
+        help="Threads file (.json, .jsonl or the columnar .cols; default ../../threads_cleaned.json)",
+    )
+    parser.add_argument(
+        "--since", default=None, help="Only threads dated on/after this (--threads .cols)"
+    )
+    parser.add_argument(
+        "--until", default=None, help="Only threads dated before this (--threads .cols)"
+    )
+    parser.add_argument(
+        "--author",
+        action="append",
+        default=None,
+        metavar="ID",
+        help="Only threads by this author id; repeatable (--threads .cols)",
+    )
+    args = parser.parse_args()
+
+    exit(
+        main(
+            use_cache=args.use_cache,
+            sharded=args.sharded,
+            shard_tokens=args.shard_tokens,
+            concurrency=args.concurrency,
+            preflight_only=args.preflight,
+            max_total_tokens=args.max_total_tokens,
+            max_call_tokens=args.max_call_tokens,
+            threads_path=args.threads,
+            since=args.since,
+            until=args.until,
+            authors=args.author,
+        )
+    )
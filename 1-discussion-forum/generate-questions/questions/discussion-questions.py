@@ -1,19 +1,82 @@
 """
 Generates 70 discussion forum questions by systematically combining dimensions from 4 categories (intent, specificity, domain, persona) and using LLM to create authentic questions that match The L Suite user profile.
 
-Input data sources: ../final-dimensions/final-dimensions.json
-Output destinations: generated_discussion_questions.json 
-Dependencies: OpenAI API key in .env file, langchain_openai, pydantic
-Key exports: generate_questions(), DimensionInfo, GeneratedQuestion, QuestionResults
-Side effects: Creates JSON output file, makes LLM API calls
+Input data sources: ../final-dimensions/final-dimensions.json, ../../threads.bm25 (--thread-index, see shared/bm25_index.py)
+Output destinations: generated_discussion_questions.json, generated_discussion_questions.journal.jsonl,
+                     generated_discussion_questions.metrics.jsonl / .prom (per-call telemetry),
+                     a batch request manifest (--render-manifest)
+Dependencies: pydantic, discussion_prompts.py (combination plan and prompt rendering); OpenAI API key in .env file and langchain_openai (imported when generating); pyarrow (--format parquet only);
+              numpy (--thread-index / --dedup-threshold / --diversity-target only)
+Key exports: generate_questions(), GenerationOptions, generate_adaptively(), render_manifest(), ingest_results(), DimensionInfo, GeneratedQuestion, QuestionResults, QuestionList
+Side effects: Creates JSON output file, makes LLM API calls (incl. near-duplicate regeneration), reads/writes the shared LLM response cache
+
+Usage: python discussion-questions.py [--async] [--concurrency N] [--rpm N] [--tpm N] [--no-cache] [--resume]
+       [--preflight] [--max-total-tokens N] [--max-call-tokens N]
+       [--plan full|covering] [--strength T] [--max-rows N] [--weight DIMENSION=WEIGHT ...]
+       [--dedup-threshold X] [--dedup-rounds N] [--per-call N]
+       [--providers SPEC] [--max-attempts N] [--adaptive] [--format json|jsonl|parquet]
+       [--thread-index PATH] [--examples K]
+       [--diversity-target N] [--slice-by intent|specificity|domain|persona] [--round-calls N]
+       [--novelty-threshold X] [--min-novelty X]
+       python discussion-questions.py --render-manifest PATH [--plan ...] [--per-call N] [--thread-index PATH]
+       python discussion-questions.py --ingest MANIFEST RESULTS [--format json|jsonl|parquet]
 """
 
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-from pydantic import BaseModel
-from typing import List
-import json
-import itertools
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+# Make the repo-level shared helpers importable when run as a script
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+)
+
+from shared.batch_jobs import ResultJoin, write_manifest
+from shared.compact_output import COMPACT_FORMATS, write_compact
+from shared.concurrency import RateLimiter, estimate_tokens, gather_in_order
+from shared.journal import QuestionJournal, journal_path_for
+from shared.llm_cache import CachedStructuredLLM, LLMCache, print_cache_stats
+from shared.llm_router import LLMRouter, print_router_stats
+from shared.retry import (
+    AIMDController,
+    IncompleteResponseError,
+    RetryPolicy,
+    acall_with_retry,
+    call_with_retry,
+    classify_error,
+)
+from shared.token_budget import (
+    MODEL_PROFILES,
+    BudgetExceeded,
+    check_budget,
+    preflight,
+    print_preflight_report,
+)
+from shared.telemetry import CallMetrics, MeteredChatModel, metrics_paths_for
+
+from discussion_prompts import (
+    combination_tag,
+    create_prompt_template,
+    fill_prompt,
+    generate_dimension_combinations,
+    load_dimensions,
+    question_slots,
+    thread_retriever,
+)
+
+MODEL_NAME = "gpt-5-mini"
+
+# --slice-by name -> (position in a combination, GeneratedQuestion field)
+SLICE_DIMENSIONS = {
+    "intent": (0, "intent_dimension"),
+    "specificity": (1, "specificity_dimension"),
+    "domain": (2, "domain_dimension"),
+    "persona": (3, "persona_dimension"),
+}
 
 
 class DimensionInfo(BaseModel):
@@ -35,214 +98,905 @@ class QuestionResults(BaseModel):
     total_generated: int
 
 
-load_dotenv()
-
+# Simple question model for LLM output
+class SimpleQuestion(BaseModel):
+    question: str
 
-# Load dimensions data
-def load_dimensions():
-    import os
 
-    # Get the directory of this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    # Navigate to the final-dimensions directory
-    dimensions_file = os.path.join(
-        script_dir, "..", "final-dimensions", "final-dimensions.json"
+# List-valued output for --per-call N: several questions for one combination
+class QuestionList(BaseModel):
+    questions: List[str]
+
+
+# Create the full question object with dimension metadata
+def build_question(question_text, combination):
+    intent_dim, specificity_dim, domain_dim, persona_dim = combination
+
+    return GeneratedQuestion(
+        question=question_text,
+        intent_dimension=DimensionInfo(
+            dimension=intent_dim["dimension"],
+            description=intent_dim["description"],
+            examples=intent_dim["examples"],
+        ),
+        specificity_dimension=DimensionInfo(
+            dimension=specificity_dim["dimension"],
+            description=specificity_dim["description"],
+            examples=specificity_dim["examples"],
+        ),
+        domain_dimension=DimensionInfo(
+            dimension=domain_dim["dimension"],
+            description=domain_dim["description"],
+            examples=domain_dim["examples"],
+        ),
+        persona_dimension=DimensionInfo(
+            dimension=persona_dim["dimension"],
+            description=persona_dim["description"],
+            examples=persona_dim["examples"],
+        ),
     )
 
-    with open(dimensions_file, "r") as f:
-        return json.load(f)
-
-
-# Generate all possible combinations systematically
-def generate_dimension_combinations(dimensions_data):
-    intent_dims = dimensions_data["Intent & Task Type"]
-    specificity_dims = dimensions_data["Request Specificity & Clarity"]
-    domain_dims = dimensions_data["Domain & Subject Matter"]
-    persona_dims = dimensions_data["User & Contextual Profile"]
 
-    # Generate all possible combinations systematically
-    all_combinations = list(
-        itertools.product(intent_dims, specificity_dims, domain_dims, persona_dims)
-    )
-
-    total_combinations = len(all_combinations)
-    print(f"Total possible combinations: {total_combinations}")
-    print(f"Will generate {total_combinations} questions using all combinations")
+# One distinct question text per slot; a short or repetitive list raises IncompleteResponseError
+def question_texts(response, slots):
+    if isinstance(response, QuestionList):
+        texts = response.questions
+    else:
+        texts = [response.question]
 
-    return all_combinations
+    texts = list(dict.fromkeys(text.strip() for text in texts if text.strip()))
+    if len(texts) < len(slots):
+        raise IncompleteResponseError(
+            f"expected {len(slots)} distinct questions, got {len(texts)}"
+        )
+    return texts[: len(slots)]
+
+
+# Cache a response only if it fills every slot of its call (config metadata "questions")
+def is_complete(response, config):
+    count = ((config or {}).get("metadata") or {}).get("questions", 1)
+    try:
+        question_texts(response, range(count))
+    except IncompleteResponseError:
+        return False
+    return True
+
+
+# Fan one response (SimpleQuestion or QuestionList) out into journaled questions
+def record_questions(journal, response, combination, slots):
+    recorded = 0
+    for index, question_text in zip(slots, question_texts(response, slots)):
+        journal.append(index, build_question(question_text, combination).model_dump())
+        recorded += 1
+    return recorded
+
+
+# Compact the journal into the output file in the chosen format; returns (path, count)
+def save_output(journal, output_path, output_format):
+    if output_format != "json":
+        output_path = f"{os.path.splitext(output_path)[0]}.{output_format}"
+    print(f"Compacting journal into {output_path}...")
+    if output_format == "json":
+        return output_path, journal.compact(output_path)
+    # Each dimension object is written once and referenced by id
+    return output_path, write_compact(output_path, journal.iter_questions())
+
+
+# Report a retry of question i (used as the retry policy's on_retry callback)
+def report_retry(i):
+    def on_retry(error, attempt, delay):
+        print(
+            f"Retrying question {i} after {classify_error(error)} error "
+            f"(attempt {attempt}, waiting {delay:.1f}s): {error}"
+        )
 
+    return on_retry
+
+
+def generate_serially(
+    structured_llm,
+    prompt_template,
+    pending,
+    total,
+    journal,
+    per_call=1,
+    retry_policy=None,
+    metrics=None,
+    retriever=None,
+):
+    """Generate the questions of each pending (index, combination), one blocking call at a time.
+
+    Throttling and transient errors, including answers with fewer distinct questions than
+    requested, are retried with jittered exponential backoff. Each call is recorded in
+    metrics, tagged with its combination.
+    """
+    generated_count = 0
+    retry_policy = retry_policy or RetryPolicy()
+    metrics = metrics or CallMetrics(None, "discussion-questions", MODEL_NAME)
+
+    for i, combination in pending:
+        print(f"Generating question {i}/{total}...")
+        slots = question_slots(i, per_call)
+        filled_prompt = fill_prompt(prompt_template, combination, per_call, retriever)
+        metrics.start(i, combination_tag(combination))
+        config = {"metadata": {"call_id": i, "questions": len(slots)}}
+
+        def attempt():
+            response = structured_llm.invoke(filled_prompt, config=config)
+            question_texts(response, slots)
+            return response
+
+        # Generate the question(s) using LLM
+        try:
+            response = call_with_retry(attempt, retry_policy, on_retry=report_retry(i))
+            recorded = record_questions(journal, response, combination, slots)
+            generated_count += recorded
+            metrics.finish(i, questions=recorded)
 
-# Create the prompt template
-def create_prompt_template():
-    return """You are an expert at generating contextually relevant questions that a target user would ask.
+        except Exception as e:
+            metrics.finish(i, error=e)
+            print(f"Error generating question {i} ({classify_error(e)}): {e}")
+            continue
 
-Put yourself in the shoes of these target users when generating the question. Because we are trying to simulate what these users will ask.
-<target users>
-The L Suite at TheSuite.com is used by a highly specific and exclusive audience consisting of:
+    return generated_count
+
+
+async def generate_concurrently(
+    structured_llm,
+    prompt_template,
+    pending,
+    total,
+    journal,
+    concurrency,
+    rate_limiter,
+    per_call=1,
+    retry_policy=None,
+    controller=None,
+    metrics=None,
+    retriever=None,
+):
+    """Generate questions with up to `concurrency` ainvoke calls in flight.
+
+    Each question is journaled as soon as it completes; compaction restores
+    combination order. Failed calls and answers with fewer distinct questions
+    than requested are retried per retry_policy; with an
+    AIMDController, the number of calls in flight adapts between its bounds
+    (concurrency is then the upper bound on workers). Time spent waiting for
+    the rate limiter or a controller slot is recorded as the call's queue wait.
+    """
+    retry_policy = retry_policy or RetryPolicy()
+    metrics = metrics or CallMetrics(None, "discussion-questions", MODEL_NAME)
+
+    async def generate_one(i, combination):
+        metrics.start(i, combination_tag(combination))
+        slots = question_slots(i, per_call)
+        filled_prompt = fill_prompt(prompt_template, combination, per_call, retriever)
+        config = {"metadata": {"call_id": i, "questions": len(slots)}}
+
+        async def attempt():
+            await rate_limiter.acquire(estimate_tokens(filled_prompt))
+            response = await structured_llm.ainvoke(filled_prompt, config=config)
+            question_texts(response, slots)
+            return response
 
-Chief Legal Officers (CLOs) and General Counsels (GCs): These are the most senior legal executives within their organizations, responsible for all strategic legal, compliance, and governance matters.
+        try:
+            response = await acall_with_retry(
+                attempt, retry_policy, controller, on_retry=report_retry(i)
+            )
+        except Exception as e:
+            metrics.finish(i, error=e)
+            print(f"Error generating question {i} ({classify_error(e)}): {e}")
+            return 0
+
+        recorded = record_questions(journal, response, combination, slots)
+        metrics.finish(i, questions=recorded)
+        print(f"Generated question {i}/{total}")
+        return recorded
+
+    results = await gather_in_order(pending, generate_one, concurrency)
+    return sum(results)
+
+
+def generate_adaptively(
+    run_calls,
+    journal,
+    pending,
+    completed,
+    per_call,
+    diversity_target,
+    slice_by="domain",
+    round_calls=None,
+    novelty_threshold=0.5,
+    min_novelty=0.25,
+):
+    """Generate in rounds, shifting calls to the dimension values still producing novel questions.
+
+    The pending (index, combination) pairs are sliced by their slice_by dimension; each
+    slice walks its combinations in a fixed shuffled order so its first calls already
+    vary the other dimensions (see shared.adaptive_budget.AdaptiveBudget). run_calls(pending)
+    makes one round of calls. Questions already in the journal (resume) seed each slice's
+    history. Returns (generated count, AdaptiveBudget).
+    """
+    from shared.adaptive_budget import AdaptiveBudget
+
+    position, field = SLICE_DIMENSIONS[slice_by]
+    slices = {}
+    for i, combination in pending:
+        slices.setdefault(combination[position]["dimension"], []).append(
+            (i, combination)
+        )
+    shuffler = random.Random(0)
+    for entries in slices.values():
+        shuffler.shuffle(entries)
+
+    budget = AdaptiveBudget(
+        slices,
+        max_calls=sum(len(entries) for entries in slices.values()),
+        diversity_target=diversity_target,
+        questions_per_call=per_call,
+        round_calls=round_calls,
+        novelty_threshold=novelty_threshold,
+        min_novelty=min_novelty,
+    )
+    if completed:
+        for _, question in journal.iter_questions():
+            key = question[field]["dimension"]
+            if key in budget.texts:
+                budget.observe(key, question["question"])
+
+    generated_count = 0
+    while True:
+        calls = budget.next_round()
+        if not calls:
+            break
+
+        round_pending = sorted(entry for _, entry in calls)
+        generated_count += run_calls(round_pending)
+
+        slots = {
+            index for i, _ in round_pending for index in question_slots(i, per_call)
+        }
+        for index, question, _ in journal.iter_entries():
+            if index in slots:
+                budget.observe(question[field]["dimension"], question["question"])
+
+    return generated_count, budget
+
+
+class GenerationOptions(BaseModel):
+    """Knobs of one generate_questions() run; the defaults match the plain CLI run.
+
+    plan="full" streams every combination of the four categories; plan="covering"
+    generates only a t-wise covering array (pairwise by default, optionally
+    weighted per dimension and capped at max_rows).
+
+    With use_async=True the combinations are generated concurrently via ainvoke,
+    bounded by `concurrency` and the optional requests/tokens-per-minute limits.
+    Responses are served from the on-disk LLM cache unless use_cache=False.
+    With resume=True, combinations already in the journal are skipped.
+
+    Before any call, every pending prompt is rendered and token-counted; the run is
+    refused if it exceeds max_total_tokens or max_call_tokens (default: the model's
+    context window). With preflight_only=True only the report is printed.
+    With questions_per_call > 1, each call returns a QuestionList of that many
+    distinct questions for its combination, fanned out into individual records. An
+    answer with fewer distinct questions is retried like a transient error and is
+    never cached.
+
+    With providers (a spec such as "openai:gpt-5-mini:weight=3,fake:fake-chat"), calls
+    are spread across several providers/models by the LLM router instead of ChatOpenAI.
+
+    Throttled and transient calls are retried up to max_attempts times with jittered
+    exponential backoff. With adaptive=True (async mode), an AIMD controller finds the
+    sustainable number of in-flight calls, up to `concurrency`.
+
+    With dedup_threshold set, near-duplicate questions (hashed TF-IDF cosine at or
+    above the threshold) are regenerated in up to dedup_rounds targeted passes.
+
+    With thread_index (a BM25 index built by shared/bm25_index.py), each prompt also
+    carries the `examples` real forum threads that best match its combination, so
+    combinations sharing a dimension no longer all see the same fixed few-shots.
+
+    With diversity_target set, the planned combinations are generated in rounds of about
+    round_calls (generate_adaptively()), sliced by the slice_by dimension: a question is
+    novel when its hashed TF-IDF cosine to every earlier question of its slice is below
+    novelty_threshold, slices whose last round was less than min_novelty novel get no
+    more calls, and the rest of the plan goes to the others by novelty rate. The run
+    stops once diversity_target novel questions exist; the plan then only caps the spend.
+
+    With output_format="jsonl" or "parquet" the output is written in the normalized
+    compact format instead (each dimension object stored once, questions reference it
+    by id; see shared.compact_output.read_compact to rehydrate). output_path overrides
+    the default output file (its journal sits next to it).
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    use_async: bool = False
+    concurrency: int = 8
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    use_cache: bool = True
+    resume: bool = False
+    preflight_only: bool = False
+    max_total_tokens: Optional[int] = None
+    max_call_tokens: Optional[int] = None
+    plan: str = "full"
+    strength: int = 2
+    weights: Optional[Dict[str, float]] = None
+    max_rows: Optional[int] = None
+    dedup_threshold: Optional[float] = None
+    dedup_rounds: int = 3
+    questions_per_call: int = 1
+    providers: Optional[str] = None
+    max_attempts: int = 5
+    adaptive: bool = False
+    output_format: str = "json"
+    output_path: Optional[str] = None
+    thread_index: Optional[str] = None
+    examples: int = 3
+    diversity_target: Optional[int] = None
+    slice_by: str = "domain"
+    round_calls: Optional[int] = None
+    novelty_threshold: float = 0.5
+    min_novelty: float = 0.25
+
+
+def generate_questions(options=None, llm=None, **overrides):
+    """Main function to generate all questions based on dimension combinations.
+
+    options is a GenerationOptions (default: the plain CLI run); keyword overrides
+    replace single fields, e.g. generate_questions(use_async=True, concurrency=16).
+    llm supplies a ready chat model (e.g. shared.fake_llm.FakeChatModel for offline
+    benchmarks) in place of ChatOpenAI / the provider router.
+
+    Every question is appended to a JSONL journal as it completes, and the journal
+    is compacted into the output file at the end.
+
+    Every call's wall time, queue wait, token usage, retries and outcome are written,
+    tagged with its combination, to <output>.metrics.jsonl, summarized in the
+    Prometheus textfile <output>.prom, and printed as a latency histogram at the end.
+    Returns the QuestionResults, or None if the pre-flight check stopped the run.
+    """
+    options = GenerationOptions.model_validate(
+        {**(options or GenerationOptions()).model_dump(), **overrides}
+    )
+    print("Loading dimensions...")
+    dimensions_data = load_dimensions()
 
-Corporate Legal Leaders: Includes roles such as Corporate Secretary, Head of Global Policy, and similar senior positions within the legal function.
+    print("Generating dimension combinations...")
+    combinations = generate_dimension_combinations(
+        dimensions_data,
+        strategy=options.plan,
+        strength=options.strength,
+        weights=options.weights,
+        max_rows=options.max_rows,
+    )
 
-Executives from Leading Companies: Current users are GCs and CLOs at well-known, high-growth or leading organizations such as Grammarly, Notion, Lyft, Mastercard, Hubspot, Andreessen Horowitz, Riskified, Google Ventures, and Nomad Health.
+    # Save to JSON file in the same directory as this script
+    output_path = options.output_path or default_output_path()
+    journal = QuestionJournal(journal_path_for(output_path))
 
-Serves Both Early-Stage and Public Companies: Members come from both startups, growth-stage tech companies, and large, established public corporations, as well as investment funds involved in these markets.
+    completed = journal.completed_indices() if options.resume else set()
 
-Decision-Makers: All users hold significant decision-making authority and are typically accountable to their board of directors, C-suite, or investors on key legal issues.
+    # A combination is done once all of its question slots are journaled
+    def is_done(i):
+        return all(
+            index in completed
+            for index in question_slots(i, options.questions_per_call)
+        )
 
-In summary:
-The L Suite's core users are C-level legal executives—specifically General Counsels, CLOs, and their direct peers—at technology-forward companies and investment funds, who are the ultimate legal decision-makers and thought leaders for their organizations.
-</target users>
+    pending_count = len(combinations) - sum(
+        1 for i in range(1, len(combinations) + 1) if is_done(i)
+    )
 
-Generate 1 question using the following dimensional context to shape the question:
+    # Lazily (re-)walk the plan, skipping completed combinations
+    def iter_pending():
+        return (
+            (i, combination)
+            for i, combination in enumerate(combinations, 1)
+            if not is_done(i)
+        )
 
-**Request Intent Category - {intent_dimension}:**
-Description: {intent_description}
-Examples: {intent_examples}
+    if completed:
+        print(f"Resuming: {len(completed)} questions already in {journal.path}")
 
-**Request Specificity - {specificity_dimension}:**
-Description: {specificity_description} 
-Examples: {specificity_examples}
+    prompt_template = create_prompt_template()
+    retriever = (
+        thread_retriever(options.thread_index, options.examples)
+        if options.thread_index
+        else None
+    )
 
-**Domain & Subject Matter - {domain_dimension}:**
-Description: {domain_description}
-Examples: {domain_examples}
+    report = preflight(
+        (
+            fill_prompt(
+                prompt_template, combination, options.questions_per_call, retriever
+            )
+            for _, combination in iter_pending()
+        ),
+        MODEL_NAME,
+        concurrency=options.concurrency if options.use_async else 1,
+        expected_output_tokens=MODEL_PROFILES[MODEL_NAME]["expected_output_tokens"]
+        * options.questions_per_call,
+    )
+    print_preflight_report(report)
+    try:
+        check_budget(report, options.max_total_tokens, options.max_call_tokens)
+    except BudgetExceeded as e:
+        print(f"❌ Refusing to run: {e}")
+        return None
+    if options.preflight_only:
+        return None
 
-**User Persona - {persona_dimension}:**
-Description: {persona_description}
-Examples: {persona_examples}
+    journal.open(resume=options.resume)
 
-CRITICAL INSTRUCTIONS FOR STYLE MATCHING:
-- Capture the INTENT and CONTEXT of the examples while VARYING the phrasing
-- Match the level of detail and specificity shown in the examples
-- Include similar contextual details based on the dimensional context that match the persona
-- Use the same natural, peer-to-peer conversational tone as the examples
+    print("Setting up LLM...")
+    # Deferred so importing this module (e.g. from cli.py) stays fast
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if llm is not None:
+        print(f"Using the supplied model {llm.model_name}")
+    elif options.providers:
+        llm = LLMRouter.from_spec(options.providers)
+        print(f"Routing across {llm.model_name}")
+    else:
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(model=MODEL_NAME)
+    metrics_path, prometheus_path = metrics_paths_for(output_path)
+    metrics = CallMetrics(
+        metrics_path, "discussion-questions", getattr(llm, "model_name", MODEL_NAME)
+    )
+    llm = MeteredChatModel(llm, metrics)
+    cache = LLMCache() if options.use_cache else None
+
+    def structured(schema):
+        structured_llm = llm.with_structured_output(schema)
+        if cache is not None:
+            cache_model = getattr(llm, "model_name", MODEL_NAME)
+            structured_llm = CachedStructuredLLM(
+                structured_llm, cache, cache_model, schema, accept=is_complete
+            )
+        return structured_llm
 
-AVOID THESE REPETITIVE PATTERNS:
-- Do NOT start every question with "For those of you..." or "For those..."
-- Do NOT always use "For those leading..." or "For those at..."
-- Do NOT always use "Curious to hear..." or "Has anyone..."
-- Do NOT end every question with "Would love to hear..." or "much appreciated"
-- AVOID using the exact same opening as previous questions
+    structured_llm = structured(
+        QuestionList if options.questions_per_call > 1 else SimpleQuestion
+    )
 
-INSTEAD, VARY YOUR OPENINGS based on the intent:
-- For Resource Acquisition: "Looking for recommendations on...", "Need help finding...", "Can anyone suggest...", "We need a consultant who..."
-- For Knowledge Sharing: "What's your approach to...", "How do other companies handle...", "What strategies work for...", "Anyone have experience with..."
-- For Problem Resolution: "We're struggling with...", "Running into issues with...", "Need guidance on...", "How do you solve..."
-- For different personas: Adjust formality and technical depth appropriately
+    retry_policy = RetryPolicy(max_attempts=options.max_attempts)
+    controller = (
+        AIMDController(maximum=options.concurrency) if options.adaptive else None
+    )
 
-VARY YOUR CLOSINGS:
-- Mix between: "Thanks!", "Any insights?", "Appreciate the help", or simply end without a closing
-- Sometimes include context about urgency or specific needs
-- Sometimes just end with the question
+    def run_calls(pending):
+        if options.use_async:
+            # One limiter per event loop (its bucket locks are bound to the loop)
+            rate_limiter = RateLimiter(
+                options.requests_per_minute, options.tokens_per_minute
+            )
+            return asyncio.run(
+                generate_concurrently(
+                    structured_llm,
+                    prompt_template,
+                    pending,
+                    len(combinations),
+                    journal,
+                    options.concurrency,
+                    rate_limiter,
+                    options.questions_per_call,
+                    retry_policy,
+                    controller,
+                    metrics,
+                    retriever,
+                )
+            )
+        return generate_serially(
+            structured_llm,
+            prompt_template,
+            pending,
+            len(combinations),
+            journal,
+            options.questions_per_call,
+            retry_policy,
+            metrics,
+            retriever,
+        )
 
-Your question should:
-- Reflect the intent, specificity, domain, and persona through CONTENT not just phrasing
-- Sound authentic to someone in that role/situation
-- Feel natural and varied, not formulaic
+    budget = None
+    try:
+        if options.diversity_target is not None:
+            print(
+                f"Generating until {options.diversity_target} novel questions, "
+                f"in at most {pending_count} calls sliced by {options.slice_by}..."
+            )
+            generated_count, budget = generate_adaptively(
+                run_calls,
+                journal,
+                iter_pending(),
+                completed,
+                options.questions_per_call,
+                options.diversity_target,
+                options.slice_by,
+                options.round_calls,
+                options.novelty_threshold,
+                options.min_novelty,
+            )
+        else:
+            print(
+                f"Generating {pending_count * options.questions_per_call} questions..."
+            )
+            generated_count = run_calls(iter_pending())
+    finally:
+        journal.close()
+
+    if options.dedup_threshold is not None:
+        from shared.question_dedup import deduplicate_journal
+
+        remaining = deduplicate_journal(
+            journal,
+            structured(SimpleQuestion),
+            lambda question: fill_prompt(
+                prompt_template,
+                (
+                    question["intent_dimension"],
+                    question["specificity_dimension"],
+                    question["domain_dimension"],
+                    question["persona_dimension"],
+                ),
+                retriever=retriever,
+            ),
+            threshold=options.dedup_threshold,
+            max_rounds=options.dedup_rounds,
+            workers=options.concurrency,
+        )
+        if remaining:
+            print(
+                f"⚠️ {remaining} near-duplicate questions remain "
+                f"after {options.dedup_rounds} rounds"
+            )
 
-Generate a question that captures the essence of the dimensional context while sounding fresh and different from typical patterns."""
+    output_path, total_generated = save_output(
+        journal, output_path, options.output_format
+    )
 
+    print(f"✅ Successfully generated {generated_count} questions!")
+    print(f"📁 Output saved to: {output_path} ({total_generated} questions)")
+    missing = len(combinations) * options.questions_per_call - total_generated
+    if budget is not None:
+        budget.print_report()
+    elif missing > 0:
+        print(f"⚠️ {missing} questions missing; rerun with --resume to retry them")
+    if controller is not None:
+        print(
+            f"🎚️  Adaptive concurrency: settled at {int(controller.limit)}, "
+            f"peak {int(controller.peak)} (max {options.concurrency})"
+        )
 
-# Simple question model for LLM output
-class SimpleQuestion(BaseModel):
-    question: str
+    metrics.close()
+    metrics.write_prometheus(prometheus_path)
+    metrics.print_summary()
+    print(f"📈 Call metrics: {metrics_path}, {prometheus_path}")
 
+    if options.providers:
+        print_router_stats(llm.chat_model)
 
-def generate_questions():
-    """Main function to generate all questions based on dimension combinations."""
-    print("Loading dimensions...")
-    dimensions_data = load_dimensions()
+    if cache is not None:
+        print_cache_stats(cache)
+        cache.close()
 
-    print("Generating dimension combinations...")
-    combinations = generate_dimension_combinations(dimensions_data)
+    return QuestionResults(
+        questions=[question for _, question in journal.iter_questions()],
+        total_generated=total_generated,
+    )
 
-    print("Setting up LLM...")
-    llm = ChatOpenAI(model="gpt-5-mini")
-    structured_llm = llm.with_structured_output(SimpleQuestion)
 
+def default_output_path():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, "generated_discussion_questions.json")
+
+
+def render_manifest(
+    manifest_path,
+    plan="full",
+    strength=2,
+    weights=None,
+    max_rows=None,
+    questions_per_call=1,
+    thread_index=None,
+    examples=3,
+):
+    """Write every planned call as a provider-neutral batch request manifest, without a model.
+
+    Each request carries its filled prompt, the structured-output schema name (the JSON
+    schemas are in the manifest header) and, as metadata, the combination and journal
+    slots that ingest_results() needs to rebuild the questions. Returns the request count.
+    """
+    combinations = generate_dimension_combinations(
+        load_dimensions(),
+        strategy=plan,
+        strength=strength,
+        weights=weights,
+        max_rows=max_rows,
+    )
     prompt_template = create_prompt_template()
-
-    generated_questions = []
-
-    print(f"Generating {len(combinations)} questions...")
-    for i, (intent_dim, specificity_dim, domain_dim, persona_dim) in enumerate(
-        combinations, 1
-    ):
-        print(f"Generating question {i}/{len(combinations)}...")
-
-        # Prepare the prompt with dimension values
-        filled_prompt = prompt_template.format(
-            intent_dimension=intent_dim["dimension"],
-            intent_description=intent_dim["description"],
-            intent_examples="\n".join(f"- {ex}" for ex in intent_dim["examples"]),
-            specificity_dimension=specificity_dim["dimension"],
-            specificity_description=specificity_dim["description"],
-            specificity_examples="\n".join(
-                f"- {ex}" for ex in specificity_dim["examples"]
-            ),
-            domain_dimension=domain_dim["dimension"],
-            domain_description=domain_dim["description"],
-            domain_examples="\n".join(f"- {ex}" for ex in domain_dim["examples"]),
-            persona_dimension=persona_dim["dimension"],
-            persona_description=persona_dim["description"],
-            persona_examples="\n".join(f"- {ex}" for ex in persona_dim["examples"]),
-        )
-
-        # Generate the question using LLM
-        try:
-            response = structured_llm.invoke(filled_prompt)
-
-            # Create the full question object with dimension metadata
-            question_obj = GeneratedQuestion(
-                question=response.question,
-                intent_dimension=DimensionInfo(
-                    dimension=intent_dim["dimension"],
-                    description=intent_dim["description"],
-                    examples=intent_dim["examples"],
-                ),
-                specificity_dimension=DimensionInfo(
-                    dimension=specificity_dim["dimension"],
-                    description=specificity_dim["description"],
-                    examples=specificity_dim["examples"],
-                ),
-                domain_dimension=DimensionInfo(
-                    dimension=domain_dim["dimension"],
-                    description=domain_dim["description"],
-                    examples=domain_dim["examples"],
-                ),
-                persona_dimension=DimensionInfo(
-                    dimension=persona_dim["dimension"],
-                    description=persona_dim["description"],
-                    examples=persona_dim["examples"],
-                ),
+    retriever = thread_retriever(thread_index, examples) if thread_index else None
+    schema_name = "QuestionList" if questions_per_call > 1 else "SimpleQuestion"
+
+    count = write_manifest(
+        manifest_path,
+        "discussion-questions",
+        MODEL_NAME,
+        {"SimpleQuestion": SimpleQuestion, "QuestionList": QuestionList},
+        (
+            (
+                i,
+                schema_name,
+                fill_prompt(prompt_template, combination, questions_per_call, retriever),
+                {
+                    "combination": list(combination),
+                    "slots": list(question_slots(i, questions_per_call)),
+                },
             )
-
-            generated_questions.append(question_obj)
-
-        except Exception as e:
-            print(f"Error generating question {i}: {e}")
-            continue
-
-    # Create final results object
-    results = QuestionResults(
-        questions=generated_questions, total_generated=len(generated_questions)
+            for i, combination in enumerate(combinations, 1)
+        ),
     )
-
-    # Save to JSON file in the same directory as this script
-    import os
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(script_dir, "generated_discussion_questions.json")
-    print(f"Saving {len(generated_questions)} questions to {output_path}...")
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results.model_dump(), f, indent=2, ensure_ascii=False)
-
-    print(f"✅ Successfully generated {len(generated_questions)} questions!")
-    print(f"📁 Output saved to: {output_path}")
-
-    return results
+    print(f"📝 Rendered {count} requests to {manifest_path}")
+    return count
+
+
+def ingest_results(manifest_path, results_path, output_path=None, output_format="json"):
+    """Join a batch result file onto its manifest and write the usual QuestionResults output.
+
+    Results are matched by custom_id, so results of edited or re-planned prompts are ignored;
+    calls without a usable result are reported and left out. Returns the output path.
+    """
+    output_path = output_path or default_output_path()
+    join = ResultJoin(manifest_path, results_path, "discussion-questions")
+    schemas = {"SimpleQuestion": SimpleQuestion, "QuestionList": QuestionList}
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    journal = QuestionJournal(journal_path_for(output_path)).open()
+    recorded = 0
+    try:
+        for request, output in join:
+            try:
+                response = schemas[request["schema"]].model_validate(output)
+            except ValueError as e:
+                join.record_failure(request, e)
+                continue
+            metadata = request["metadata"]
+            try:
+                recorded += record_questions(
+                    journal, response, metadata["combination"], metadata["slots"]
+                )
+            except IncompleteResponseError as e:
+                join.record_failure(request, e)
+    finally:
+        journal.close()
+
+    output_path, total_generated = save_output(journal, output_path, output_format)
+    join.print_report()
+    print(f"✅ Ingested {recorded} questions!")
+    print(f"📁 Output saved to: {output_path} ({total_generated} questions)")
+    return output_path
 
 
 if __name__ == "__main__":
-    generate_questions()
+    parser = argparse.ArgumentParser(description="Generate discussion forum questions")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Generate concurrently with ainvoke instead of one call at a time",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Max in-flight calls in --async mode"
+    )
+    parser.add_argument(
+        "--rpm", type=float, default=None, help="Requests-per-minute limit (--async)"
+    )
+    parser.add_argument(
+        "--tpm", type=float, default=None, help="Tokens-per-minute limit (--async)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Bypass the on-disk LLM response cache",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip combinations already in the journal from an interrupted run",
+    )
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="Only render and token-count the prompts, then print the report",
+    )
+    parser.add_argument(
+        "--max-total-tokens",
+        type=int,
+        default=None,
+        help="Refuse to run if all prompts together exceed this many input tokens",
+    )
+    parser.add_argument(
+        "--max-call-tokens",
+        type=int,
+        default=None,
+        help="Refuse to run if any prompt exceeds this many tokens (default: context window)",
+    )
+    parser.add_argument(
+        "--plan",
+        choices=["full", "covering"],
+        default="full",
+        help="Stream the full product, or generate a t-wise covering array",
+    )
+    parser.add_argument(
+        "--strength",
+        type=int,
+        default=2,
+        help="Interaction strength t for --plan covering (2 = pairwise)",
+    )
+    parser.add_argument(
+        "--max-rows",
+        type=int,
+        default=None,
+        help="Cap the covering array size (heavier interactions are covered first)",
+    )
+    parser.add_argument(
+        "--weight",
+        action="append",
+        default=[],
+        metavar="DIMENSION=WEIGHT",
+        help="Weight a dimension in the covering array, e.g. 'Personal or Pro Bono Request=0.5'",
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=None,
+        help="Regenerate questions whose cosine similarity to an earlier one is at least this (e.g. 0.9)",
+    )
+    parser.add_argument(
+        "--dedup-rounds",
+        type=int,
+        default=3,
+        help="Max targeted regeneration passes for --dedup-threshold",
+    )
+    parser.add_argument(
+        "--per-call",
+        type=int,
+        default=1,
+        help="Questions returned by each call for its combination (list-valued output)",
+    )
+    parser.add_argument(
+        "--providers",
+        default=None,
+        help="Route calls across providers, e.g. 'openai:gpt-5-mini:weight=3:rpm=500,vertexai:gemini-2.5-flash'",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="Attempts per call for throttled/transient errors (jittered exponential backoff)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="AIMD concurrency control in --async mode, up to --concurrency in flight",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", *COMPACT_FORMATS],
+        default="json",
+        help="json: full QuestionResults; jsonl/parquet: normalized, with each dimension/category stored once",
+    )
+    parser.add_argument(
+        "--thread-index",
+        default=None,
+        help="BM25 index of the cleaned threads (shared/bm25_index.py build) for grounded few-shots",
+    )
+    parser.add_argument(
+        "--examples",
+        type=int,
+        default=3,
+        help="Real threads retrieved into each prompt with --thread-index",
+    )
+    parser.add_argument(
+        "--diversity-target",
+        type=int,
+        default=None,
+        help="Generate in rounds until this many novel questions, shifting calls away from saturated slices (the plan caps the spend)",
+    )
+    parser.add_argument(
+        "--slice-by",
+        choices=list(SLICE_DIMENSIONS),
+        default="domain",
+        help="Dimension whose values are the slices for --diversity-target",
+    )
+    parser.add_argument(
+        "--round-calls",
+        type=int,
+        default=None,
+        help="Calls per round for --diversity-target (default: two per slice)",
+    )
+    parser.add_argument(
+        "--novelty-threshold",
+        type=float,
+        default=0.5,
+        help="A question is novel below this cosine similarity to its slice's earlier questions",
+    )
+    parser.add_argument(
+        "--min-novelty",
+        type=float,
+        default=0.25,
+        help="A slice whose last round was less novel than this gets no more calls",
+    )
+    parser.add_argument(
+        "--render-manifest",
+        metavar="PATH",
+        default=None,
+        help="Only write every planned call to a batch request manifest (no model calls)",
+    )
+    parser.add_argument(
+        "--ingest",
+        nargs=2,
+        metavar=("MANIFEST", "RESULTS"),
+        default=None,
+        help="Build the output from a batch result file instead of calling a model",
+    )
+    args = parser.parse_args()
+
+    weights = {}
+    for spec in args.weight:
+        name, _, value = spec.rpartition("=")
+        weights[name.strip()] = float(value)
+
+    if args.render_manifest:
+        render_manifest(
+            args.render_manifest,
+            plan=args.plan,
+            strength=args.strength,
+            weights=weights,
+            max_rows=args.max_rows,
+            questions_per_call=args.per_call,
+            thread_index=args.thread_index,
+            examples=args.examples,
+        )
+        sys.exit(0)
+    if args.ingest:
+        ingest_results(*args.ingest, output_format=args.format)
+        sys.exit(0)
+
+    options = GenerationOptions(
+        use_async=args.use_async,
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        use_cache=args.use_cache,
+        resume=args.resume,
+        preflight_only=args.preflight,
+        max_total_tokens=args.max_total_tokens,
+        max_call_tokens=args.max_call_tokens,
+        plan=args.plan,
+        strength=args.strength,
+        weights=weights,
+        max_rows=args.max_rows,
+        dedup_threshold=args.dedup_threshold,
+        dedup_rounds=args.dedup_rounds,
+        questions_per_call=args.per_call,
+        providers=args.providers,
+        max_attempts=args.max_attempts,
+        adaptive=args.adaptive,
+        output_format=args.format,
+        thread_index=args.thread_index,
+        examples=args.examples,
+        diversity_target=args.diversity_target,
+        slice_by=args.slice_by,
+        round_calls=args.round_calls,
+        novelty_threshold=args.novelty_threshold,
+        min_novelty=args.min_novelty,
+    )
+    generate_questions(options)
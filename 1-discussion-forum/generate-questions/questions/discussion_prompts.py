@@ -0,0 +1,233 @@
+"""
+Dimension combination planning and prompt rendering for discussion-questions.py, kept free of
+pydantic and the LLM stack so that `cli.py plan` and `cli.py render` start quickly.
+
+Input data sources: ../final-dimensions/final-dimensions.json, a BM25 thread index (thread_retriever())
+Output destinations: None
+Dependencies: Standard library (numpy only when thread_retriever() loads an index)
+Key exports: load_dimensions(), generate_dimension_combinations(), create_prompt_template(), fill_prompt(),
+             combination_tag(), combination_query(), thread_retriever(), question_slots()
+Side effects: Prints the combination plan and its coverage
+"""
+
+import json
+import os
+import sys
+
+# Make the repo-level shared helpers importable however this module is loaded
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+)
+
+from shared.combination_planner import coverage_report, plan_combinations
+
+
+# Load dimensions data
+def load_dimensions():
+    # Get the directory of this script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    # Navigate to the final-dimensions directory
+    dimensions_file = os.path.join(
+        script_dir, "..", "final-dimensions", "final-dimensions.json"
+    )
+
+    with open(dimensions_file, "r") as f:
+        return json.load(f)
+
+
+# Plan the dimension combinations to generate: the full product or a covering array
+def generate_dimension_combinations(
+    dimensions_data, strategy="full", strength=2, weights=None, max_rows=None
+):
+    dimension_lists = [
+        dimensions_data["Intent & Task Type"],
+        dimensions_data["Request Specificity & Clarity"],
+        dimensions_data["Domain & Subject Matter"],
+        dimensions_data["User & Contextual Profile"],
+    ]
+
+    # Optional per-dimension weights, keyed by dimension name (default 1.0)
+    value_weights = None
+    if weights:
+        value_weights = [
+            [weights.get(dim["dimension"], 1.0) for dim in dims]
+            for dims in dimension_lists
+        ]
+
+    plan = plan_combinations(
+        dimension_lists,
+        strategy=strategy,
+        strength=strength,
+        weights=value_weights,
+        max_rows=max_rows,
+    )
+
+    report = coverage_report(plan, strength, value_weights)
+    print(f"Total possible combinations: {report['full_product_rows']}")
+    if strategy == "full":
+        print(f"Will generate {len(plan)} questions using all combinations")
+    else:
+        print(
+            f"Will generate {len(plan)} questions from a {report['strength']}-wise covering array"
+        )
+        print(
+            f"Coverage: {report['tuples_covered']}/{report['tuples_total']} "
+            f"{report['strength']}-way interactions ({report['coverage']:.1%}, "
+            f"weighted {report['weighted_coverage']:.1%})"
+        )
+
+    return plan
+
+
+# Create the prompt template
+def create_prompt_template():
+    return """You are an expert at generating contextually relevant questions that a target user would ask.
+
+Put yourself in the shoes of these target users when generating the question. Because we are trying to simulate what these users will ask.
+<target users>
+The L Suite at TheSuite.com is used by a highly specific and exclusive audience consisting of:
+
+Chief Legal Officers (CLOs) and General Counsels (GCs): These are the most senior legal executives within their organizations, responsible for all strategic legal, compliance, and governance matters.
+
+Corporate Legal Leaders: Includes roles such as Corporate Secretary, Head of Global Policy, and similar senior positions within the legal function.
+
+Executives from Leading Companies: Current users are GCs and CLOs at well-known, high-growth or leading organizations such as Grammarly, Notion, Lyft, Mastercard, Hubspot, Andreessen Horowitz, Riskified, Google Ventures, and Nomad Health.
+
+Serves Both Early-Stage and Public Companies: Members come from both startups, growth-stage tech companies, and large, established public corporations, as well as investment funds involved in these markets.
+
+Decision-Makers: All users hold significant decision-making authority and are typically accountable to their board of directors, C-suite, or investors on key legal issues.
+
+In summary:
+The L Suite's core users are C-level legal executives—specifically General Counsels, CLOs, and their direct peers—at technology-forward companies and investment funds, who are the ultimate legal decision-makers and thought leaders for their organizations.
+</target users>
+
+Generate 1 question using the following dimensional context to shape the question:
+
+**Request Intent Category - {intent_dimension}:**
+Description: {intent_description}
+Examples: {intent_examples}
+
+**Request Specificity - {specificity_dimension}:**
+Description: {specificity_description} 
+Examples: {specificity_examples}
+
+**Domain & Subject Matter - {domain_dimension}:**
+Description: {domain_description}
+Examples: {domain_examples}
+
+**User Persona - {persona_dimension}:**
+Description: {persona_description}
+Examples: {persona_examples}
+
+CRITICAL INSTRUCTIONS FOR STYLE MATCHING:
+- Capture the INTENT and CONTEXT of the examples while VARYING the phrasing
+- Match the level of detail and specificity shown in the examples
+- Include similar contextual details based on the dimensional context that match the persona
+- Use the same natural, peer-to-peer conversational tone as the examples
+
+AVOID THESE REPETITIVE PATTERNS:
+- Do NOT start every question with "For those of you..." or "For those..."
+- Do NOT always use "For those leading..." or "For those at..."
+- Do NOT always use "Curious to hear..." or "Has anyone..."
+- Do NOT end every question with "Would love to hear..." or "much appreciated"
+- AVOID using the exact same opening as previous questions
+
+INSTEAD, VARY YOUR OPENINGS based on the intent:
+- For Resource Acquisition: "Looking for recommendations on...", "Need help finding...", "Can anyone suggest...", "We need a consultant who..."
+- For Knowledge Sharing: "What's your approach to...", "How do other companies handle...", "What strategies work for...", "Anyone have experience with..."
+- For Problem Resolution: "We're struggling with...", "Running into issues with...", "Need guidance on...", "How do you solve..."
+- For different personas: Adjust formality and technical depth appropriately
+
+VARY YOUR CLOSINGS:
+- Mix between: "Thanks!", "Any insights?", "Appreciate the help", or simply end without a closing
+- Sometimes include context about urgency or specific needs
+- Sometimes just end with the question
+
+Your question should:
+- Reflect the intent, specificity, domain, and persona through CONTENT not just phrasing
+- Sound authentic to someone in that role/situation
+- Feel natural and varied, not formulaic
+
+Generate a question that captures the essence of the dimensional context while sounding fresh and different from typical patterns."""
+
+
+MULTI_QUESTION_INSTRUCTIONS = """
+
+Instead of a single question, generate {count} DISTINCT questions for this same dimensional context. Each must be a complete, standalone question with its own opening, scenario and wording - do not reuse an opening or closing across the {count} questions. Return them as the `questions` list."""
+
+
+GROUNDING_INSTRUCTIONS = """
+
+Here are real threads from the forum that match this dimensional context. Use them to ground the question in the scenarios, details and tone these members actually bring up - but do NOT copy or paraphrase any single thread:
+<real_threads>
+{threads}
+</real_threads>"""
+
+
+# Characters of each retrieved thread body included in the prompt
+GROUNDING_BODY_CHARS = 800
+
+
+# Fill the prompt template with one dimension combination
+# (plus the real threads retriever(combination) returns, when grounding is on)
+def fill_prompt(prompt_template, combination, count=1, retriever=None):
+    intent_dim, specificity_dim, domain_dim, persona_dim = combination
+
+    prompt = prompt_template.format(
+        intent_dimension=intent_dim["dimension"],
+        intent_description=intent_dim["description"],
+        intent_examples="\n".join(f"- {ex}" for ex in intent_dim["examples"]),
+        specificity_dimension=specificity_dim["dimension"],
+        specificity_description=specificity_dim["description"],
+        specificity_examples="\n".join(f"- {ex}" for ex in specificity_dim["examples"]),
+        domain_dimension=domain_dim["dimension"],
+        domain_description=domain_dim["description"],
+        domain_examples="\n".join(f"- {ex}" for ex in domain_dim["examples"]),
+        persona_dimension=persona_dim["dimension"],
+        persona_description=persona_dim["description"],
+        persona_examples="\n".join(f"- {ex}" for ex in persona_dim["examples"]),
+    )
+    if retriever is not None:
+        threads = retriever(combination)
+        if threads:
+            prompt += GROUNDING_INSTRUCTIONS.format(
+                threads="\n".join(
+                    f"<thread>\n{thread['thread_title']}\n"
+                    f"{thread['thread_body'][:GROUNDING_BODY_CHARS].strip()}\n</thread>"
+                    for thread in threads
+                )
+            )
+    if count > 1:
+        prompt += MULTI_QUESTION_INSTRUCTIONS.format(count=count)
+    return prompt
+
+
+# Telemetry tag naming a combination's four dimensions
+def combination_tag(combination):
+    return " / ".join(dim["dimension"] for dim in combination)
+
+
+# BM25 query text for a combination: its dimension names, descriptions and examples
+def combination_query(combination):
+    return " ".join(
+        " ".join([dim["dimension"], dim["description"], *dim["examples"]])
+        for dim in combination
+    )
+
+
+# Retrieval-grounded few-shots: a combination -> top-k matching real threads callable
+def thread_retriever(index_path, k=3):
+    from shared.bm25_index import BM25Index
+
+    index = BM25Index(index_path)
+    print(f"Grounding prompts in the top {k} of {len(index)} threads from {index_path}")
+
+    def retrieve(combination):
+        return [thread for _, thread in index.search(combination_query(combination), k)]
+
+    return retrieve
+
+
+# Journal indices of the questions produced for combination i
+def question_slots(i, per_call):
+    return range((i - 1) * per_call + 1, i * per_call + 1)
@@ -0,0 +1,129 @@
+"""
+Near-duplicate detection for forum threads using word shingles, MinHash signatures and LSH banding.
+
+Threads are compared by estimated Jaccard similarity of their 5-word shingles, so reposts
+that differ only by whitespace, a signature or an edited sentence are caught. LSH bands
+keep lookups sub-quadratic: each new thread is only compared against threads that share
+at least one band bucket with it.
+
+Input data sources: None (called from process_threads.py)
+Output destinations: None
+Dependencies: numpy, zlib, re
+Key exports: NearDuplicateIndex, choose_bands()
+Side effects: None
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+# Mersenne prime 2^31 - 1 keeps a * x + b inside uint64 for 31-bit shingle hashes
+MERSENNE_PRIME = (1 << 31) - 1
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def choose_bands(threshold, num_perm):
+    """Pick (bands, rows) with bands * rows <= num_perm whose LSH S-curve midpoint is closest to threshold.
+
+    Two signatures become candidates with probability 1 - (1 - s^rows)^bands; that
+    curve rises most steeply near s = (1 / bands)^(1 / rows).
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        error = abs(midpoint - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """Online MinHash/LSH index: check each thread against those kept so far, then add it.
+
+    Only the kept threads' signatures (num_perm uint32 values each) and band keys are
+    held in memory.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=5, seed=42):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+        self.buckets = [{} for _ in range(self.bands)]
+        self.signatures = []
+        self.clusters = {}
+
+    def shingles(self, text):
+        """Hash the normalized word shingles of a thread body to 31-bit integers."""
+        words = WORD_PATTERN.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            grams = [" ".join(words)]
+        else:
+            grams = [
+                " ".join(words[i : i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)
+            ]
+
+        return np.fromiter(
+            (zlib.crc32(gram.encode("utf-8")) & MERSENNE_PRIME for gram in set(grams)),
+            dtype=np.uint64,
+        )
+
+    def signature(self, text):
+        hashes = self.shingles(text)
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signature):
+        return [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def find(self, signature):
+        """Return (kept_id, similarity) of the best match at or above threshold, else None."""
+        candidates = set()
+        for band, key in enumerate(self.band_keys(signature)):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        best = None
+        for candidate in candidates:
+            similarity = float(np.mean(self.signatures[candidate] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (candidate, similarity)
+        return best
+
+    def add(self, signature):
+        """Index a kept thread's signature and return its id (its position among kept threads)."""
+        kept_id = len(self.signatures)
+        self.signatures.append(signature)
+        for band, key in enumerate(self.band_keys(signature)):
+            self.buckets[band].setdefault(key, []).append(kept_id)
+        return kept_id
+
+    def check(self, text):
+        """Return (kept_id, similarity) if text near-duplicates a kept thread, otherwise index it and return None."""
+        signature = self.signature(text)
+        match = self.find(signature)
+        if match is None:
+            self.add(signature)
+        return match
+
+    def record_duplicate(self, kept_id, title, similarity):
+        cluster = self.clusters.setdefault(
+            kept_id, {"kept_thread_index": kept_id, "duplicates": []}
+        )
+        cluster["duplicates"].append(
+            {"thread_title": title, "similarity": round(similarity, 3)}
+        )
+
+    def cluster_report(self):
+        """Clusters sorted by kept thread, for the output metadata."""
+        return [self.clusters[kept_id] for kept_id in sorted(self.clusters)]
@@ -2,22 +2,99 @@
 Script to process discussion forum threads CSV file, remove duplicates, and extract title/body data.
 
 Input data sources: recent_threads_Aug2025.csv
-Output destinations: threads_cleaned.json
-Dependencies: csv, json
-Key exports: clean_and_extract_threads()
+Output destinations: threads_cleaned.json (or threads_cleaned.jsonl + threads_cleaned.meta.json in --stream mode), threads_index.sqlite3 (--incremental),
+                     and, only with --columnar PATH, a columnar store with ids, dates and authors (see shared/thread_store.py)
+Dependencies: csv, json (numpy for --near-dup-threshold, via near_duplicates.py)
+Key exports: clean_and_extract_threads(), stream_clean_threads(), incremental_ingest()
 Side effects: Creates JSON file, reads CSV file
+
+Usage: python process_threads.py [--stream | --incremental] [--input CSV] [--output PATH] [--near-dup-threshold 0.8]
+       [--columnar threads_cleaned.cols]
 """
 
+import argparse
 import csv
 import json
 import hashlib
+import os
+import sys
+
+# Make the repo-level shared helpers importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+def create_near_duplicate_index(threshold):
+    """Return a MinHash/LSH index for the given Jaccard threshold, or None when disabled."""
+    if threshold is None:
+        return None
+    
+    from near_duplicates import NearDuplicateIndex
+    
+    return NearDuplicateIndex(threshold=threshold)
+
+
+def is_near_duplicate(near_duplicate_index, thread_title, thread_body):
+    """Check a thread against the kept ones; records it in a cluster if it is a near-duplicate."""
+    if near_duplicate_index is None:
+        return False
+    
+    match = near_duplicate_index.check(thread_body)
+    if match is None:
+        return False
+    
+    kept_id, similarity = match
+    near_duplicate_index.record_duplicate(kept_id, thread_title, similarity)
+    return True
+
+
+def add_near_duplicate_metadata(metadata, near_duplicate_index):
+    if near_duplicate_index is None:
+        return
+    
+    clusters = near_duplicate_index.cluster_report()
+    metadata['near_duplicate_threshold'] = near_duplicate_index.threshold
+    metadata['near_duplicates_removed'] = sum(len(c['duplicates']) for c in clusters)
+    metadata['near_duplicate_clusters'] = clusters
+
 
-def clean_and_extract_threads():
+def create_columnar_writer(path):
+    """Return a writer for the columnar thread store, or None when disabled."""
+    if not path:
+        return None
+    
+    from shared.thread_store import ColumnarThreadWriter
+    
+    return ColumnarThreadWriter(path)
+
+
+def thread_record(row):
+    """The full CSV row of a kept thread, as stored in the columnar store."""
+    return {
+        'thread_id': row.get('thread_id'),
+        'thread_date': row.get('thread_date'),
+        'author_id': row.get('author_id'),
+        'thread_title': row['thread_title'],
+        'thread_body': row['thread_body']
+    }
+
+
+def close_columnar_writer(columnar_writer, metadata):
+    if columnar_writer is None:
+        return
+    
+    columnar_writer.close(metadata)
+    print(f"Columnar store created: {columnar_writer.path}")
+    if columnar_writer.invalid_dates:
+        print(f"Unparseable thread_date stored as undated: {columnar_writer.invalid_dates} threads")
+
+
+def clean_and_extract_threads(near_duplicate_threshold=None, columnar_path=None):
     print("Reading CSV file...")
     
     threads = []
     seen_bodies = set()
     duplicates_found = 0
+    near_duplicate_index = create_near_duplicate_index(near_duplicate_threshold)
+    columnar_writer = create_columnar_writer(columnar_path)
     
     with open('recent_threads_Aug2025.csv', 'r', encoding='utf-8') as file:
         reader = csv.DictReader(file)
@@ -35,17 +112,17 @@ def clean_and_extract_threads():
             
             if body_hash not in seen_bodies:
                 seen_bodies.add(body_hash)
+                if is_near_duplicate(near_duplicate_index, thread_title, thread_body):
+                    continue
                 threads.append({
                     'thread_title': thread_title,
                     'thread_body': thread_body
                 })
+                if columnar_writer is not None:
+                    columnar_writer.write(thread_record(row))
             else:
                 duplicates_found += 1
     
-    print(f"Total threads processed: {len(threads) + duplicates_found}")
-    print(f"Duplicates removed: {duplicates_found}")
-    print(f"Unique threads extracted: {len(threads)}")
-    
     # Create JSON output
     output_data = {
         'threads': threads,
@@ -54,14 +131,303 @@ def clean_and_extract_threads():
             'duplicates_removed': duplicates_found
         }
     }
+    add_near_duplicate_metadata(output_data['metadata'], near_duplicate_index)
+    near_duplicates_removed = output_data['metadata'].get('near_duplicates_removed', 0)
+    
+    print(f"Total threads processed: {len(threads) + duplicates_found + near_duplicates_removed}")
+    print(f"Duplicates removed: {duplicates_found}")
+    if near_duplicate_index is not None:
+        print(f"Near-duplicates removed: {near_duplicates_removed}")
+    print(f"Unique threads extracted: {len(threads)}")
     
     # Write to JSON file
     with open('threads_cleaned.json', 'w', encoding='utf-8') as outfile:
         json.dump(output_data, outfile, indent=2, ensure_ascii=False)
     
     print("JSON file created: threads_cleaned.json")
+    close_columnar_writer(columnar_writer, output_data['metadata'])
     
     return output_data
 
+
+class JsonArrayThreadWriter:
+    """Writes threads_cleaned.json incrementally, with metadata as a trailer after the threads array.
+
+    The bytes match json.dump(output_data, indent=2), so downstream readers are unchanged.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write('{\n  "threads": [')
+        self.count = 0
+    
+    def write(self, thread):
+        record = json.dumps(thread, indent=2, ensure_ascii=False).replace('\n', '\n    ')
+        self.file.write((',\n    ' if self.count else '\n    ') + record)
+        self.count += 1
+    
+    def close(self, metadata):
+        metadata_json = json.dumps(metadata, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        self.file.write(('\n  ]' if self.count else ']') + f',\n  "metadata": {metadata_json}\n}}')
+        self.file.close()
+
+
+class JsonlThreadWriter:
+    """Writes one thread per line, with metadata in a <name>.meta.json sidecar."""
+    
+    def __init__(self, path):
+        self.path = path
+        self.meta_path = os.path.splitext(path)[0] + '.meta.json'
+        self.file = open(path, 'w', encoding='utf-8')
+        self.count = 0
+    
+    def write(self, thread):
+        self.file.write(json.dumps(thread, ensure_ascii=False) + '\n')
+        self.count += 1
+    
+    def close(self, metadata):
+        self.file.close()
+        with open(self.meta_path, 'w', encoding='utf-8') as meta_file:
+            json.dump(metadata, meta_file, indent=2, ensure_ascii=False)
+
+
+def stream_clean_threads(input_path='recent_threads_Aug2025.csv', output_path='threads_cleaned.json', near_duplicate_threshold=None, columnar_path=None):
+    """Same cleaning as clean_and_extract_threads(), but in constant memory.
+    
+    Rows are read one at a time and each unique thread is written out as soon as it
+    passes dedup. The only per-thread state kept is the 16-byte MD5 digest of its body
+    (plus its MinHash signature when near-duplicate detection is on).
+    A .jsonl output path writes JSON Lines plus a .meta.json sidecar; anything else
+    writes the usual threads_cleaned.json layout with metadata as a trailer.
+    The columnar store, if any, is written alongside from the same rows.
+    """
+    print(f"Streaming threads from {input_path}...")
+    
+    seen_bodies = set()
+    duplicates_found = 0
+    near_duplicate_index = create_near_duplicate_index(near_duplicate_threshold)
+    columnar_writer = create_columnar_writer(columnar_path)
+    
+    if output_path.endswith('.jsonl'):
+        writer = JsonlThreadWriter(output_path)
+    else:
+        writer = JsonArrayThreadWriter(output_path)
+    
+    with open(input_path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file):
+            thread_title = row['thread_title']
+            thread_body = row['thread_body']
+            
+            # Skip rows with empty title or body
+            if not thread_title or not thread_body:
+                continue
+            
+            body_hash = hashlib.md5(thread_body.encode('utf-8')).digest()
+            
+            if body_hash in seen_bodies:
+                duplicates_found += 1
+                continue
+            
+            seen_bodies.add(body_hash)
+            if is_near_duplicate(near_duplicate_index, thread_title, thread_body):
+                continue
+            
+            writer.write({
+                'thread_title': thread_title,
+                'thread_body': thread_body
+            })
+            if columnar_writer is not None:
+                columnar_writer.write(thread_record(row))
+    
+    metadata = {
+        'total_unique_threads': writer.count,
+        'duplicates_removed': duplicates_found
+    }
+    add_near_duplicate_metadata(metadata, near_duplicate_index)
+    writer.close(metadata)
+    near_duplicates_removed = metadata.get('near_duplicates_removed', 0)
+    
+    print(f"Total threads processed: {writer.count + duplicates_found + near_duplicates_removed}")
+    print(f"Duplicates removed: {duplicates_found}")
+    if near_duplicate_index is not None:
+        print(f"Near-duplicates removed: {near_duplicates_removed}")
+    print(f"Unique threads extracted: {writer.count}")
+    print(f"Output file created: {output_path}")
+    close_columnar_writer(columnar_writer, metadata)
+    
+    return metadata
+
+def read_thread_store(store_path):
+    """Yield the thread dicts of an existing cleaned store (.json or .jsonl)."""
+    if not os.path.exists(store_path):
+        return
+    
+    with open(store_path, 'r', encoding='utf-8') as file:
+        if store_path.endswith('.jsonl'):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(file)['threads']
+
+
+def read_store_metadata(store_path):
+    """Return the metadata of an existing cleaned store (trailer or .meta.json sidecar)."""
+    if store_path.endswith('.jsonl'):
+        store_path = os.path.splitext(store_path)[0] + '.meta.json'
+        if not os.path.exists(store_path):
+            return {}
+        with open(store_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    
+    if not os.path.exists(store_path):
+        return {}
+    with open(store_path, 'r', encoding='utf-8') as file:
+        return json.load(file).get('metadata', {})
+
+
+def incremental_ingest(input_path='recent_threads_Aug2025.csv', store_path='threads_cleaned.json', index_path='threads_index.sqlite3', columnar_path=None):
+    """Merge a new export into the existing cleaned store, processing only new or changed threads.
+    
+    A persistent thread_id -> body digest index (threads_index.sqlite3) decides for every
+    row whether it is added, updated (same thread_id, edited body), skipped (unchanged) or
+    a duplicate of another thread's body. The store is then rewritten once with updated
+    threads replaced in place and new threads appended, and the columnar store (if any)
+    is rewritten from the merged threads. When a thread_id appears more than once in
+    the export, its last row wins.
+    """
+    from thread_index import LEGACY_PREFIX, ThreadIndex, body_digest
+    
+    print(f"Incrementally ingesting {input_path} into {store_path}...")
+    
+    index = ThreadIndex(index_path)
+    if index.is_empty():
+        # First run against an existing store: register its bodies without thread_ids.
+        # Edits to those threads can't be recognised until their ids have been adopted.
+        index.seed_legacy(thread['thread_body'] for thread in read_thread_store(store_path))
+    
+    added = {}
+    replacements = {}
+    # thread_id -> digest of its body in the store, for threads replaced in this run
+    replaced_digests = {}
+    report = {'added': 0, 'updated': 0, 'skipped': 0, 'duplicates': 0}
+    
+    with open(input_path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file):
+            thread_title = row['thread_title']
+            thread_body = row['thread_body']
+            
+            # Skip rows with empty title or body
+            if not thread_title or not thread_body:
+                continue
+            
+            thread_id = row['thread_id']
+            digest = body_digest(thread_body)
+            record = {
+                'thread_id': thread_id,
+                'thread_date': row['thread_date'],
+                'author_id': row['author_id'],
+                'thread_title': thread_title,
+                'thread_body': thread_body
+            }
+            
+            known_digest = index.lookup_id(thread_id)
+            holder = index.lookup_digest(digest)
+            
+            if known_digest == digest:
+                report['skipped'] += 1
+            elif holder is not None and holder.startswith(LEGACY_PREFIX):
+                # Already in the store from before the index existed; attach its ids
+                index.adopt_legacy(holder, thread_id, row['thread_date'], row['author_id'])
+                replacements[digest] = record
+                replaced_digests[thread_id] = digest
+                report['skipped'] += 1
+            elif holder is not None:
+                report['duplicates'] += 1
+            elif known_digest is not None:
+                # An earlier row of this export may already have added or replaced the
+                # thread; known_digest is then that row's body, which is not in the store
+                index.upsert(thread_id, digest, row['thread_date'], row['author_id'])
+                if thread_id in added:
+                    added[thread_id] = record
+                elif thread_id in replaced_digests:
+                    replacements[replaced_digests[thread_id]] = record
+                else:
+                    replacements[known_digest] = record
+                    replaced_digests[thread_id] = known_digest
+                    report['updated'] += 1
+            else:
+                index.upsert(thread_id, digest, row['thread_date'], row['author_id'])
+                added[thread_id] = record
+                report['added'] += 1
+    
+    metadata = read_store_metadata(store_path)
+    root, extension = os.path.splitext(store_path)
+    temp_path = f"{root}.tmp{extension}"
+    
+    if extension == '.jsonl':
+        writer = JsonlThreadWriter(temp_path)
+    else:
+        writer = JsonArrayThreadWriter(temp_path)
+    
+    columnar_writer = create_columnar_writer(columnar_path)
+    for thread in read_thread_store(store_path):
+        thread = replacements.get(body_digest(thread['thread_body']), thread)
+        writer.write(thread)
+        if columnar_writer is not None:
+            columnar_writer.write(thread)
+    for record in added.values():
+        writer.write(record)
+        if columnar_writer is not None:
+            columnar_writer.write(record)
+    
+    metadata['total_unique_threads'] = writer.count
+    metadata['duplicates_removed'] = metadata.get('duplicates_removed', 0) + report['duplicates']
+    metadata['last_ingest'] = {'source': os.path.basename(input_path), **report}
+    writer.close(metadata)
+    
+    os.replace(temp_path, store_path)
+    if extension == '.jsonl':
+        os.replace(writer.meta_path, root + '.meta.json')
+    
+    # Only record the new digests once the store reflects them
+    index.commit()
+    index.close()
+    close_columnar_writer(columnar_writer, metadata)
+    
+    print(f"Added: {report['added']}")
+    print(f"Updated: {report['updated']}")
+    print(f"Skipped (unchanged): {report['skipped']}")
+    print(f"Duplicates: {report['duplicates']}")
+    print(f"Store now holds {writer.count} threads: {store_path}")
+    
+    return metadata
+
 if __name__ == "__main__":
-    result = clean_and_extract_threads()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Clean and deduplicate forum threads')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--stream', action='store_true', help='Stream rows to the output in constant memory')
+    mode.add_argument('--incremental', action='store_true',
+                      help='Merge only new/changed thread_ids into the existing output, tracked in threads_index.sqlite3')
+    parser.add_argument('--input', default='recent_threads_Aug2025.csv', help='Input CSV (--stream/--incremental)')
+    parser.add_argument('--output', default='threads_cleaned.json', help='Output .json or .jsonl (--stream/--incremental)')
+    parser.add_argument('--index', default='threads_index.sqlite3', help='Thread index file (--incremental)')
+    parser.add_argument('--near-dup-threshold', type=float, default=None,
+                        help='Also drop near-duplicates at or above this estimated Jaccard similarity (e.g. 0.8)')
+    columnar = parser.add_mutually_exclusive_group()
+    columnar.add_argument('--columnar', default=None, metavar='PATH',
+                          help='Also write the columnar thread store (ids, dates, authors) here, e.g. threads_cleaned.cols')
+    columnar.add_argument('--no-columnar', dest='columnar', action='store_const', const=None,
+                          help='Skip the columnar thread store (the default)')
+    args = parser.parse_args()
+    if args.incremental and args.near_dup_threshold is not None:
+        # Incremental runs only see the new rows, not the MinHash signatures of the store
+        parser.error('--near-dup-threshold is not supported with --incremental; rerun a full or --stream ingest to drop near-duplicates')
+    
+    if args.incremental:
+        result = incremental_ingest(args.input, args.output, args.index, args.columnar)
+    elif args.stream:
+        result = stream_clean_threads(args.input, args.output, args.near_dup_threshold, args.columnar)
+    else:
+        result = clean_and_extract_threads(args.near_dup_threshold, args.columnar)
@@ -0,0 +1,87 @@
+"""
+Persistent index of ingested forum threads, keyed by thread_id, for incremental monthly ingest.
+
+Each row stores the thread's body digest, date and author. Threads that were already in the
+cleaned store before the index existed are seeded as "legacy:<digest>" rows and adopt their
+real thread_id the first time an export contains them.
+
+Input data sources: threads_index.sqlite3
+Output destinations: threads_index.sqlite3
+Dependencies: sqlite3, hashlib (standard library)
+Key exports: ThreadIndex, body_digest()
+Side effects: Creates/updates the SQLite index file
+"""
+
+import hashlib
+import sqlite3
+
+LEGACY_PREFIX = "legacy:"
+
+
+def body_digest(thread_body):
+    return hashlib.md5(thread_body.encode("utf-8")).digest()
+
+
+class ThreadIndex:
+    """SQLite-backed map of thread_id -> (body digest, thread_date, author_id)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                body_digest BLOB NOT NULL,
+                thread_date TEXT,
+                author_id TEXT
+            )"""
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS threads_body_digest ON threads (body_digest)"
+        )
+        self.conn.commit()
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM threads LIMIT 1").fetchone() is None
+
+    def seed_legacy(self, thread_bodies):
+        """Register bodies already in the cleaned store that have no known thread_id."""
+        rows = (
+            (LEGACY_PREFIX + body_digest(body).hex(), body_digest(body), None, None)
+            for body in thread_bodies
+        )
+        self.conn.executemany("INSERT OR IGNORE INTO threads VALUES (?, ?, ?, ?)", rows)
+        self.conn.commit()
+
+    def lookup_id(self, thread_id):
+        """Return the stored body digest for a thread_id, or None."""
+        row = self.conn.execute(
+            "SELECT body_digest FROM threads WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def lookup_digest(self, digest):
+        """Return the thread_id holding this body digest, or None."""
+        row = self.conn.execute(
+            "SELECT thread_id FROM threads WHERE body_digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, thread_id, digest, thread_date, author_id):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO threads VALUES (?, ?, ?, ?)",
+            (thread_id, digest, thread_date, author_id),
+        )
+
+    def adopt_legacy(self, legacy_id, thread_id, thread_date, author_id):
+        """Give a seeded legacy row its real thread_id and metadata."""
+        self.conn.execute(
+            "UPDATE threads SET thread_id = ?, thread_date = ?, author_id = ? WHERE thread_id = ?",
+            (thread_id, thread_date, author_id, legacy_id),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,219 @@
+"""
+Labels every cleaned forum thread with one of the prompt categories using a local nearest-centroid classifier, no LLM calls.
+
+Threads and categories are embedded with the same hashed TF-IDF features as the near-duplicate
+check (shared/question_dedup.py), after dropping stopwords, with IDF taken over the thread corpus.
+Each category's centroid is the normalized mean of its name + instruction and each of its
+examples. The corpus is scored in batches of NumPy matrix products against the centroids (cosine
+similarity), so memory stays at batch_size x n_features. Confidence is the softmax of the similarities at the given temperature.
+Threads below --min-similarity (default: the 5th percentile of the best similarities) or with no
+similarity to any category are left unlabeled (null).
+
+Input data sources: ../1-discussion-forum/threads_cleaned.json (or .jsonl), prompt_categories.json
+Output destinations: thread_categories.jsonl (per-thread label, confidence and similarity),
+                     category_frequencies.json (share of threads per category, for
+                     prompt-classify-questions.py --category-weights)
+Dependencies: numpy
+Key exports: classify_threads(), category_centroids(), UNLABELED_PERCENTILE
+Side effects: Writes the two output files
+
+Usage: python classify_threads.py [--threads PATH] [--output PATH] [--frequencies PATH]
+       [--n-features N] [--batch-size N] [--temperature T] [--min-similarity X]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Make the repo-level shared helpers importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from shared.bm25_index import read_threads, tokenize
+from shared.question_dedup import hashed_counts, l2_normalize, smoothed_idf
+
+# Default --min-similarity: this percentile of the threads' best similarities, so the
+# weakest matches stay unlabeled instead of skewing the category frequencies
+UNLABELED_PERCENTILE = 5
+
+
+def load_categories():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(script_dir, "prompt_categories.json"), "r") as f:
+        return json.load(f)
+
+
+def thread_text(thread):
+    return f"{thread.get('thread_title', '')}\n{thread.get('thread_body', '')}"
+
+
+# Stopwords dominate the short category descriptions otherwise
+def content_words(texts):
+    return [" ".join(tokenize(text)) for text in texts]
+
+
+def embed(texts, idf, n_features):
+    vectors, _ = hashed_counts(content_words(texts), n_features)
+    vectors *= idf
+    return l2_normalize(vectors)
+
+
+def category_centroids(categories_data, idf, n_features):
+    """Unit-length centroid per category (rows in categories_data order)."""
+    centroids = []
+    for category_data in categories_data.values():
+        texts = [
+            f"{category_data['category']}. {category_data['instruction']}",
+            *category_data["examples"],
+        ]
+        centroids.append(embed(texts, idf, n_features).mean(axis=0))
+    return l2_normalize(np.array(centroids, dtype=np.float32))
+
+
+def batches(items, batch_size):
+    for start in range(0, len(items), batch_size):
+        yield start, items[start : start + batch_size]
+
+
+def classify_threads(
+    threads_path="../1-discussion-forum/threads_cleaned.json",
+    output_path="thread_categories.jsonl",
+    frequencies_path="category_frequencies.json",
+    n_features=4096,
+    batch_size=4096,
+    temperature=0.05,
+    min_similarity=None,
+):
+    """Label every thread with its nearest category centroid and write labels + frequencies.
+
+    Threads whose best cosine similarity is below min_similarity (default: the
+    UNLABELED_PERCENTILE-th percentile of the threads' best similarities) are labeled null
+    and left out of the frequencies. Threads with no similarity to any category, including
+    those with no content words at all, are always null, with a null confidence.
+    Returns the frequencies dict (category key -> share of threads).
+    """
+    started = time.perf_counter()
+    categories_data = load_categories()
+    category_keys = list(categories_data)
+
+    print(f"Loading threads from {threads_path}...")
+    threads = list(read_threads(threads_path))
+
+    # Pass 1: bucket document frequencies over the whole corpus
+    document_frequency = np.zeros(n_features, dtype=np.int64)
+    for _, batch in batches(threads, batch_size):
+        _, present = hashed_counts(
+            content_words(thread_text(thread) for thread in batch), n_features
+        )
+        document_frequency += present.sum(axis=0)
+    idf = smoothed_idf(document_frequency, len(threads))
+    centroids = category_centroids(categories_data, idf, n_features)
+
+    # Pass 2: score each batch against the centroids, keeping only the best match
+    best = np.zeros(len(threads), dtype=np.int64)
+    similarity = np.zeros(len(threads), dtype=np.float32)
+    confidence = np.zeros(len(threads), dtype=np.float32)
+    for start, batch in batches(threads, batch_size):
+        similarities = embed(
+            [thread_text(thread) for thread in batch], idf, n_features
+        ) @ centroids.T
+        logits = similarities / temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        rows = slice(start, start + len(batch))
+        best[rows] = similarities.argmax(axis=1)
+        similarity[rows] = similarities.max(axis=1)
+        confidence[rows] = probabilities[np.arange(len(batch)), best[rows]]
+
+    # A zero vector (or one sharing no bucket with any centroid) matches nothing
+    matched = similarity > 0
+    if min_similarity is None:
+        min_similarity = (
+            float(np.percentile(similarity[matched], UNLABELED_PERCENTILE))
+            if matched.any()
+            else 0.0
+        )
+    labeled = matched & (similarity >= min_similarity)
+    counts = np.bincount(best[labeled], minlength=len(category_keys))
+
+    temp_path = f"{output_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as out:
+        for index, thread in enumerate(threads):
+            label = int(best[index])
+            record = {
+                "index": index,
+                "thread_id": thread.get("thread_id"),
+                "thread_title": thread.get("thread_title", ""),
+                "category": category_keys[label] if labeled[index] else None,
+                "confidence": (
+                    round(float(confidence[index]), 4) if matched[index] else None
+                ),
+                "similarity": round(float(similarity[index]), 4),
+            }
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(temp_path, output_path)
+
+    labeled_total = int(counts.sum())
+    frequencies = {
+        key: round(int(count) / labeled_total, 4) if labeled_total else 0.0
+        for key, count in zip(category_keys, counts)
+    }
+    with open(frequencies_path, "w", encoding="utf-8") as f:
+        json.dump(frequencies, f, indent=2)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Labeled {labeled_total} of {len(threads)} threads in {elapsed:.1f}s")
+    unlabeled = len(threads) - labeled_total
+    if unlabeled:
+        print(
+            f"   {unlabeled} threads below similarity {min_similarity:.4f} "
+            f"(or matching no category) left unlabeled"
+        )
+    for key, count in sorted(zip(category_keys, counts), key=lambda item: -item[1]):
+        print(f"   {count:>6}  {frequencies[key]:6.1%}  {categories_data[key]['category']}")
+    print(f"📁 Labels: {output_path}; frequencies: {frequencies_path}")
+    return frequencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Label forum threads with prompt categories (local, no LLM calls)"
+    )
+    parser.add_argument("--threads", default="../1-discussion-forum/threads_cleaned.json")
+    parser.add_argument("--output", default="thread_categories.jsonl")
+    parser.add_argument("--frequencies", default="category_frequencies.json")
+    parser.add_argument(
+        "--n-features", type=int, default=4096, help="Hashed feature buckets"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=4096, help="Threads vectorized per batch"
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=0.05,
+        help="Softmax temperature turning similarities into confidences",
+    )
+    parser.add_argument(
+        "--min-similarity",
+        type=float,
+        default=None,
+        help="Leave threads less similar than this to every category unlabeled "
+        f"(default: the {UNLABELED_PERCENTILE}th percentile of the best similarities)",
+    )
+    args = parser.parse_args()
+
+    classify_threads(
+        threads_path=args.threads,
+        output_path=args.output,
+        frequencies_path=args.frequencies,
+        n_features=args.n_features,
+        batch_size=args.batch_size,
+        temperature=args.temperature,
+        min_similarity=args.min_similarity,
+    )
@@ -0,0 +1,165 @@
+"""
+Category sequencing and prompt rendering for prompt-classify-questions.py, kept free of
+pydantic and the LLM stack so that `cli.py render classification` starts quickly.
+
+Input data sources: ../prompt_categories.json, category weight files (load_category_weights())
+Output destinations: None
+Dependencies: Standard library only
+Key exports: load_categories(), load_category_weights(), generate_category_sequence(),
+             create_prompt_template(), fill_prompt(), number_sequence(), question_slots()
+Side effects: Prints the category sequence summary
+"""
+
+import json
+import os
+
+
+# Load categories data
+def load_categories():
+    # Get the directory of this script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    # Navigate to the prompt_categories.json file
+    categories_file = os.path.join(script_dir, "..", "prompt_categories.json")
+
+    with open(categories_file, "r") as f:
+        return json.load(f)
+
+
+# Load per-category weights, e.g. real-world frequencies from classify_threads.py
+def load_category_weights(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+# Generate cycling sequence for 50 questions from 13 categories
+# (or, with weights, a proportional interleaved sequence)
+def generate_category_sequence(categories_data, target_count=50, weights=None):
+    category_keys = list(categories_data.keys())
+    category_sequence = []
+
+    if weights:
+        # Smooth weighted round robin: each category gets its share of the sequence
+        # (within one entry), spread out rather than in runs; weight 0 is never picked
+        total = sum(weights.get(key, 0) for key in category_keys)
+        credit = {key: 0.0 for key in category_keys}
+        for i in range(target_count):
+            for key in category_keys:
+                credit[key] += weights.get(key, 0)
+            category_key = max(category_keys, key=credit.get)
+            credit[category_key] -= total
+            category_sequence.append((category_key, categories_data[category_key]))
+
+        picked = len({key for key, _ in category_sequence})
+        print(
+            f"Will generate {target_count} questions over {picked} categories, "
+            f"weighted by frequency"
+        )
+        return category_sequence
+
+    for i in range(target_count):
+        # Cycle through categories
+        category_key = category_keys[i % len(category_keys)]
+        category_sequence.append((category_key, categories_data[category_key]))
+
+    print(
+        f"Will generate {target_count} questions cycling through {len(category_keys)} categories"
+    )
+    return category_sequence
+
+
+# Create the prompt template
+def create_prompt_template():
+    return """You are an expert at generating contextually relevant questions that a target user would ask.
+
+Put yourself in the shoes of these target users when generating the question. Because we are trying to simulate what these users will ask.
+<target users>
+The L Suite at TheSuite.com is used by a highly specific and exclusive audience consisting of:
+
+Chief Legal Officers (CLOs) and General Counsels (GCs): These are the most senior legal executives within their organizations, responsible for all strategic legal, compliance, and governance matters.
+
+Corporate Legal Leaders: Includes roles such as Corporate Secretary, Head of Global Policy, and similar senior positions within the legal function.
+
+Executives from Leading Companies: Current users are GCs and CLOs at well-known, high-growth or leading organizations such as Grammarly, Notion, Lyft, Mastercard, Hubspot, Andreessen Horowitz, Riskified, Google Ventures, and Nomad Health.
+
+Serves Both Early-Stage and Public Companies: Members come from both startups, growth-stage tech companies, and large, established public corporations, as well as investment funds involved in these markets.
+
+Decision-Makers: All users hold significant decision-making authority and are typically accountable to their board of directors, C-suite, or investors on key legal issues.
+
+In summary:
+The L Suite's core users are C-level legal executives—specifically General Counsels, CLOs, and their direct peers—at technology-forward companies and investment funds, who are the ultimate legal decision-makers and thought leaders for their organizations.
+</target users>
+
+Generate 1 question using the following category context to shape the question:
+
+**Category - {category_name}:**
+Instruction: {category_instruction}
+Examples: {category_examples}
+
+CRITICAL INSTRUCTIONS FOR STYLE MATCHING:
+- Capture the INTENT and CONTEXT of the examples while VARYING the phrasing
+- Match the level of detail and specificity shown in the examples
+- Include similar contextual details that match the category instruction
+- Use the same natural, peer-to-peer conversational tone as the examples
+
+AVOID THESE REPETITIVE PATTERNS:
+- Do NOT start every question with "For those of you..." or "For those..."
+- Do NOT always use "For those leading..." or "For those at..."
+- Do NOT always use "Curious to hear..." or "Has anyone..."
+- Do NOT end every question with "Would love to hear..." or "much appreciated"
+- AVOID using the exact same opening as previous questions
+
+INSTEAD, VARY YOUR OPENINGS based on the category:
+- For seeking advice: "Looking for recommendations on...", "Need help with...", "Can anyone suggest...", "What's your approach to..."
+- For research topics: "What's the latest on...", "Can someone help me understand...", "Need to research..."
+- For finding vendors: "Anyone have experience with...", "Looking for a vendor who...", "Need recommendations for..."
+- For document work: "Can you help me...", "Need assistance with...", "Looking for guidance on..."
+- For community questions: "How do I...", "Can someone explain...", "What's the process for..."
+
+VARY YOUR CLOSINGS:
+- Mix between: "Thanks!", "Any insights?", "Appreciate the help", or simply end without a closing
+- Sometimes include context about urgency or specific needs
+- Sometimes just end with the question
+
+Your question should:
+- Reflect the category instruction through CONTENT not just phrasing
+- Sound authentic to someone in that legal executive role
+- Feel natural and varied, not formulaic
+- Match the examples' style and context
+
+Generate a question that captures the essence of the category while sounding fresh and different from typical patterns."""
+
+
+MULTI_QUESTION_INSTRUCTIONS = """
+
+Instead of a single question, generate {count} DISTINCT questions for this same category. Each must be a complete, standalone question with its own opening, scenario and wording - do not reuse an opening or closing across the {count} questions. Return them as the `questions` list."""
+
+
+# Fill the prompt template with one category
+def fill_prompt(prompt_template, category_data, count=1):
+    prompt = prompt_template.format(
+        category_name=category_data["category"],
+        category_instruction=category_data["instruction"],
+        category_examples="\n".join(f"- {ex}" for ex in category_data["examples"]),
+    )
+    if count > 1:
+        prompt += MULTI_QUESTION_INSTRUCTIONS.format(count=count)
+    return prompt
+
+
+# Pair each sequence entry with its index and how often its category appeared before it
+def number_sequence(category_sequence):
+    occurrences = {}
+    numbered = []
+
+    for i, (category_key, category_data) in enumerate(category_sequence, 1):
+        sample_index = occurrences.get(category_key, 0)
+        occurrences[category_key] = sample_index + 1
+        numbered.append((i, (category_data, sample_index)))
+
+    return numbered
+
+
+# Journal indices of the questions produced by sequence entry i (the last may be short)
+def question_slots(i, per_call, target_count):
+    first = (i - 1) * per_call + 1
+    return range(first, min(first + per_call, target_count + 1))
@@ -1,19 +1,69 @@
 """
 Generates 50 prompt classification questions by cycling through prompt categories and using LLM to create authentic questions that match The L Suite user profile for each category type.
 
-Input data sources: ../prompt_categories.json
-Output destinations: generated_prompt_classification_questions.json 
-Dependencies: OpenAI API key in .env file, langchain_openai, pydantic
-Key exports: generate_questions(), CategoryInfo, GeneratedQuestion, QuestionResults
-Side effects: Creates JSON output file, makes LLM API calls
+Input data sources: ../prompt_categories.json, ../category_frequencies.json (--category-weights, see ../classify_threads.py)
+Output destinations: generated_prompt_classification_questions.json, generated_prompt_classification_questions.journal.jsonl,
+                     generated_prompt_classification_questions.metrics.jsonl / .prom (per-call telemetry),
+                     a batch request manifest (--render-manifest)
+Dependencies: pydantic, classification_prompts.py (category sequence and prompt rendering); OpenAI API key in .env file and langchain_openai (imported when generating); pyarrow (--format parquet only);
+              numpy (--dedup-threshold / --diversity-target only)
+Key exports: generate_questions(), GenerationOptions, generate_adaptively(), render_manifest(), ingest_results(), CategoryInfo, GeneratedQuestion, QuestionResults, QuestionList
+Side effects: Creates JSON output file, makes LLM API calls (incl. near-duplicate regeneration), reads/writes the shared LLM response cache
+
+Usage: python prompt-classify-questions.py [--count N] [--workers N] [--no-cache] [--resume]
+       [--preflight] [--max-total-tokens N] [--max-call-tokens N]
+       [--dedup-threshold X] [--dedup-rounds N] [--per-call N]
+       [--providers SPEC] [--max-attempts N] [--adaptive] [--format json|jsonl|parquet]
+       [--category-weights PATH] [--diversity-target N] [--round-calls N]
+       [--novelty-threshold X] [--min-novelty X]
+       python prompt-classify-questions.py --render-manifest PATH [--count N] [--per-call N] [--category-weights PATH]
+       python prompt-classify-questions.py --ingest MANIFEST RESULTS [--format json|jsonl|parquet]
 """
 
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
-from pydantic import BaseModel
-from typing import List
-import json
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Optional
+import argparse
+import itertools
 import os
+import sys
+import time
+from collections import deque
+
+# Make the repo-level shared helpers importable when run as a script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from shared.batch_jobs import ResultJoin, write_manifest
+from shared.compact_output import COMPACT_FORMATS, write_compact
+from shared.journal import QuestionJournal, journal_path_for
+from shared.llm_cache import CachedStructuredLLM, LLMCache, print_cache_stats
+from shared.llm_router import LLMRouter, print_router_stats
+from shared.retry import (
+    AIMDController,
+    IncompleteResponseError,
+    RetryPolicy,
+    call_with_retry,
+    classify_error,
+)
+from shared.token_budget import (
+    MODEL_PROFILES,
+    BudgetExceeded,
+    check_budget,
+    preflight,
+    print_preflight_report,
+)
+from shared.telemetry import CallMetrics, MeteredChatModel, metrics_paths_for
+
+from classification_prompts import (
+    create_prompt_template,
+    fill_prompt,
+    generate_category_sequence,
+    load_categories,
+    load_category_weights,
+    number_sequence,
+    question_slots,
+)
+
+MODEL_NAME = "gpt-5-mini"
 
 
 class CategoryInfo(BaseModel):
@@ -32,169 +82,862 @@ class QuestionResults(BaseModel):
     total_generated: int
 
 
-load_dotenv()
-
-
-# Load categories data
-def load_categories():
-    # Get the directory of this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    # Navigate to the prompt_categories.json file
-    categories_file = os.path.join(script_dir, "..", "prompt_categories.json")
-
-    with open(categories_file, "r") as f:
-        return json.load(f)
+# Simple question model for LLM output
+class SimpleQuestion(BaseModel):
+    question: str
 
 
-# Generate cycling sequence for 50 questions from 13 categories
-def generate_category_sequence(categories_data, target_count=50):
-    category_keys = list(categories_data.keys())
-    category_sequence = []
+# List-valued output for --per-call N: several questions for one category
+class QuestionList(BaseModel):
+    questions: List[str]
 
-    for i in range(target_count):
-        # Cycle through categories
-        category_key = category_keys[i % len(category_keys)]
-        category_sequence.append((category_key, categories_data[category_key]))
 
-    print(
-        f"Will generate {target_count} questions cycling through {len(category_keys)} categories"
+# Create the full question object with category metadata
+def build_question(question_text, category_data):
+    return GeneratedQuestion(
+        question=question_text,
+        category_info=CategoryInfo(
+            category=category_data["category"],
+            instruction=category_data["instruction"],
+            examples=category_data["examples"],
+        ),
     )
-    return category_sequence
-
 
-# Create the prompt template
-def create_prompt_template():
-    return """You are an expert at generating contextually relevant questions that a target user would ask.
 
-Put yourself in the shoes of these target users when generating the question. Because we are trying to simulate what these users will ask.
-<target users>
-The L Suite at TheSuite.com is used by a highly specific and exclusive audience consisting of:
+# One distinct question text per slot; a short or repetitive list raises IncompleteResponseError
+def question_texts(response, slots):
+    if isinstance(response, QuestionList):
+        texts = response.questions
+    else:
+        texts = [response.question]
 
-Chief Legal Officers (CLOs) and General Counsels (GCs): These are the most senior legal executives within their organizations, responsible for all strategic legal, compliance, and governance matters.
-
-Corporate Legal Leaders: Includes roles such as Corporate Secretary, Head of Global Policy, and similar senior positions within the legal function.
-
-Executives from Leading Companies: Current users are GCs and CLOs at well-known, high-growth or leading organizations such as Grammarly, Notion, Lyft, Mastercard, Hubspot, Andreessen Horowitz, Riskified, Google Ventures, and Nomad Health.
-
-Serves Both Early-Stage and Public Companies: Members come from both startups, growth-stage tech companies, and large, established public corporations, as well as investment funds involved in these markets.
-
-Decision-Makers: All users hold significant decision-making authority and are typically accountable to their board of directors, C-suite, or investors on key legal issues.
+    texts = list(dict.fromkeys(text.strip() for text in texts if text.strip()))
+    if len(texts) < len(slots):
+        raise IncompleteResponseError(
+            f"expected {len(slots)} distinct questions, got {len(texts)}"
+        )
+    return texts[: len(slots)]
+
+
+# Cache a response only if it fills every slot of its call (config metadata "questions")
+def is_complete(response, config):
+    count = ((config or {}).get("metadata") or {}).get("questions", 1)
+    try:
+        question_texts(response, range(count))
+    except IncompleteResponseError:
+        return False
+    return True
+
+
+# Fan one response (SimpleQuestion or QuestionList) out into journaled questions
+def record_questions(journal, response, category_data, slots):
+    recorded = 0
+    for index, question_text in zip(slots, question_texts(response, slots)):
+        journal.append(index, build_question(question_text, category_data).model_dump())
+        recorded += 1
+    return recorded
+
+
+# Compact the journal into the output file in the chosen format; returns (path, count)
+def save_output(journal, output_path, output_format):
+    if output_format != "json":
+        output_path = f"{os.path.splitext(output_path)[0]}.{output_format}"
+    print(f"Compacting journal into {output_path}...")
+    if output_format == "json":
+        return output_path, journal.compact(output_path)
+    # Each category object is written once and referenced by id
+    return output_path, write_compact(output_path, journal.iter_questions())
+
+
+# Report a retry of sequence entry i (used as the retry policy's on_retry callback)
+def report_retry(i):
+    def on_retry(error, attempt, delay):
+        print(
+            f"Retrying question {i} after {classify_error(error)} error "
+            f"(attempt {attempt}, waiting {delay:.1f}s): {error}"
+        )
 
-In summary:
-The L Suite's core users are C-level legal executives—specifically General Counsels, CLOs, and their direct peers—at technology-forward companies and investment funds, who are the ultimate legal decision-makers and thought leaders for their organizations.
-</target users>
+    return on_retry
+
+
+def generate_serially(
+    structured_llm,
+    prompt_template,
+    pending,
+    total,
+    journal,
+    per_call=1,
+    target_count=None,
+    retry_policy=None,
+    metrics=None,
+):
+    """Generate the questions of each pending sequence entry, one blocking call at a time.
+
+    Throttling and transient errors, including answers with fewer distinct questions than
+    requested, are retried with jittered exponential backoff. Each call is recorded in
+    metrics, tagged with its category.
+    """
+    generated_count = 0
+    target_count = target_count or total * per_call
+    retry_policy = retry_policy or RetryPolicy()
+    metrics = metrics or CallMetrics(None, "prompt-classify-questions", MODEL_NAME)
+
+    for i, (category_data, sample_index) in pending:
+        print(
+            f"Generating question {i}/{total} (Category: {category_data['category']})..."
+        )
 
-Generate 1 question using the following category context to shape the question:
+        slots = question_slots(i, per_call, target_count)
+        filled_prompt = fill_prompt(prompt_template, category_data, len(slots))
+        metrics.start(i, category_data["category"])
+        config = {
+            "metadata": {
+                "sample_index": sample_index,
+                "call_id": i,
+                "questions": len(slots),
+            }
+        }
+
+        def attempt():
+            response = structured_llm.invoke(filled_prompt, config=config)
+            question_texts(response, slots)
+            return response
+
+        # Generate the question(s) using LLM
+        try:
+            response = call_with_retry(attempt, retry_policy, on_retry=report_retry(i))
+            recorded = record_questions(journal, response, category_data, slots)
+            generated_count += recorded
+            metrics.finish(i, questions=recorded)
 
-**Category - {category_name}:**
-Instruction: {category_instruction}
-Examples: {category_examples}
+        except Exception as e:
+            metrics.finish(i, error=e)
+            print(f"Error generating question {i} ({classify_error(e)}): {e}")
+            continue
 
-CRITICAL INSTRUCTIONS FOR STYLE MATCHING:
-- Capture the INTENT and CONTEXT of the examples while VARYING the phrasing
-- Match the level of detail and specificity shown in the examples
-- Include similar contextual details that match the category instruction
-- Use the same natural, peer-to-peer conversational tone as the examples
+    return generated_count
+
+
+def generate_in_batches(
+    structured_llm,
+    prompt_template,
+    pending,
+    total,
+    journal,
+    workers,
+    per_call=1,
+    target_count=None,
+    retry_policy=None,
+    controller=None,
+    metrics=None,
+):
+    """Generate questions through the model's thread-pool batch, `workers` calls at a time.
+
+    Failures are captured per item (return_exceptions=True), so one bad call only
+    drops its own question. The sequence is submitted in chunks to keep progress
+    output flowing and the number of pending prompts bounded. Throttled and
+    transient failures, including answers with fewer distinct questions than
+    requested, are put back at the front of the queue after a jittered
+    backoff; with an AIMDController each chunk runs at its current limit.
+    A call's queue wait in metrics is its time from first submission to reaching
+    the model, including any requeueing.
+    """
+    metrics = metrics or CallMetrics(None, "prompt-classify-questions", MODEL_NAME)
+    generated_count = 0
+    failures = []
+    target_count = target_count or total * per_call
+    retry_policy = retry_policy or RetryPolicy()
+    queue = deque((entry, 1) for entry in pending)
+    finished = 0
+
+    while queue:
+        chunk_workers = int(controller.limit) if controller is not None else workers
+        chunk = [queue.popleft() for _ in range(min(len(queue), chunk_workers * 4))]
+        prompts = [
+            fill_prompt(
+                prompt_template,
+                category_data,
+                len(question_slots(i, per_call, target_count)),
+            )
+            for (i, (category_data, _)), _ in chunk
+        ]
+        configs = [
+            {
+                "max_concurrency": chunk_workers,
+                "metadata": {
+                    "sample_index": sample_index,
+                    "call_id": i,
+                    "questions": len(question_slots(i, per_call, target_count)),
+                },
+            }
+            for (i, (_, sample_index)), _ in chunk
+        ]
+        for (i, (category_data, _)), _ in chunk:
+            metrics.start(i, category_data["category"])
+
+        started_at = time.monotonic()
+        responses = structured_llm.batch(
+            prompts, config=configs, return_exceptions=True
+        )
 
-AVOID THESE REPETITIVE PATTERNS:
-- Do NOT start every question with "For those of you..." or "For those..."
-- Do NOT always use "For those leading..." or "For those at..."
-- Do NOT always use "Curious to hear..." or "Has anyone..."
-- Do NOT end every question with "Would love to hear..." or "much appreciated"
-- AVOID using the exact same opening as previous questions
+        retries = []
+        for (entry, attempt), response in zip(chunk, responses):
+            i, (category_data, _) = entry
+            slots = question_slots(i, per_call, target_count)
+            if not isinstance(response, Exception):
+                try:
+                    question_texts(response, slots)
+                except IncompleteResponseError as e:
+                    response = e
+            if isinstance(response, Exception):
+                if controller is not None:
+                    controller.on_error(response, started_at)
+                if retry_policy.should_retry(response, attempt):
+                    retries.append(((entry, attempt + 1), response))
+                    continue
+
+                metrics.finish(i, error=response)
+                print(
+                    f"Error generating question {i} ({classify_error(response)}): {response}"
+                )
+                failures.append((i, category_data["category"], str(response)))
+                finished += 1
+                continue
+
+            if controller is not None:
+                controller.on_success()
+            recorded = record_questions(journal, response, category_data, slots)
+            generated_count += recorded
+            metrics.finish(i, questions=recorded)
+            finished += 1
+
+        print(f"Processed {finished}/{len(pending)} sequence entries...")
+
+        if retries:
+            delay = max(
+                retry_policy.delay(attempt - 1, error)
+                for (_, attempt), error in retries
+            )
+            print(
+                f"Retrying {len(retries)} throttled/transient calls in {delay:.1f}s..."
+            )
+            time.sleep(delay)
+            queue.extendleft(reversed([item for item, _ in retries]))
+
+    if failures:
+        print(f"⚠️  {len(failures)} questions failed:")
+        for i, category, error in failures:
+            print(f"  - #{i} ({category}): {error}")
+
+    return generated_count
+
+
+def generate_adaptively(
+    run_calls,
+    journal,
+    categories_data,
+    category_sequence,
+    completed,
+    per_call,
+    target_count,
+    diversity_target,
+    round_calls=None,
+    novelty_threshold=0.5,
+    min_novelty=0.25,
+):
+    """Generate in rounds, shifting calls to the categories still producing novel questions.
+
+    The categories in category_sequence are the slices and its length caps the calls
+    (see shared.adaptive_budget.AdaptiveBudget). run_calls(pending) makes one round of
+    calls through the serial or batched loop. Questions already in the journal (resume)
+    seed each category's history and count toward the cap.
+    Returns (generated count, AdaptiveBudget).
+    """
+    from shared.adaptive_budget import AdaptiveBudget
+
+    keys_by_name = {data["category"]: key for key, data in categories_data.items()}
+    slice_keys = dict.fromkeys(key for key, _ in category_sequence)
+    last_call = max(((index - 1) // per_call + 1 for index in completed), default=0)
+    budget = AdaptiveBudget(
+        {key: itertools.repeat(categories_data[key]) for key in slice_keys},
+        max_calls=len(category_sequence) - last_call,
+        diversity_target=diversity_target,
+        questions_per_call=per_call,
+        round_calls=round_calls,
+        novelty_threshold=novelty_threshold,
+        min_novelty=min_novelty,
+    )
 
-INSTEAD, VARY YOUR OPENINGS based on the category:
-- For seeking advice: "Looking for recommendations on...", "Need help with...", "Can anyone suggest...", "What's your approach to..."
-- For research topics: "What's the latest on...", "Can someone help me understand...", "Need to research..."
-- For finding vendors: "Anyone have experience with...", "Looking for a vendor who...", "Need recommendations for..."
-- For document work: "Can you help me...", "Need assistance with...", "Looking for guidance on..."
-- For community questions: "How do I...", "Can someone explain...", "What's the process for..."
+    # Sample indices keep repeated calls for a category distinct in the LLM cache
+    samples = {key: 0 for key in slice_keys}
+    if completed:
+        for _, question in journal.iter_questions():
+            key = keys_by_name.get(question["category_info"]["category"])
+            if key in samples:
+                budget.observe(key, question["question"])
+                samples[key] += 1
+
+    generated_count = 0
+    next_call = last_call + 1
+    while True:
+        calls = budget.next_round()
+        if not calls:
+            break
+
+        pending = []
+        for key, category_data in calls:
+            pending.append((next_call, (category_data, samples[key])))
+            samples[key] += 1
+            next_call += 1
+        generated_count += run_calls(pending)
+
+        slots = {
+            index
+            for i, _ in pending
+            for index in question_slots(i, per_call, target_count)
+        }
+        for index, question, _ in journal.iter_entries():
+            if index in slots:
+                key = keys_by_name[question["category_info"]["category"]]
+                budget.observe(key, question["question"])
+
+    return generated_count, budget
+
+
+class GenerationOptions(BaseModel):
+    """Knobs of one generate_questions() run; the defaults match the plain CLI run.
+
+    With workers > 1 the calls run through the model's batch() with
+    max_concurrency=workers instead of the serial loop. Responses are served
+    from the on-disk LLM cache unless use_cache=False. With resume=True,
+    sequence indices already in the journal are skipped.
+
+    Before any call, every pending prompt is rendered and token-counted; the run is
+    refused if it exceeds max_total_tokens or max_call_tokens (default: the model's
+    context window). With preflight_only=True only the report is printed.
+    With questions_per_call > 1, each sequence entry is one call returning a
+    QuestionList of that many questions for its category, so only
+    ceil(target_count / questions_per_call) calls are made. An answer with fewer
+    distinct questions is retried like a transient error and is never cached.
+
+    With providers (a spec such as "openai:gpt-5-mini:weight=3,fake:fake-chat"), calls
+    are spread across several providers/models by the LLM router instead of ChatOpenAI.
+
+    Throttled and transient calls are retried up to max_attempts times with jittered
+    exponential backoff. With adaptive=True (workers > 1), an AIMD controller finds
+    the sustainable number of concurrent calls, up to `workers`.
+
+    With dedup_threshold set, near-duplicate questions (hashed TF-IDF cosine at or
+    above the threshold) are regenerated in up to dedup_rounds targeted passes.
+
+    With category_weights (category key -> weight, e.g. the real-world thread shares
+    written by ../classify_threads.py), calls are spread across categories in
+    proportion to the weights instead of round robin.
+
+    With diversity_target set, the calls are made in rounds of about round_calls
+    (generate_adaptively()): a question is novel when its hashed TF-IDF cosine to every
+    earlier question of its category is below novelty_threshold, categories whose last
+    round was less than min_novelty novel get no more calls, and the rest of the budget
+    goes to the others by novelty rate. The run stops once diversity_target novel
+    questions exist; target_count then only caps the spend.
+
+    With output_format="jsonl" or "parquet" the output is written in the normalized
+    compact format instead (each category object stored once, questions reference it
+    by id; see shared.compact_output.read_compact to rehydrate). output_path overrides
+    the default output file (its journal sits next to it).
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    target_count: int = 50
+    workers: int = 1
+    use_cache: bool = True
+    resume: bool = False
+    preflight_only: bool = False
+    max_total_tokens: Optional[int] = None
+    max_call_tokens: Optional[int] = None
+    dedup_threshold: Optional[float] = None
+    dedup_rounds: int = 3
+    questions_per_call: int = 1
+    providers: Optional[str] = None
+    max_attempts: int = 5
+    adaptive: bool = False
+    output_format: str = "json"
+    output_path: Optional[str] = None
+    category_weights: Optional[Dict[str, float]] = None
+    diversity_target: Optional[int] = None
+    round_calls: Optional[int] = None
+    novelty_threshold: float = 0.5
+    min_novelty: float = 0.25
+
+
+def generate_questions(options=None, llm=None, **overrides):
+    """Main function to generate questions based on category cycling.
+
+    options is a GenerationOptions (default: the plain CLI run); keyword overrides
+    replace single fields, e.g. generate_questions(target_count=200, workers=8).
+    llm supplies a ready chat model (e.g. shared.fake_llm.FakeChatModel for offline
+    benchmarks) in place of ChatOpenAI / the provider router.
+
+    Every question is appended to a JSONL journal as it completes, and the journal
+    is compacted into the output file at the end.
+
+    Every call's wall time, queue wait, token usage, retries and outcome are written,
+    tagged with its category, to <output>.metrics.jsonl, summarized in the
+    Prometheus textfile <output>.prom, and printed as a latency histogram at the end.
+    Returns the QuestionResults, or None if the pre-flight check stopped the run.
+    """
+    options = GenerationOptions.model_validate(
+        {**(options or GenerationOptions()).model_dump(), **overrides}
+    )
+    print("Loading categories...")
+    categories_data = load_categories()
 
-VARY YOUR CLOSINGS:
-- Mix between: "Thanks!", "Any insights?", "Appreciate the help", or simply end without a closing
-- Sometimes include context about urgency or specific needs
-- Sometimes just end with the question
+    print("Generating category sequence...")
+    call_count = -(-options.target_count // options.questions_per_call)
+    category_sequence = generate_category_sequence(
+        categories_data, target_count=call_count, weights=options.category_weights
+    )
+    if options.questions_per_call > 1:
+        print(
+            f"Each entry is one call returning up to {options.questions_per_call} "
+            f"questions ({options.target_count} in total)"
+        )
 
-Your question should:
-- Reflect the category instruction through CONTENT not just phrasing
-- Sound authentic to someone in that legal executive role
-- Feel natural and varied, not formulaic
-- Match the examples' style and context
+    # Save to JSON file
+    output_path = (
+        options.output_path or "generated_prompt_classification_questions.json"
+    )
+    journal = QuestionJournal(journal_path_for(output_path))
+
+    completed = journal.completed_indices() if options.resume else set()
+    pending = [
+        entry
+        for entry in number_sequence(category_sequence)
+        if not all(
+            index in completed
+            for index in question_slots(
+                entry[0], options.questions_per_call, options.target_count
+            )
+        )
+    ]
+    if completed:
+        print(f"Resuming: {len(completed)} questions already in {journal.path}")
 
-Generate a question that captures the essence of the category while sounding fresh and different from typical patterns."""
+    prompt_template = create_prompt_template()
 
+    report = preflight(
+        (
+            fill_prompt(
+                prompt_template,
+                category_data,
+                len(
+                    question_slots(i, options.questions_per_call, options.target_count)
+                ),
+            )
+            for i, (category_data, _) in pending
+        ),
+        MODEL_NAME,
+        concurrency=options.workers,
+        expected_output_tokens=MODEL_PROFILES[MODEL_NAME]["expected_output_tokens"]
+        * options.questions_per_call,
+    )
+    print_preflight_report(report)
+    try:
+        check_budget(report, options.max_total_tokens, options.max_call_tokens)
+    except BudgetExceeded as e:
+        print(f"❌ Refusing to run: {e}")
+        return None
+    if options.preflight_only:
+        return None
 
-# Simple question model for LLM output
-class SimpleQuestion(BaseModel):
-    question: str
+    journal.open(resume=options.resume)
 
+    print("Setting up LLM...")
+    # Deferred so importing this module (e.g. from cli.py) stays fast
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if llm is not None:
+        print(f"Using the supplied model {llm.model_name}")
+    elif options.providers:
+        llm = LLMRouter.from_spec(options.providers)
+        print(f"Routing across {llm.model_name}")
+    else:
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(model=MODEL_NAME)
+    metrics_path, prometheus_path = metrics_paths_for(output_path)
+    metrics = CallMetrics(
+        metrics_path,
+        "prompt-classify-questions",
+        getattr(llm, "model_name", MODEL_NAME),
+    )
+    llm = MeteredChatModel(llm, metrics)
+    cache = LLMCache() if options.use_cache else None
+
+    def structured(schema):
+        structured_llm = llm.with_structured_output(schema)
+        if cache is not None:
+            cache_model = getattr(llm, "model_name", MODEL_NAME)
+            structured_llm = CachedStructuredLLM(
+                structured_llm, cache, cache_model, schema, accept=is_complete
+            )
+        return structured_llm
 
-def generate_questions():
-    """Main function to generate 50 questions based on category cycling."""
-    print("Loading categories...")
-    categories_data = load_categories()
+    structured_llm = structured(
+        QuestionList if options.questions_per_call > 1 else SimpleQuestion
+    )
 
-    print("Generating category sequence...")
-    category_sequence = generate_category_sequence(categories_data, target_count=50)
+    retry_policy = RetryPolicy(max_attempts=options.max_attempts)
+    controller = (
+        AIMDController(maximum=options.workers) if options.adaptive else None
+    )
 
-    print("Setting up LLM...")
-    llm = ChatOpenAI(model="gpt-5-mini")
-    structured_llm = llm.with_structured_output(SimpleQuestion)
+    def run_calls(pending):
+        if options.workers > 1:
+            return generate_in_batches(
+                structured_llm,
+                prompt_template,
+                pending,
+                len(category_sequence),
+                journal,
+                options.workers,
+                options.questions_per_call,
+                options.target_count,
+                retry_policy,
+                controller,
+                metrics,
+            )
+        return generate_serially(
+            structured_llm,
+            prompt_template,
+            pending,
+            len(category_sequence),
+            journal,
+            options.questions_per_call,
+            options.target_count,
+            retry_policy,
+            metrics,
+        )
 
-    prompt_template = create_prompt_template()
+    budget = None
+    try:
+        if options.diversity_target is not None:
+            print(
+                f"Generating until {options.diversity_target} novel questions, "
+                f"in at most {len(pending)} calls..."
+            )
+            generated_count, budget = generate_adaptively(
+                run_calls,
+                journal,
+                categories_data,
+                category_sequence,
+                completed,
+                options.questions_per_call,
+                options.target_count,
+                options.diversity_target,
+                options.round_calls,
+                options.novelty_threshold,
+                options.min_novelty,
+            )
+        else:
+            print(f"Generating questions in {len(pending)} calls...")
+            generated_count = run_calls(pending)
+    finally:
+        journal.close()
+
+    if options.dedup_threshold is not None:
+        from shared.question_dedup import deduplicate_journal
+
+        remaining = deduplicate_journal(
+            journal,
+            structured(SimpleQuestion),
+            lambda question: fill_prompt(prompt_template, question["category_info"]),
+            threshold=options.dedup_threshold,
+            max_rounds=options.dedup_rounds,
+            workers=options.workers,
+        )
+        if remaining:
+            print(
+                f"⚠️ {remaining} near-duplicate questions remain "
+                f"after {options.dedup_rounds} rounds"
+            )
 
-    generated_questions = []
+    output_path, total_generated = save_output(
+        journal, output_path, options.output_format
+    )
 
-    print(f"Generating {len(category_sequence)} questions...")
-    for i, (_, category_data) in enumerate(category_sequence, 1):
+    print(f"✅ Successfully generated {generated_count} questions!")
+    print(f"📁 Output saved to: {output_path} ({total_generated} questions)")
+    missing = options.target_count - total_generated
+    if budget is not None:
+        budget.print_report(lambda key: categories_data[key]["category"])
+    elif missing > 0:
+        print(f"⚠️ {missing} questions missing; rerun with --resume to retry them")
+    if controller is not None:
         print(
-            f"Generating question {i}/{len(category_sequence)} (Category: {category_data['category']})..."
-        )
-
-        # Prepare the prompt with category values
-        filled_prompt = prompt_template.format(
-            category_name=category_data["category"],
-            category_instruction=category_data["instruction"],
-            category_examples="\n".join(f"- {ex}" for ex in category_data["examples"]),
+            f"🎚️  Adaptive concurrency: settled at {int(controller.limit)}, "
+            f"peak {int(controller.peak)} (max {options.workers})"
         )
 
-        # Generate the question using LLM
-        try:
-            response = structured_llm.invoke(filled_prompt)
-
-            # Create the full question object with category metadata
-            question_obj = GeneratedQuestion(
-                question=response.question,
-                category_info=CategoryInfo(
-                    category=category_data["category"],
-                    instruction=category_data["instruction"],
-                    examples=category_data["examples"],
-                ),
-            )
+    metrics.close()
+    metrics.write_prometheus(prometheus_path)
+    metrics.print_summary()
+    print(f"📈 Call metrics: {metrics_path}, {prometheus_path}")
 
-            generated_questions.append(question_obj)
+    if options.providers:
+        print_router_stats(llm.chat_model)
 
-        except Exception as e:
-            print(f"Error generating question {i}: {e}")
-            continue
+    if cache is not None:
+        print_cache_stats(cache)
+        cache.close()
 
-    # Create final results object
-    results = QuestionResults(
-        questions=generated_questions, total_generated=len(generated_questions)
+    return QuestionResults(
+        questions=[question for _, question in journal.iter_questions()],
+        total_generated=total_generated,
     )
 
-    # Save to JSON file
-    output_path = "generated_prompt_classification_questions.json"
-    print(f"Saving {len(generated_questions)} questions to {output_path}...")
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results.model_dump(), f, indent=2, ensure_ascii=False)
+def render_manifest(
+    manifest_path, target_count=50, questions_per_call=1, category_weights=None
+):
+    """Write every call of the category sequence as a provider-neutral batch request manifest.
 
-    print(f"✅ Successfully generated {len(generated_questions)} questions!")
-    print(f"📁 Output saved to: {output_path}")
+    Each request carries its filled prompt, the structured-output schema name (the JSON
+    schemas are in the manifest header) and, as metadata, the category, its sample index
+    and the journal slots that ingest_results() needs. No model is called.
+    Returns the request count.
+    """
+    call_count = -(-target_count // questions_per_call)
+    category_sequence = generate_category_sequence(
+        load_categories(), target_count=call_count, weights=category_weights
+    )
+    prompt_template = create_prompt_template()
+    schema_name = "QuestionList" if questions_per_call > 1 else "SimpleQuestion"
+
+    def requests():
+        for i, (category_data, sample_index) in number_sequence(category_sequence):
+            slots = list(question_slots(i, questions_per_call, target_count))
+            yield (
+                i,
+                schema_name,
+                fill_prompt(prompt_template, category_data, len(slots)),
+                {
+                    "category": category_data,
+                    "sample_index": sample_index,
+                    "slots": slots,
+                },
+            )
 
-    return results
+    count = write_manifest(
+        manifest_path,
+        "prompt-classify-questions",
+        MODEL_NAME,
+        {"SimpleQuestion": SimpleQuestion, "QuestionList": QuestionList},
+        requests(),
+    )
+    print(f"📝 Rendered {count} requests to {manifest_path}")
+    return count
+
+
+def ingest_results(manifest_path, results_path, output_path=None, output_format="json"):
+    """Join a batch result file onto its manifest and write the usual QuestionResults output.
+
+    Results are matched by custom_id, so results of edited prompts are ignored; calls
+    without a usable result are reported and left out. Returns the output path.
+    """
+    output_path = output_path or "generated_prompt_classification_questions.json"
+    join = ResultJoin(manifest_path, results_path, "prompt-classify-questions")
+    schemas = {"SimpleQuestion": SimpleQuestion, "QuestionList": QuestionList}
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    journal = QuestionJournal(journal_path_for(output_path)).open()
+    recorded = 0
+    try:
+        for request, output in join:
+            try:
+                response = schemas[request["schema"]].model_validate(output)
+            except ValueError as e:
+                join.record_failure(request, e)
+                continue
+            metadata = request["metadata"]
+            try:
+                recorded += record_questions(
+                    journal, response, metadata["category"], metadata["slots"]
+                )
+            except IncompleteResponseError as e:
+                join.record_failure(request, e)
+    finally:
+        journal.close()
+
+    output_path, total_generated = save_output(journal, output_path, output_format)
+    join.print_report()
+    print(f"✅ Ingested {recorded} questions!")
+    print(f"📁 Output saved to: {output_path} ({total_generated} questions)")
+    return output_path
 
 
 if __name__ == "__main__":
-    generate_questions()
+    parser = argparse.ArgumentParser(
+        description="Generate prompt classification questions"
+    )
+    parser.add_argument(
+        "--count", type=int, default=50, help="Number of questions to generate"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Concurrent calls via the model's batch(); 1 keeps the serial loop",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Bypass the on-disk LLM response cache",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip sequence entries already in the journal from an interrupted run",
+    )
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="Only render and token-count the prompts, then print the report",
+    )
+    parser.add_argument(
+        "--max-total-tokens",
+        type=int,
+        default=None,
+        help="Refuse to run if all prompts together exceed this many input tokens",
+    )
+    parser.add_argument(
+        "--max-call-tokens",
+        type=int,
+        default=None,
+        help="Refuse to run if any prompt exceeds this many tokens (default: context window)",
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=None,
+        help="Regenerate questions whose cosine similarity to an earlier one is at least this (e.g. 0.9)",
+    )
+    parser.add_argument(
+        "--dedup-rounds",
+        type=int,
+        default=3,
+        help="Max targeted regeneration passes for --dedup-threshold",
+    )
+    parser.add_argument(
+        "--per-call",
+        type=int,
+        default=1,
+        help="Questions returned by each call for its category (list-valued output)",
+    )
+    parser.add_argument(
+        "--providers",
+        default=None,
+        help="Route calls across providers, e.g. 'openai:gpt-5-mini:weight=3:rpm=500,vertexai:gemini-2.5-flash'",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="Attempts per call for throttled/transient errors (jittered exponential backoff)",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="AIMD concurrency control for --workers, up to that many concurrent calls",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["json", *COMPACT_FORMATS],
+        default="json",
+        help="json: full QuestionResults; jsonl/parquet: normalized, with each dimension/category stored once",
+    )
+    parser.add_argument(
+        "--category-weights",
+        metavar="PATH",
+        default=None,
+        help="JSON of category key -> weight (e.g. ../category_frequencies.json) instead of round robin",
+    )
+    parser.add_argument(
+        "--diversity-target",
+        type=int,
+        default=None,
+        help="Generate in rounds until this many novel questions, shifting calls away from saturated categories (--count caps the spend)",
+    )
+    parser.add_argument(
+        "--round-calls",
+        type=int,
+        default=None,
+        help="Calls per round for --diversity-target (default: two per category)",
+    )
+    parser.add_argument(
+        "--novelty-threshold",
+        type=float,
+        default=0.5,
+        help="A question is novel below this cosine similarity to its category's earlier questions",
+    )
+    parser.add_argument(
+        "--min-novelty",
+        type=float,
+        default=0.25,
+        help="A category whose last round was less novel than this gets no more calls",
+    )
+    parser.add_argument(
+        "--render-manifest",
+        metavar="PATH",
+        default=None,
+        help="Only write every call to a batch request manifest (no model calls)",
+    )
+    parser.add_argument(
+        "--ingest",
+        nargs=2,
+        metavar=("MANIFEST", "RESULTS"),
+        default=None,
+        help="Build the output from a batch result file instead of calling a model",
+    )
+    args = parser.parse_args()
+    category_weights = (
+        load_category_weights(args.category_weights) if args.category_weights else None
+    )
+
+    if args.render_manifest:
+        render_manifest(
+            args.render_manifest,
+            target_count=args.count,
+            questions_per_call=args.per_call,
+            category_weights=category_weights,
+        )
+        sys.exit(0)
+    if args.ingest:
+        ingest_results(*args.ingest, output_format=args.format)
+        sys.exit(0)
+
+    options = GenerationOptions(
+        target_count=args.count,
+        workers=args.workers,
+        use_cache=args.use_cache,
+        resume=args.resume,
+        preflight_only=args.preflight,
+        max_total_tokens=args.max_total_tokens,
+        max_call_tokens=args.max_call_tokens,
+        dedup_threshold=args.dedup_threshold,
+        dedup_rounds=args.dedup_rounds,
+        questions_per_call=args.per_call,
+        providers=args.providers,
+        max_attempts=args.max_attempts,
+        adaptive=args.adaptive,
+        output_format=args.format,
+        category_weights=category_weights,
+        diversity_target=args.diversity_target,
+        round_calls=args.round_calls,
+        novelty_threshold=args.novelty_threshold,
+        min_novelty=args.min_novelty,
+    )
+    generate_questions(options)
@@ -0,0 +1,881 @@
+"""
+Offline benchmarks for the pipeline, so changes can be measured without a live API.
+
+Suites:
+- threads: clean_and_extract_threads() rows/sec over a synthetic CSV (with exact duplicates)
+- prompts: fill_prompt() cost for both generators (every discussion combination, every category)
+- generate: end-to-end generate_questions() of both generators against the deterministic
+  FakeChatModel at several concurrency levels: throughput and p50/p95/p99 call latency
+- retrieval: BM25 thread index (shared/bm25_index.py) build time, size and per-query latency
+  over a synthetic corpus (Zipfian over the real threads' vocabulary plus a rare-term tail),
+  queried with every discussion dimension combination
+- startup: wall time of every offline cli.py subcommand (best of --repeat fresh interpreters),
+  whether each stays under --startup-budget (--schema-startup-budget for render --output and
+  batch, which load pydantic), and any heavy modules (langchain, dotenv, numpy) they import
+  according to -X importtime
+- coverage: calls needed to reach --diversity-target novel questions with the adaptive budget
+  (shared/adaptive_budget.py) vs plain round robin, over simulated categories whose pools of
+  distinct questions range from a handful to hundreds (each call draws one at random)
+- store: columnar thread store (shared/thread_store.py) write time and size, and the time to
+  select a one-month window, a 5-author subset and both, decoding only the matching threads,
+  vs parsing the whole corpus as JSONL and filtering it
+
+Each run is written as JSON (commit, environment, config, results) so runs can be compared
+across commits with --compare.
+
+Input data sources: final-dimensions.json, prompt_categories.json (via the generator scripts)
+Output destinations: benchmarks/results/<timestamp>-<commit>.json (or --output)
+Dependencies: The generator scripts' imports (langchain_core, pydantic, ...); no API keys
+Key exports: bench_threads(), bench_prompts(), bench_generate(), bench_retrieval(), bench_startup(),
+             bench_coverage(), bench_store(), compare_results()
+Side effects: Writes temporary files under the system temp dir and the results file
+
+Usage: python benchmarks/run_benchmarks.py [--suite threads,prompts,generate,retrieval,startup,coverage,store]
+       [--rows N] [--concurrency 1,4,16,64] [--questions N] [--latency S] [--latency-sigma X]
+       [--error-rate P] [--capacity N] [--documents N] [--startup-budget S] [--schema-startup-budget S]
+       [--diversity-target N] [--repeat N] [--seed N] [--output PATH]
+       python benchmarks/run_benchmarks.py --compare OLD.json NEW.json
+"""
+
+import argparse
+import contextlib
+import csv
+import importlib.util
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+sys.path.insert(0, REPO_DIR)
+
+SCRIPTS = {
+    "process_threads": "1-discussion-forum/process_threads.py",
+    "discussion": "1-discussion-forum/generate-questions/questions/discussion-questions.py",
+    "classification": "2-prompt-classification/generate-questions/prompt-classify-questions.py",
+}
+SUITES = ("threads", "prompts", "generate", "retrieval", "startup", "coverage", "store")
+
+# Top-level packages the offline CLI subcommands must not import
+HEAVY_MODULES = (
+    "langchain",
+    "langchain_core",
+    "langchain_openai",
+    "langchain_google_vertexai",
+    "dotenv",
+    "numpy",
+)
+
+_modules = {}
+
+
+def load_script(name):
+    """Import one of the pipeline scripts by path (their file names are not importable)."""
+    if name not in _modules:
+        path = os.path.join(REPO_DIR, SCRIPTS[name])
+        spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+        module = importlib.util.module_from_spec(spec)
+        sys.path.insert(0, os.path.dirname(path))
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+
+@contextlib.contextmanager
+def quietly():
+    """Swallow the scripts' progress output while timing them."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@contextlib.contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def latency_summary(seconds):
+    values = sorted(seconds)
+
+    def to_ms(value):
+        return None if value is None else round(value * 1000, 3)
+
+    return {
+        "count": len(values),
+        "mean_ms": to_ms(sum(values) / len(values)) if values else None,
+        "p50_ms": to_ms(percentile(values, 50)),
+        "p95_ms": to_ms(percentile(values, 95)),
+        "p99_ms": to_ms(percentile(values, 99)),
+        "max_ms": to_ms(values[-1] if values else None),
+    }
+
+
+class TimedModel:
+    """Wraps a chat model and records the wall time and outcome of every structured call."""
+
+    def __init__(self, chat_model):
+        self.chat_model = chat_model
+        self.model_name = chat_model.model_name
+        self.latencies = []
+        self.errors = 0
+
+    def with_structured_output(self, schema, **kwargs):
+        return TimedStructuredModel(
+            self, self.chat_model.with_structured_output(schema, **kwargs)
+        )
+
+    def record(self, started, failed):
+        self.latencies.append(time.perf_counter() - started)
+        self.errors += failed
+
+
+class TimedStructuredModel:
+    def __init__(self, timed_model, structured_model):
+        self.timed_model = timed_model
+        self.structured_model = structured_model
+
+    def invoke(self, prompt, config=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.structured_model.invoke(prompt, config=config)
+        except Exception:
+            self.timed_model.record(started, True)
+            raise
+        self.timed_model.record(started, False)
+        return response
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.structured_model.ainvoke(prompt, config=config)
+        except Exception:
+            self.timed_model.record(started, True)
+            raise
+        self.timed_model.record(started, False)
+        return response
+
+    def batch(self, prompts, config=None, return_exceptions=False, **kwargs):
+        from shared.concurrency import run_batch
+
+        return run_batch(self.invoke, prompts, config, return_exceptions)
+
+
+def write_thread_csv(path, rows, duplicate_rate=0.1, seed=0):
+    """A CSV shaped like recent_threads_Aug2025.csv with a share of exact duplicate bodies."""
+    rng = random.Random(seed)
+    words = (
+        "counsel contract vendor policy board privacy employment litigation settlement "
+        "compliance audit merger equity indemnity template benchmark referral firm "
+        "budget regulator disclosure negotiation clause renewal governance"
+    ).split()
+    bodies = []
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(
+            ["thread_id", "thread_date", "author_id", "thread_title", "thread_body"]
+        )
+        for thread_id in range(1, rows + 1):
+            if bodies and rng.random() < duplicate_rate:
+                body = rng.choice(bodies)
+            else:
+                body = " ".join(rng.choice(words) for _ in range(rng.randint(40, 160)))
+                bodies.append(body)
+            title = " ".join(rng.choice(words) for _ in range(6)).title()
+            writer.writerow(
+                [thread_id, "2025-08-01 00:00:00+00", rng.randint(1, 5000), title, body]
+            )
+
+
+def bench_threads(rows, repeat=3, seed=0):
+    """Best-of-`repeat` clean_and_extract_threads() throughput."""
+    module = load_script("process_threads")
+    timings = []
+
+    with tempfile.TemporaryDirectory() as directory, working_directory(directory):
+        write_thread_csv("recent_threads_Aug2025.csv", rows, seed=seed)
+        input_bytes = os.path.getsize("recent_threads_Aug2025.csv")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with quietly():
+                output = module.clean_and_extract_threads()
+            timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    return {
+        "rows": rows,
+        "input_mib": round(input_bytes / (1 << 20), 2),
+        "unique_threads": output["metadata"]["total_unique_threads"],
+        "seconds": round(best, 4),
+        "rows_per_second": round(rows / best, 1),
+    }
+
+
+def time_rendering(render, items, repeat):
+    """Best-of-`repeat` seconds to render every item, plus the mean prompt length."""
+    best = None
+    characters = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        characters = sum(len(render(item)) for item in items)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        "prompts": len(items),
+        "mean_prompt_chars": round(characters / len(items)),
+        "us_per_prompt": round(best / len(items) * 1e6, 2),
+        "prompts_per_second": round(len(items) / best, 1),
+    }
+
+
+def bench_prompts(repeat=20):
+    """fill_prompt() cost over every full-product combination and every category."""
+    discussion = load_script("discussion")
+    with quietly():
+        combinations = discussion.generate_dimension_combinations(
+            discussion.load_dimensions()
+        )
+    discussion_template = discussion.create_prompt_template()
+
+    classification = load_script("classification")
+    categories = list(classification.load_categories().values())
+    classification_template = classification.create_prompt_template()
+
+    return {
+        "discussion": time_rendering(
+            lambda combination: discussion.fill_prompt(
+                discussion_template, combination
+            ),
+            list(combinations),
+            repeat,
+        ),
+        "classification": time_rendering(
+            lambda category: classification.fill_prompt(
+                classification_template, category
+            ),
+            categories,
+            repeat,
+        ),
+    }
+
+
+def run_generator(name, concurrency, model_options, questions):
+    """One offline generate_questions() run; returns its throughput and call latencies."""
+    from shared.fake_llm import FakeChatModel
+
+    module = load_script(name)
+    model = TimedModel(FakeChatModel(**model_options))
+
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, "questions.json")
+        if name == "discussion":
+            options = {"use_async": concurrency > 1, "concurrency": concurrency}
+        else:
+            options = {"target_count": questions, "workers": concurrency}
+
+        started = time.perf_counter()
+        with quietly():
+            results = module.generate_questions(
+                use_cache=False, output_path=output_path, llm=model, **options
+            )
+        elapsed = time.perf_counter() - started
+        generated = results.total_generated
+
+    return {
+        "concurrency": concurrency,
+        "questions": generated,
+        "seconds": round(elapsed, 4),
+        "questions_per_second": round(generated / elapsed, 2),
+        "calls": len(model.latencies),
+        "call_errors": model.errors,
+        "latency": latency_summary(model.latencies),
+    }
+
+
+def bench_generate(concurrency_levels, model_options, questions):
+    """End-to-end runs of both generators at each concurrency level."""
+    return {
+        name: [
+            run_generator(name, concurrency, model_options, questions)
+            for concurrency in concurrency_levels
+        ]
+        for name in ("discussion", "classification")
+    }
+
+
+def bench_retrieval(documents, repeat=3, k=3, seed=0):
+    """Build a BM25 index over a synthetic corpus and time one query per dimension combination."""
+    from collections import Counter
+
+    from shared.bm25_index import BM25Index, build_index, read_threads, tokenize
+
+    discussion = load_script("discussion")
+    with quietly():
+        combinations = list(
+            discussion.generate_dimension_combinations(discussion.load_dimensions())
+        )
+    queries = [discussion.combination_query(combination) for combination in combinations]
+
+    # Real vocabulary ranked by frequency, then a long tail of rare synthetic terms
+    real_threads = os.path.join(REPO_DIR, "1-discussion-forum", "threads_cleaned.json")
+    counts = Counter(
+        token
+        for thread in read_threads(real_threads)
+        for token in tokenize(f"{thread['thread_title']} {thread['thread_body']}")
+    )
+    vocabulary = [word for word, _ in counts.most_common()]
+    vocabulary += [f"term{i}" for i in range(20_000)]
+    cum_weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1))
+    )
+    rng = random.Random(seed)
+
+    def synthetic_threads():
+        for _ in range(documents):
+            words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(40, 160))
+            yield {"thread_title": " ".join(words[:6]), "thread_body": " ".join(words[6:])}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "threads.bm25")
+        started = time.perf_counter()
+        build_index(synthetic_threads(), path)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = BM25Index(path)
+        open_seconds = time.perf_counter() - started
+
+        latencies = []
+        for _ in range(repeat):
+            for query in queries:
+                started = time.perf_counter()
+                index.search(query, k)
+                latencies.append(time.perf_counter() - started)
+        index_bytes = os.path.getsize(path)
+        del index
+
+    return {
+        "documents": documents,
+        "build_seconds": round(build_seconds, 3),
+        "index_mib": round(index_bytes / (1 << 20), 2),
+        "open_ms": round(open_seconds * 1000, 3),
+        "queries": len(queries),
+        "latency": latency_summary(latencies),
+    }
+
+
+def imported_modules(argv):
+    """Top-level module names a fresh `python -X importtime <argv>` imports."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+    )
+    modules = set()
+    for line in completed.stderr.splitlines():
+        # "import time:       123 |        456 |   package.module"
+        if line.startswith("import time:") and line.count("|") == 2:
+            name = line.rsplit("|", 1)[1].strip()
+            modules.add(name.split(".")[0])
+    return modules
+
+
+def bench_startup(repeat=3, budget=0.3, schema_budget=1.0):
+    """Wall time of each offline CLI subcommand in a fresh interpreter (best of repeat).
+
+    render --output and batch load a generator's pydantic output schemas, so they are held
+    to schema_budget instead of budget.
+    """
+    cli = os.path.join(REPO_DIR, "cli.py")
+    with tempfile.TemporaryDirectory() as directory:
+        questions_path = os.path.join(directory, "questions.json")
+        with open(questions_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "questions": [
+                        {
+                            "question": f"Question {i}?",
+                            "category_info": {
+                                "category": f"Category {i % 5}",
+                                "instruction": "",
+                                "examples": [],
+                            },
+                        }
+                        for i in range(100)
+                    ],
+                    "total_generated": 100,
+                },
+                f,
+            )
+        threads_path = os.path.join(directory, "threads.csv")
+        write_thread_csv(threads_path, 100)
+        manifest_path = os.path.join(directory, "manifest.jsonl")
+        results_path = os.path.join(directory, "results.jsonl")
+
+        # name -> (argv, budget); in order, as the batch commands use the manifest
+        commands = {
+            "help": ([cli], budget),
+            "ingest": (
+                [
+                    cli,
+                    "ingest",
+                    "--stream",
+                    "--input",
+                    threads_path,
+                    "--output",
+                    os.path.join(directory, "threads.json"),
+                    "--no-columnar",
+                ],
+                budget,
+            ),
+            "plan": ([cli, "plan", "--show", "0"], budget),
+            "render": ([cli, "render", "classification", "--index", "1"], budget),
+            "render --output": (
+                [cli, "render", "classification", "--output", manifest_path],
+                schema_budget,
+            ),
+            "batch run-local": (
+                [cli, "batch", "run-local", manifest_path, results_path],
+                schema_budget,
+            ),
+            "batch ingest": (
+                [
+                    cli,
+                    "batch",
+                    "ingest",
+                    manifest_path,
+                    results_path,
+                    "--output",
+                    os.path.join(directory, "ingested.json"),
+                ],
+                schema_budget,
+            ),
+            "convert": (
+                [cli, "convert", questions_path, os.path.join(directory, "q.jsonl")],
+                budget,
+            ),
+            "stats": ([cli, "stats", questions_path], budget),
+        }
+        results = {}
+        for name, (argv, command_budget) in commands.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                completed = subprocess.run(
+                    [sys.executable, *argv], cwd=REPO_DIR, capture_output=True
+                )
+                timings.append(time.perf_counter() - started)
+            heavy = sorted(imported_modules(argv) & set(HEAVY_MODULES))
+            results[name] = {
+                "seconds": round(min(timings), 4),
+                "ok": completed.returncode == 0,
+                "within_budget": min(timings) <= command_budget,
+                "heavy_modules": heavy,
+            }
+    return results
+
+
+def bench_coverage(diversity_target=600, seed=0):
+    """Calls to reach diversity_target distinct questions: adaptive budget vs round robin."""
+    from shared.adaptive_budget import AdaptiveBudget
+
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(5_000)]
+    pool_sizes = [2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 200, 300, 400]
+    pools = {
+        f"category{k}": [
+            " ".join(rng.choices(vocabulary, k=rng.randint(12, 24))) for _ in range(size)
+        ]
+        for k, size in enumerate(pool_sizes)
+    }
+    max_calls = 20 * diversity_target
+
+    # Round robin: every category gets the next call in turn, saturated or not
+    seen = set()
+    round_robin_calls = 0
+    for key in itertools.cycle(pools):
+        if len(seen) >= diversity_target or round_robin_calls >= max_calls:
+            break
+        seen.add(rng.choice(pools[key]))
+        round_robin_calls += 1
+
+    budget = AdaptiveBudget(
+        {key: itertools.repeat(key) for key in pools},
+        max_calls=max_calls,
+        diversity_target=diversity_target,
+    )
+    started = time.perf_counter()
+    with quietly():
+        while True:
+            calls = budget.next_round()
+            if not calls:
+                break
+            for key, _ in calls:
+                budget.observe(key, rng.choice(pools[key]))
+    scoring_seconds = time.perf_counter() - started
+
+    return {
+        "diversity_target": diversity_target,
+        "categories": len(pools),
+        "round_robin_calls": round_robin_calls,
+        "adaptive_calls": budget.total_calls,
+        "adaptive_novel": budget.total_novel,
+        "rounds": budget.rounds,
+        "calls_saved": round(1 - budget.total_calls / round_robin_calls, 3),
+        "scoring_seconds": round(scoring_seconds, 3),
+    }
+
+
+def bench_store(documents, repeat=3, seed=0):
+    """Write a columnar store of synthetic threads and time date/author selections against JSONL."""
+    from shared.thread_store import ColumnarThreadWriter, ThreadStore
+
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+    # Zipfian authors: a few prolific posters, a long tail of one-off ones
+    authors = [str(100_000 + i) for i in range(documents // 20 or 1)]
+    cum_weights = list(
+        itertools.accumulate(1 / rank for rank in range(1, len(authors) + 1))
+    )
+    words = [f"word{i}" for i in range(5_000)]
+    threads = [
+        {
+            "thread_id": str(row),
+            "thread_date": datetime.fromtimestamp(
+                start + rng.uniform(0, 2 * 365 * 86400), timezone.utc
+            ).isoformat(sep=" "),
+            "author_id": rng.choices(authors, cum_weights=cum_weights)[0],
+            "thread_title": " ".join(rng.choices(words, k=6)),
+            "thread_body": " ".join(rng.choices(words, k=rng.randint(40, 160))),
+        }
+        for row in range(documents)
+    ]
+    selections = {
+        "month": {"since": "2025-03-01", "until": "2025-04-01"},
+        "authors": {"authors": authors[10:15]},
+        "month_and_authors": {
+            "since": "2025-03-01",
+            "until": "2025-04-01",
+            "authors": authors[:5],
+        },
+    }
+
+    def in_selection(thread, since=None, until=None, authors=None):
+        date = thread["thread_date"][:10]
+        return (
+            (since is None or date >= since)
+            and (until is None or date < until)
+            and (authors is None or thread["author_id"] in authors)
+        )
+
+    with tempfile.TemporaryDirectory() as directory:
+        store_path = os.path.join(directory, "threads.cols")
+        jsonl_path = os.path.join(directory, "threads.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            for thread in threads:
+                f.write(json.dumps(thread, ensure_ascii=False) + "\n")
+
+        started = time.perf_counter()
+        writer = ColumnarThreadWriter(store_path)
+        for thread in threads:
+            writer.write(thread)
+        writer.close()
+        write_seconds = time.perf_counter() - started
+
+        results = {
+            "documents": documents,
+            "write_seconds": round(write_seconds, 3),
+            "store_mib": round(os.path.getsize(store_path) / (1 << 20), 2),
+            "jsonl_mib": round(os.path.getsize(jsonl_path) / (1 << 20), 2),
+            "selections": {},
+        }
+        for name, selection in selections.items():
+            store_seconds, scan_seconds = [], []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                store = ThreadStore(store_path)
+                selected = list(store.threads(store.select(**selection)))
+                store_seconds.append(time.perf_counter() - started)
+                del store
+
+                started = time.perf_counter()
+                with open(jsonl_path, encoding="utf-8") as f:
+                    scanned = [
+                        thread
+                        for thread in map(json.loads, f)
+                        if in_selection(thread, **selection)
+                    ]
+                scan_seconds.append(time.perf_counter() - started)
+            if [t["thread_id"] for t in selected] != [t["thread_id"] for t in scanned]:
+                raise AssertionError(f"store selection {name} disagrees with the JSONL scan")
+            results["selections"][name] = {
+                "threads": len(selected),
+                "store_ms": round(min(store_seconds) * 1000, 3),
+                "jsonl_scan_ms": round(min(scan_seconds) * 1000, 3),
+            }
+    return results
+
+
+def git_commit():
+    """(short commit, dirty?) of the working tree, or (None, None) outside git."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def flatten(results, prefix=""):
+    """{"a": {"b": 1}, "c": [{"concurrency": 4, "x": 2}]} -> {"a.b": 1, "c[4].x": 2}."""
+    flat = {}
+    if isinstance(results, dict):
+        for key, value in results.items():
+            flat.update(flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(results, list):
+        for position, value in enumerate(results):
+            label = value.get("concurrency", position) if isinstance(value, dict) else position
+            flat.update(flatten(value, f"{prefix}[{label}]"))
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        flat[prefix] = results
+    return flat
+
+
+def compare_results(old_path, new_path):
+    """Print every metric present in both runs with its new/old ratio."""
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    old_metrics = flatten(old["results"])
+    new_metrics = flatten(new["results"])
+    for key, new_value in new_metrics.items():
+        old_value = old_metrics.get(key)
+        if old_value is None:
+            continue
+        ratio = f"{new_value / old_value:.2f}x" if old_value else "n/a"
+        print(f"  {key:<55} {old_value:>12g} {new_value:>12g}  {ratio}")
+
+
+def print_results(results):
+    if "threads" in results:
+        threads = results["threads"]
+        print(
+            f"🧵 threads: {threads['rows']} rows in {threads['seconds']}s "
+            f"({threads['rows_per_second']:.0f} rows/s)"
+        )
+    for name, prompts in results.get("prompts", {}).items():
+        print(
+            f"📝 {name} prompts: {prompts['us_per_prompt']} µs/prompt "
+            f"({prompts['prompts']} prompts, ~{prompts['mean_prompt_chars']} chars)"
+        )
+    for name, runs in results.get("generate", {}).items():
+        for run in runs:
+            latency = run["latency"]
+            print(
+                f"⚡ {name} @ {run['concurrency']}: {run['questions_per_second']} q/s, "
+                f"p50 {latency['p50_ms']} ms, p95 {latency['p95_ms']} ms, "
+                f"p99 {latency['p99_ms']} ms, {run['call_errors']} call errors"
+            )
+    if "retrieval" in results:
+        retrieval = results["retrieval"]
+        latency = retrieval["latency"]
+        print(
+            f"🔎 retrieval: {retrieval['documents']} threads indexed in "
+            f"{retrieval['build_seconds']}s ({retrieval['index_mib']} MiB, opens in "
+            f"{retrieval['open_ms']} ms); query p50 {latency['p50_ms']} ms, "
+            f"p95 {latency['p95_ms']} ms, p99 {latency['p99_ms']} ms"
+        )
+    for name, startup in results.get("startup", {}).items():
+        status = "ok" if startup["ok"] else "failed"
+        budget = "within budget" if startup["within_budget"] else "OVER BUDGET"
+        heavy = ", ".join(startup["heavy_modules"]) or "none"
+        print(
+            f"🚀 cli.py {name}: {startup['seconds'] * 1000:.0f} ms ({status}, {budget}), "
+            f"heavy imports: {heavy}"
+        )
+    if "coverage" in results:
+        coverage = results["coverage"]
+        print(
+            f"🎯 coverage: {coverage['adaptive_novel']} novel questions in "
+            f"{coverage['adaptive_calls']} adaptive calls vs {coverage['round_robin_calls']} "
+            f"round robin ({coverage['calls_saved']:.0%} fewer, {coverage['rounds']} rounds, "
+            f"{coverage['scoring_seconds']}s scoring)"
+        )
+    if "store" in results:
+        store = results["store"]
+        print(
+            f"🗄️  store: {store['documents']} threads written in {store['write_seconds']}s "
+            f"({store['store_mib']} MiB vs {store['jsonl_mib']} MiB JSONL)"
+        )
+        for name, selection in store["selections"].items():
+            print(
+                f"   {name}: {selection['threads']} threads in {selection['store_ms']} ms "
+                f"(JSONL scan {selection['jsonl_scan_ms']} ms)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Offline pipeline benchmarks against the local fake chat model"
+    )
+    parser.add_argument(
+        "--suite",
+        default=",".join(SUITES),
+        help=f"Comma-separated suites to run (default: {','.join(SUITES)})",
+    )
+    parser.add_argument(
+        "--rows", type=int, default=50_000, help="Synthetic CSV rows for the threads suite"
+    )
+    parser.add_argument(
+        "--concurrency",
+        default="1,4,16,64",
+        help="Comma-separated concurrency levels for the generate suite",
+    )
+    parser.add_argument(
+        "--questions",
+        type=int,
+        default=200,
+        help="Questions per classification run (discussion runs the full product)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Median fake call latency in seconds"
+    )
+    parser.add_argument(
+        "--latency-sigma", type=float, default=0.5, help="Log-normal sigma of the latency"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Probability a fake call fails (500)"
+    )
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=None,
+        help="Fake provider concurrency quota; calls beyond it get a 429",
+    )
+    parser.add_argument(
+        "--documents",
+        type=int,
+        default=100_000,
+        help="Synthetic threads indexed by the retrieval suite and stored by the store suite",
+    )
+    parser.add_argument(
+        "--startup-budget",
+        type=float,
+        default=0.3,
+        help="Seconds an offline cli.py subcommand may take (startup suite)",
+    )
+    parser.add_argument(
+        "--schema-startup-budget",
+        type=float,
+        default=1.0,
+        help="Seconds for render --output and batch, which load pydantic (startup suite)",
+    )
+    parser.add_argument(
+        "--diversity-target",
+        type=int,
+        default=600,
+        help="Novel questions the coverage suite must reach",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="Compare two results files instead of running",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        sys.exit(0)
+
+    suites = [suite.strip() for suite in args.suite.split(",") if suite.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        raise SystemExit(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+
+    results = {}
+    if "threads" in suites:
+        results["threads"] = bench_threads(args.rows, args.repeat, args.seed)
+    if "prompts" in suites:
+        results["prompts"] = bench_prompts(args.repeat * 10)
+    if "generate" in suites:
+        model_options = {
+            "latency": args.latency,
+            "latency_sigma": args.latency_sigma,
+            "error_rate": args.error_rate,
+            "capacity": args.capacity,
+            "seed": args.seed,
+        }
+        levels = [int(level) for level in args.concurrency.split(",")]
+        results["generate"] = bench_generate(levels, model_options, args.questions)
+    if "retrieval" in suites:
+        results["retrieval"] = bench_retrieval(args.documents, args.repeat, seed=args.seed)
+    if "startup" in suites:
+        results["startup"] = bench_startup(
+            args.repeat, args.startup_budget, args.schema_startup_budget
+        )
+    if "coverage" in suites:
+        results["coverage"] = bench_coverage(args.diversity_target, args.seed)
+    if "store" in suites:
+        results["store"] = bench_store(args.documents, args.repeat, args.seed)
+
+    commit, dirty = git_commit()
+    run = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key != "compare"},
+        "results": results,
+    }
+
+    output_path = args.output or os.path.join(
+        RESULTS_DIR,
+        f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{commit or 'nogit'}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+
+    print_results(results)
+    print(f"📁 Results saved to: {output_path}")
@@ -0,0 +1,341 @@
+"""
+Single entry point for the pipeline, with subcommands that import only what they need.
+
+Offline subcommands (ingest, plan, render, batch, convert, stats) never import langchain, dotenv or
+numpy, so they start in tens of milliseconds; generate loads the LLM stack only when the
+chosen script makes its first model call. plan and render use the generators' prompt modules
+(discussion_prompts.py, classification_prompts.py), not the generator scripts, so they skip
+pydantic too; only render --output and batch, which need the output schemas, load a generator.
+ingest and generate run the existing scripts unchanged, in their own directories, with the
+remaining arguments.
+
+Input data sources: Depends on the subcommand (threads CSV, dimensions/categories JSON, question files)
+Output destinations: Depends on the subcommand
+Dependencies: Standard library at startup; each subcommand imports its own modules
+Key exports: COMMANDS, main()
+Side effects: Depends on the subcommand (generate makes LLM calls)
+
+Usage: python cli.py ingest [process_threads.py args]
+       python cli.py plan [--strategy full|covering] [--strength T] [--max-rows N] [--weight D=W ...] [--show N]
+       python cli.py render discussion|classification [--index N | --output MANIFEST] [--per-call N] [--count N]
+       python cli.py batch run-local MANIFEST RESULTS [--workers N] [--latency S] [--error-rate P]
+       python cli.py batch ingest MANIFEST RESULTS [--output PATH] [--format json|jsonl|parquet]
+       python cli.py convert INPUT OUTPUT [--flat] [--row-group-size N]
+       python cli.py stats PATH
+       python cli.py generate discussion|classification|dimensions [script args]
+"""
+
+import argparse
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPTS = {
+    "ingest": "1-discussion-forum/process_threads.py",
+    "dimensions": "1-discussion-forum/generate-questions/final-dimensions/generate-dimensions.py",
+    "discussion": "1-discussion-forum/generate-questions/questions/discussion-questions.py",
+    "classification": "2-prompt-classification/generate-questions/prompt-classify-questions.py",
+}
+
+# Generator -> its standard-library prompt module (plan and render only need these)
+PROMPT_MODULES = {
+    "discussion": "1-discussion-forum/generate-questions/questions/discussion_prompts.py",
+    "classification": "2-prompt-classification/generate-questions/classification_prompts.py",
+}
+
+
+def load_script(name):
+    """Import a pipeline script by path (the file names are not valid module names)."""
+    import importlib.util
+
+    path = os.path.join(REPO_DIR, SCRIPTS[name])
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, os.path.dirname(path))
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_prompts(generator):
+    """Import a generator's prompt module without the generator script itself."""
+    import importlib
+
+    path = os.path.join(REPO_DIR, PROMPT_MODULES[generator])
+    sys.path.insert(0, os.path.dirname(path))
+    return importlib.import_module(os.path.splitext(os.path.basename(path))[0])
+
+
+def run_script(name, args):
+    """Run a script as __main__ in its own directory, so its CWD-relative paths keep working."""
+    import runpy
+
+    path = os.path.join(REPO_DIR, SCRIPTS[name])
+    os.chdir(os.path.dirname(path))
+    sys.path.insert(0, os.path.dirname(path))
+    sys.argv = [path, *args]
+    runpy.run_path(path, run_name="__main__")
+    return 0
+
+
+def ingest(args):
+    return run_script("ingest", args)
+
+
+def generate(args):
+    scripts = ("discussion", "classification", "dimensions")
+    if not args or args[0] not in scripts:
+        print(f"usage: cli.py generate {{{','.join(scripts)}}} [script args]")
+        return 2
+    return run_script(args[0], args[1:])
+
+
+def plan(args):
+    parser = argparse.ArgumentParser(
+        prog="cli.py plan", description="Show the dimension combination plan"
+    )
+    parser.add_argument("--strategy", choices=["full", "covering"], default="full")
+    parser.add_argument("--strength", type=int, default=2)
+    parser.add_argument("--max-rows", type=int, default=None)
+    parser.add_argument("--weight", action="append", default=[], metavar="DIMENSION=WEIGHT")
+    parser.add_argument("--show", type=int, default=10, help="Rows to print (0: none)")
+    args = parser.parse_args(args)
+
+    weights = {}
+    for spec in args.weight:
+        name, _, value = spec.rpartition("=")
+        weights[name.strip()] = float(value)
+
+    discussion = load_prompts("discussion")
+    combinations = discussion.generate_dimension_combinations(
+        discussion.load_dimensions(),
+        strategy=args.strategy,
+        strength=args.strength,
+        weights=weights,
+        max_rows=args.max_rows,
+    )
+    for i, combination in enumerate(combinations, 1):
+        if i > args.show:
+            break
+        print(f"{i:>4}. {discussion.combination_tag(combination)}")
+    return 0
+
+
+def render(args):
+    parser = argparse.ArgumentParser(
+        prog="cli.py render", description="Render generation prompts without calling a model"
+    )
+    parser.add_argument("generator", choices=["discussion", "classification"])
+    parser.add_argument("--index", type=int, default=1, help="Print the prompt for this call")
+    parser.add_argument(
+        "--output", default=None, help="Write every call to a batch request manifest instead"
+    )
+    parser.add_argument("--per-call", type=int, default=1)
+    parser.add_argument(
+        "--count", type=int, default=50, help="Questions (classification sequence)"
+    )
+    args = parser.parse_args(args)
+
+    if args.output is not None:
+        # The manifest header carries the generator's pydantic output schemas
+        module = load_script(args.generator)
+        if args.generator == "discussion":
+            module.render_manifest(args.output, questions_per_call=args.per_call)
+        else:
+            module.render_manifest(
+                args.output, target_count=args.count, questions_per_call=args.per_call
+            )
+        return 0
+
+    module = load_prompts(args.generator)
+    template = module.create_prompt_template()
+    if args.generator == "discussion":
+        with quiet():
+            combinations = module.generate_dimension_combinations(
+                module.load_dimensions()
+            )
+        prompts = (
+            (i, module.fill_prompt(template, combination, args.per_call))
+            for i, combination in enumerate(combinations, 1)
+        )
+    else:
+        calls = -(-args.count // args.per_call)
+        with quiet():
+            sequence = module.generate_category_sequence(
+                module.load_categories(), target_count=calls
+            )
+        prompts = (
+            (
+                i,
+                module.fill_prompt(
+                    template,
+                    category_data,
+                    len(module.question_slots(i, args.per_call, args.count)),
+                ),
+            )
+            for i, (_, category_data) in enumerate(sequence, 1)
+        )
+
+    for i, prompt in prompts:
+        if i == args.index:
+            print(prompt)
+            return 0
+    print(f"No call {args.index}")
+    return 1
+
+
+def batch(args):
+    parser = argparse.ArgumentParser(
+        prog="cli.py batch",
+        description="Answer a request manifest offline, or ingest a batch result file",
+    )
+    parser.add_argument("action", choices=["run-local", "ingest"])
+    parser.add_argument("manifest")
+    parser.add_argument("results")
+    parser.add_argument("--workers", type=int, default=8, help="run-local: parallel calls")
+    parser.add_argument("--latency", type=float, default=0.0, help="run-local: fake latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="run-local: fake errors")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="ingest: output file")
+    parser.add_argument("--format", choices=["json", "jsonl", "parquet"], default="json")
+    args = parser.parse_args(args)
+
+    sys.path.insert(0, REPO_DIR)
+    if args.action == "run-local":
+        from shared.batch_jobs import run_local
+        from shared.fake_llm import FakeChatModel
+
+        succeeded, failed = run_local(
+            args.manifest,
+            args.results,
+            FakeChatModel(latency=args.latency, error_rate=args.error_rate, seed=args.seed),
+            workers=args.workers,
+        )
+        print(f"✅ {succeeded} results written to {args.results} ({failed} failed)")
+        return 0
+
+    from shared.batch_jobs import read_manifest
+
+    header, _ = read_manifest(args.manifest)
+    generators = {
+        "discussion-questions": "discussion",
+        "prompt-classify-questions": "classification",
+    }
+    module = load_script(generators[header["generator"]])
+    module.ingest_results(args.manifest, args.results, args.output, args.format)
+    return 0
+
+
+def convert(args):
+    parser = argparse.ArgumentParser(
+        prog="cli.py convert",
+        description="Convert question files: .csv (or --flat) exports flat rows; "
+        ".json/.jsonl/.parquet use the normalized compact formats",
+    )
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument(
+        "--flat", action="store_true", help="Flat rows for a .parquet output (like the CSV)"
+    )
+    parser.add_argument("--row-group-size", type=int, default=10_000)
+    args = parser.parse_args(args)
+
+    sys.path.insert(0, REPO_DIR)
+    if args.output.endswith(".csv") or args.flat:
+        from shared.export_questions import export_questions
+
+        output_path, schema, count = export_questions(
+            args.input, args.output, args.row_group_size
+        )
+        print(f"✅ Exported {count} questions ({schema} schema) to {output_path}")
+        return 0
+
+    from shared.compact_output import iter_any, read_compact, write_compact
+
+    if args.output.endswith(".json"):
+        import json
+
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(read_compact(args.input), f, indent=2, ensure_ascii=False)
+    else:
+        write_compact(args.output, iter_any(args.input))
+    print(f"✅ Converted {args.input} -> {args.output}")
+    return 0
+
+
+def stats(args):
+    parser = argparse.ArgumentParser(
+        prog="cli.py stats", description="Summarize a generated questions file"
+    )
+    parser.add_argument("path")
+    args = parser.parse_args(args)
+
+    sys.path.insert(0, REPO_DIR)
+    from collections import Counter
+
+    from shared.export_questions import detect_schema, iter_questions
+
+    counts = {}
+    total = 0
+    words = 0
+    for question in iter_questions(args.path):
+        if not total:
+            schema = detect_schema(question)
+        for field, value in question.items():
+            if isinstance(value, dict):
+                label = value.get("dimension") or value.get("category")
+                counts.setdefault(field, Counter())[label] += 1
+        total += 1
+        words += len(question.get("question", "").split())
+
+    if not total:
+        print(f"{args.path}: no questions")
+        return 0
+
+    print(f"{args.path}: {total} questions ({schema} schema), {words / total:.0f} words on average")
+    for field, counter in counts.items():
+        print(f"\n{field} ({len(counter)} values):")
+        for label, count in counter.most_common():
+            print(f"  {count:>5}  {label}")
+    return 0
+
+
+class quiet:
+    """Silence the scripts' progress prints while they plan or load data."""
+
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+
+    def __exit__(self, *exc_info):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+        return False
+
+
+# name -> (handler, help)
+COMMANDS = {
+    "ingest": (ingest, "Clean/deduplicate forum threads (process_threads.py)"),
+    "plan": (plan, "Show the dimension combination plan and its coverage"),
+    "render": (render, "Render generation prompts or a batch request manifest"),
+    "batch": (batch, "Answer a manifest with the fake model, or ingest batch results"),
+    "convert": (convert, "Convert question files between JSON, JSONL, Parquet and CSV"),
+    "stats": (stats, "Summarize a generated questions file"),
+    "generate": (generate, "Run a generation script (discussion, classification, dimensions)"),
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print("usage: cli.py <command> [args]\n\ncommands:")
+        for name, (_, help_text) in COMMANDS.items():
+            print(f"  {name:<10} {help_text}")
+        return 0 if argv[:1] in ([], ["-h"], ["--help"]) else 2
+
+    handler, _ = COMMANDS[argv[0]]
+    return handler(argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""
+Runs the generation workflow as a DAG of stages, skipping stages whose outputs are up to date.
+
+Each stage runs its script in the script's own directory (so CWD-relative paths keep working).
+A stage is stale when the sha256 fingerprint of its input files, code files and arguments differs
+from the last successful run, or when one of its outputs is missing or was changed since. Stages
+depend on the stages that produce their inputs; independent branches run concurrently.
+A stage's code files are its script plus every repo module it imports, directly or through
+other repo modules (shared.* helpers, sibling modules), found by parsing the imports.
+Extra arguments given with --args that name a file (e.g. --thread-index ../../threads.bm25)
+become inputs of the stage too.
+
+Note: generate-dimensions.py writes results.md, which is curated by hand into
+final-dimensions.json, so the dimensions stage does not feed the question stages directly.
+
+Input data sources: The stage scripts and their declared input files
+Output destinations: The stages' outputs, .cache/pipeline_state.json
+Dependencies: asyncio, ast, hashlib (standard library)
+Key exports: STAGES, Stage, local_imports(), run_pipeline()
+Side effects: Runs stage scripts as subprocesses (LLM calls included), writes the state file
+
+Usage: python pipeline.py [STAGE ...] [--force] [--dry-run] [--mark-fresh] [--jobs N]
+       [--args STAGE="--flag value" ...]
+"""
+
+import argparse
+import ast
+import asyncio
+import hashlib
+import json
+import os
+import shlex
+import sys
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = os.path.join(REPO_DIR, ".cache", "pipeline_state.json")
+
+
+def imported_modules(path):
+    """Dotted names of every module imported anywhere in a file (lazy imports included)."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            yield from (alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            yield node.module
+
+
+def local_imports(path):
+    """Repo files imported by a script, transitively: modules resolved against the repo
+    root (shared.*) or the importing file's directory (sibling modules)."""
+    found = []
+    pending = [path]
+    while pending:
+        current = pending.pop()
+        for module in imported_modules(current):
+            relative = module.replace(".", os.sep) + ".py"
+            for base in (REPO_DIR, os.path.dirname(current)):
+                candidate = os.path.normpath(os.path.join(base, relative))
+                if os.path.isfile(candidate):
+                    if candidate != path and candidate not in found:
+                        found.append(candidate)
+                        pending.append(candidate)
+                    break
+    return sorted(found)
+
+
+class Stage:
+    """One script run: paths are relative to its directory, which is also its CWD.
+
+    code lists extra files the outputs depend on; the repo modules the script imports
+    are added automatically (see local_imports()).
+    """
+
+    def __init__(self, name, directory, script, inputs, outputs, code=(), args=()):
+        self.name = name
+        self.directory = os.path.join(REPO_DIR, directory)
+        self.script = script
+        self.inputs = [self.resolve(path) for path in inputs]
+        self.outputs = [self.resolve(path) for path in outputs]
+        declared = [self.resolve(path) for path in (script, *code)]
+        imported = local_imports(declared[0])
+        self.code = list(dict.fromkeys(declared + imported))
+        self.args = list(args)
+
+    def resolve(self, path):
+        return os.path.normpath(os.path.join(self.directory, path))
+
+    def add_args(self, args, known_paths=()):
+        """Append command-line arguments. Arguments naming a file (one that exists, or one
+        of known_paths, e.g. another stage's output) also become inputs, so the file is
+        fingerprinted and the stage runs after the stage producing it."""
+        for arg in args:
+            self.args.append(arg)
+            value = arg.partition("=")[2] if arg.startswith("-") else arg
+            if not value:
+                continue
+            path = self.resolve(value)
+            if path in self.inputs or path in self.outputs:
+                continue
+            if os.path.isfile(path) or path in known_paths:
+                self.inputs.append(path)
+
+    def command(self):
+        return [sys.executable, self.script, *self.args]
+
+
+STAGES = [
+    Stage(
+        "threads",
+        "1-discussion-forum",
+        "process_threads.py",
+        inputs=["recent_threads_Aug2025.csv"],
+        outputs=["threads_cleaned.json"],
+    ),
+    Stage(
+        "thread-index",
+        "1-discussion-forum",
+        "../shared/bm25_index.py",
+        inputs=["threads_cleaned.json"],
+        outputs=["threads.bm25"],
+        args=["build", "threads_cleaned.json", "threads.bm25"],
+    ),
+    Stage(
+        "dimensions",
+        "1-discussion-forum/generate-questions/final-dimensions",
+        "generate-dimensions.py",
+        inputs=["../../threads_cleaned.json"],
+        outputs=["results.md"],
+    ),
+    Stage(
+        "discussion-questions",
+        "1-discussion-forum/generate-questions/questions",
+        "discussion-questions.py",
+        inputs=["../final-dimensions/final-dimensions.json"],
+        outputs=["generated_discussion_questions.json"],
+    ),
+    Stage(
+        "discussion-csv",
+        "1-discussion-forum/generate-questions/questions",
+        "../../../shared/export_questions.py",
+        inputs=["generated_discussion_questions.json"],
+        outputs=["generated_discussion_questions.csv"],
+        args=["generated_discussion_questions.json", "generated_discussion_questions.csv"],
+    ),
+    Stage(
+        "thread-categories",
+        "2-prompt-classification",
+        "classify_threads.py",
+        inputs=["../1-discussion-forum/threads_cleaned.json", "prompt_categories.json"],
+        outputs=["thread_categories.jsonl", "category_frequencies.json"],
+    ),
+    Stage(
+        "classification-questions",
+        "2-prompt-classification/generate-questions",
+        "prompt-classify-questions.py",
+        inputs=["../prompt_categories.json"],
+        outputs=["generated_prompt_classification_questions.json"],
+    ),
+    Stage(
+        "classification-csv",
+        "2-prompt-classification/generate-questions",
+        "../../shared/export_questions.py",
+        inputs=["generated_prompt_classification_questions.json"],
+        outputs=["generated_prompt_classification_questions.csv"],
+        args=[
+            "generated_prompt_classification_questions.json",
+            "generated_prompt_classification_questions.csv",
+        ],
+    ),
+]
+
+
+def file_digest(path):
+    """sha256 of a file's contents, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(stage):
+    """Hash everything that determines a stage's outputs: inputs, code and arguments."""
+    digest = hashlib.sha256()
+    for path in sorted(stage.inputs + stage.code):
+        relative = os.path.relpath(path, REPO_DIR)
+        digest.update(f"{relative}\0{file_digest(path)}\n".encode("utf-8"))
+    digest.update(json.dumps(stage.args).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def stale_reason(stage, state):
+    """Return why the stage must run, or None if its outputs are up to date."""
+    record = state.get(stage.name)
+    if record is None:
+        return "never run"
+    if record["fingerprint"] != fingerprint(stage):
+        return "inputs, code or arguments changed"
+    for path in stage.outputs:
+        digest = file_digest(path)
+        if digest is None:
+            return f"missing {os.path.relpath(path, REPO_DIR)}"
+        if digest != record["outputs"].get(os.path.relpath(path, REPO_DIR)):
+            return f"{os.path.relpath(path, REPO_DIR)} changed since the last run"
+    return None
+
+
+def record_success(stage, state):
+    state[stage.name] = {
+        "fingerprint": fingerprint(stage),
+        "outputs": {
+            os.path.relpath(path, REPO_DIR): file_digest(path) for path in stage.outputs
+        },
+    }
+
+
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    temp_path = f"{STATE_PATH}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(temp_path, STATE_PATH)
+
+
+def upstream_of(stages):
+    """Map each stage name to the stages producing its inputs (make-style edges)."""
+    producers = {path: stage for stage in stages for path in stage.outputs}
+    return {
+        stage.name: [producers[path] for path in stage.inputs if path in producers]
+        for stage in stages
+    }
+
+
+def select_stages(stages, targets):
+    """The target stages plus everything upstream of them, in declaration order."""
+    if not targets:
+        return list(stages)
+
+    upstream = upstream_of(stages)
+    by_name = {stage.name: stage for stage in stages}
+    unknown = [name for name in targets if name not in by_name]
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(unknown)}")
+
+    selected = set()
+    frontier = list(targets)
+    while frontier:
+        name = frontier.pop()
+        if name not in selected:
+            selected.add(name)
+            frontier.extend(dependency.name for dependency in upstream[name])
+    return [stage for stage in stages if stage.name in selected]
+
+
+async def run_stage(stage):
+    """Run one stage script in its directory, prefixing its output with the stage name."""
+    process = await asyncio.create_subprocess_exec(
+        *stage.command(),
+        cwd=stage.directory,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    )
+    async for line in process.stdout:
+        print(f"[{stage.name}] {line.decode('utf-8', 'replace').rstrip()}")
+    return await process.wait()
+
+
+async def run_pipeline(stages, forced=(), dry_run=False, jobs=4):
+    """Run stale (or forced) stages once their upstream stages finish; returns {stage: status}."""
+    state = load_state()
+    upstream = upstream_of(stages)
+    slots = asyncio.Semaphore(max(1, jobs))
+    statuses = {}
+    tasks = {}
+
+    async def visit(stage):
+        results = [await tasks[dependency.name] for dependency in upstream[stage.name]]
+        if any(result in ("failed", "blocked") for result in results):
+            statuses[stage.name] = "blocked"
+            return "blocked"
+
+        # In a dry run, anything downstream of a would-be run would rerun too
+        reason = "forced" if stage.name in forced else stale_reason(stage, state)
+        if reason is None and dry_run and "ran" in results:
+            reason = "upstream stage would run"
+        if reason is None:
+            print(f"✅ {stage.name}: up to date")
+            statuses[stage.name] = "fresh"
+            return "fresh"
+
+        if dry_run:
+            print(f"🔁 {stage.name}: would run ({reason})")
+            statuses[stage.name] = "ran"
+            return "ran"
+
+        async with slots:
+            print(f"🔁 {stage.name}: running ({reason}): {shlex.join(stage.command())}")
+            exit_code = await run_stage(stage)
+
+        if exit_code != 0:
+            print(f"❌ {stage.name}: failed with exit code {exit_code}")
+            statuses[stage.name] = "failed"
+            return "failed"
+
+        record_success(stage, state)
+        save_state(state)
+        print(f"✅ {stage.name}: done")
+        statuses[stage.name] = "ran"
+        return "ran"
+
+    # Declaration order is topological, so every dependency task exists already
+    for stage in stages:
+        tasks[stage.name] = asyncio.ensure_future(visit(stage))
+    await asyncio.gather(*tasks.values())
+    return statuses
+
+
+def mark_fresh(stages):
+    """Record the current files as up to date without running anything (like make -t)."""
+    state = load_state()
+    for stage in stages:
+        record_success(stage, state)
+        print(f"📌 {stage.name}: marked up to date")
+    save_state(state)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run the question generation pipeline, skipping up-to-date stages"
+    )
+    parser.add_argument(
+        "stages",
+        nargs="*",
+        help=f"Stages to bring up to date, with their upstream stages (default: all of "
+        f"{', '.join(stage.name for stage in STAGES)})",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run the named stages (default: all) even if they are up to date",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only report which stages would run"
+    )
+    parser.add_argument(
+        "--mark-fresh",
+        action="store_true",
+        help="Record the current outputs as up to date without running anything",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=4, help="Max stages running at the same time"
+    )
+    parser.add_argument(
+        "--args",
+        action="append",
+        default=[],
+        metavar='STAGE="ARGS"',
+        help="Extra command-line arguments for a stage (part of its fingerprint)",
+    )
+    args = parser.parse_args()
+
+    stages = {stage.name: stage for stage in STAGES}
+    outputs = {path for stage in STAGES for path in stage.outputs}
+    for spec in args.args:
+        name, _, stage_args = spec.partition("=")
+        if name not in stages:
+            raise SystemExit(f"Unknown stage: {name}")
+        stages[name].add_args(shlex.split(stage_args), outputs)
+
+    selected = select_stages(STAGES, args.stages)
+    if args.mark_fresh:
+        mark_fresh(selected)
+        sys.exit(0)
+
+    forced = set(args.stages or stages) if args.force else set()
+    statuses = asyncio.run(
+        run_pipeline(selected, forced=forced, dry_run=args.dry_run, jobs=args.jobs)
+    )
+    sys.exit(1 if {"failed", "blocked"} & set(statuses.values()) else 0)
@@ -0,0 +1,12 @@
+"""
+Shared helpers used by the question-generation and thread-processing scripts.
+
+Input data sources: None
+Output destinations: None
+Dependencies: Standard library only at import time
+Key exports: Modules, imported individually (each module's docstring lists its own exports):
+             adaptive_budget, batch_jobs, bm25_index, combination_planner, compact_output,
+             concurrency, export_questions, fake_llm, journal, llm_cache, llm_router,
+             question_dedup, retry, telemetry, thread_store, token_budget
+Side effects: None
+"""
@@ -0,0 +1,210 @@
+"""
+Coverage-driven call budget: generates in rounds and moves the remaining calls to the slices
+(categories, dimension values) that are still producing novel questions.
+
+After every round the new questions are embedded with the near-duplicate check's hashed TF-IDF
+vectors and compared with the earlier questions of their slice. A question is novel when its
+cosine similarity to all of them stays below novelty_threshold. A slice whose latest round was
+less than min_novelty novel is saturated and gets no further calls. The next round's calls are
+split across the other slices in proportion to their novelty rates. The run stops once
+diversity_target novel questions exist, the call budget is spent, or every slice is saturated
+or out of calls.
+
+Input data sources: Questions reported back by the generator after each round
+Output destinations: None
+Dependencies: numpy
+Key exports: AdaptiveBudget
+Side effects: None
+"""
+
+import math
+
+import numpy as np
+
+from shared.question_dedup import hashed_tfidf
+
+
+class AdaptiveBudget:
+    """Hands out calls round by round to the slices that still yield novel questions.
+
+    slices maps a slice key to an iterable of call payloads: finite (e.g. the combinations
+    sharing one dimension value) or endless (e.g. itertools.repeat(category)). Each slice
+    first gets `warmup` calls; later rounds split round_calls (default: two per slice)
+    by novelty rate. Report every question back with observe() before asking for the
+    next round.
+    """
+
+    def __init__(
+        self,
+        slices,
+        max_calls,
+        diversity_target=None,
+        questions_per_call=1,
+        round_calls=None,
+        warmup=2,
+        novelty_threshold=0.5,
+        min_novelty=0.25,
+        n_features=256,
+    ):
+        self.sources = {key: iter(payloads) for key, payloads in slices.items()}
+        self.max_calls = max_calls
+        self.diversity_target = diversity_target
+        self.questions_per_call = questions_per_call
+        self.round_calls = round_calls or 2 * len(self.sources)
+        self.warmup = warmup
+        self.novelty_threshold = novelty_threshold
+        self.min_novelty = min_novelty
+        self.n_features = n_features
+
+        self.texts = {key: [] for key in self.sources}
+        self.scored = {key: 0 for key in self.sources}
+        self.novel = {key: 0 for key in self.sources}
+        self.rates = {key: None for key in self.sources}
+        self.calls = {key: 0 for key in self.sources}
+        self.saturated = set()
+        self.exhausted = set()
+        self.rounds = 0
+        self.stop_reason = None
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    @property
+    def total_novel(self):
+        return sum(self.novel.values())
+
+    def observe(self, key, text):
+        """Report one generated question of a slice (also used to seed a resumed run)."""
+        self.texts[key].append(text)
+
+    def score(self):
+        """Score the questions observed since the last round and update rates and saturation."""
+        keys = [key for key in self.texts if len(self.texts[key]) > self.scored[key]]
+        if not keys:
+            return
+
+        # IDF over every question so far, so common phrasing counts for little
+        all_texts = [text for key in self.texts for text in self.texts[key]]
+        vectors = hashed_tfidf(all_texts, self.n_features)
+        offsets = {}
+        position = 0
+        for key in self.texts:
+            offsets[key] = position
+            position += len(self.texts[key])
+
+        for key in keys:
+            start = offsets[key]
+            rows = vectors[start : start + len(self.texts[key])]
+            scored = self.scored[key]
+            similarities = rows[scored:] @ rows.T
+            # Each new question only counts its slice's earlier questions
+            similarities[np.triu_indices_from(similarities, k=scored)] = -1.0
+            new_novel = int((similarities.max(axis=1) < self.novelty_threshold).sum())
+
+            self.novel[key] += new_novel
+            self.rates[key] = new_novel / len(similarities)
+            self.scored[key] = len(rows)
+            if self.rates[key] < self.min_novelty:
+                self.saturated.add(key)
+
+    def allocate(self, active, calls):
+        """Split calls across measured active slices in proportion to their novelty rates."""
+        weights = {key: self.rates[key] for key in active}
+        total = sum(weights.values())
+        if calls <= 0 or total <= 0:
+            return {}
+        shares = {key: calls * weight / total for key, weight in weights.items()}
+        counts = {key: int(share) for key, share in shares.items()}
+        # Largest remainder for the calls lost to rounding down
+        by_remainder = sorted(shares, key=lambda key: counts[key] - shares[key])
+        for key in by_remainder[: calls - sum(counts.values())]:
+            counts[key] += 1
+        return counts
+
+    def next_round(self):
+        """Score the last round and return the next one as [(slice key, payload)], or []."""
+        self.score()
+
+        remaining = self.max_calls - self.total_calls
+        if self.diversity_target is not None:
+            if self.total_novel >= self.diversity_target:
+                self.stop_reason = f"reached {self.diversity_target} novel questions"
+                return []
+            missing = self.diversity_target - self.total_novel
+            remaining = min(remaining, math.ceil(missing / self.questions_per_call))
+        if remaining <= 0:
+            self.stop_reason = f"spent the budget of {self.max_calls} calls"
+            return []
+
+        active = [
+            key
+            for key in self.sources
+            if key not in self.saturated and key not in self.exhausted
+        ]
+        if not active:
+            self.stop_reason = "every slice is saturated or out of calls"
+            return []
+
+        # New slices warm up first; the rest of the round follows the novelty rates
+        counts = {}
+        for key in active:
+            if self.rates[key] is None and remaining > 0:
+                counts[key] = min(self.warmup, remaining)
+                remaining -= counts[key]
+        round_left = min(remaining, max(self.round_calls - sum(counts.values()), 0))
+        measured = [key for key in active if self.rates[key] is not None]
+        for key, count in self.allocate(measured, round_left).items():
+            if count:
+                counts[key] = counts.get(key, 0) + count
+
+        # Interleave the slices so every slice's calls are spread over the round
+        calls = []
+        while counts:
+            for key in list(counts):
+                payload = next(self.sources[key], None)
+                if payload is None:
+                    self.exhausted.add(key)
+                    del counts[key]
+                    continue
+                calls.append((key, payload))
+                self.calls[key] += 1
+                counts[key] -= 1
+                if not counts[key]:
+                    del counts[key]
+
+        if not calls:
+            self.stop_reason = "every slice is saturated or out of calls"
+            return []
+        self.rounds += 1
+        print(
+            f"🎯 Round {self.rounds}: {len(calls)} calls over "
+            f"{len({key for key, _ in calls})} slices "
+            f"({self.total_novel} novel questions so far, {len(self.saturated)} slices saturated)"
+        )
+        return calls
+
+    def print_report(self, label=str):
+        """Per-slice calls, questions, novel questions and last novelty rate; label names a key."""
+        target = (
+            f" of {self.diversity_target}" if self.diversity_target is not None else ""
+        )
+        print(
+            f"🎯 Adaptive budget: {self.total_novel}{target} novel questions from "
+            f"{self.total_calls}/{self.max_calls} calls in {self.rounds} rounds "
+            f"({self.stop_reason or 'stopped early'})"
+        )
+        for key in sorted(self.sources, key=lambda key: -self.calls[key]):
+            rate = self.rates[key]
+            status = (
+                "saturated"
+                if key in self.saturated
+                else "exhausted"
+                if key in self.exhausted
+                else "open"
+            )
+            print(
+                f"   {self.calls[key]:>5} calls  {len(self.texts[key]):>5} questions  "
+                f"{self.novel[key]:>5} novel  "
+                f"{'-' if rate is None else f'{rate:.0%}':>4}  {status:<9}  {label(key)}"
+            )
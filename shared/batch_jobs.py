@@ -0,0 +1,255 @@
+"""
+Provider-neutral request manifests and result files, so generation can run through bulk batch
+endpoints instead of one interactive call at a time.
+
+A generator renders every filled prompt into a JSONL manifest (render step) without touching a
+model. Any batch runner then turns the manifest into a result file, and the generator joins the
+results back onto the manifest's combination/category metadata (ingest step).
+
+Manifest: a header line {"manifest": 1, "generator", "model", "schemas": {name: JSON schema}}
+followed by one line per call: {"custom_id", "index", "schema", "prompt", "metadata"}.
+custom_id is "<index>-<sha256 of model, schema and prompt>", so a result produced from a stale
+or edited prompt never joins onto the current manifest.
+
+Results: one line per call, {"custom_id", "output": {...}} (output may also be the JSON text the
+provider returned) or {"custom_id", "error": "..."}.
+
+Input data sources: Manifest and result JSONL files
+Output destinations: Manifest and result JSONL files
+Dependencies: Standard library; pydantic and langchain_core (run_local only)
+Key exports: write_manifest(), read_manifest(), ResultJoin, run_local(), model_from_schema()
+Side effects: Writes the manifest/result files; run_local calls the (fake) chat model
+
+Usage: python -m shared.batch_jobs run-local MANIFEST RESULTS [--workers N] [--latency S] [--error-rate P] [--seed N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+MANIFEST_VERSION = 1
+
+
+def request_digest(model, schema, prompt):
+    """sha256 over everything that determines a call's output."""
+    payload = json.dumps(
+        {"model": model, "schema": schema, "prompt": prompt},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def write_manifest(path, generator, model, schemas, requests):
+    """Write a request manifest. Returns the number of requests.
+
+    schemas maps a schema name to its pydantic class; requests yields
+    (index, schema name, prompt, metadata) tuples with JSON-serializable metadata.
+    """
+    schema_json = {name: schema.model_json_schema() for name, schema in schemas.items()}
+    header = {
+        "manifest": MANIFEST_VERSION,
+        "generator": generator,
+        "model": model,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "schemas": schema_json,
+    }
+
+    count = 0
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for index, schema_name, prompt, metadata in requests:
+            digest = request_digest(model, schema_json[schema_name], prompt)
+            request = {
+                "custom_id": f"{index}-{digest[:16]}",
+                "index": index,
+                "schema": schema_name,
+                "prompt": prompt,
+                "metadata": metadata,
+            }
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(temp_path, path)
+    return count
+
+
+def read_manifest(path):
+    """Return (header, iterator of request dicts)."""
+    f = open(path, "r", encoding="utf-8")
+    header = json.loads(f.readline())
+    if header.get("manifest") != MANIFEST_VERSION:
+        f.close()
+        raise ValueError(f"{path} is not a version {MANIFEST_VERSION} request manifest")
+
+    def requests():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, requests()
+
+
+def read_results(path):
+    """Map custom_id -> result record; a later line for the same id wins (e.g. a retried call)."""
+    results = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                results[record["custom_id"]] = record
+    return results
+
+
+class ResultJoin:
+    """Iterates (request, output dict) for every manifest request with a usable result.
+
+    Requests without a result, with an error result, or whose output the caller rejects
+    (record_failure) are counted and listed by print_report().
+    """
+
+    def __init__(self, manifest_path, results_path, generator):
+        self.header, self.requests = read_manifest(manifest_path)
+        if self.header["generator"] != generator:
+            raise ValueError(
+                f"{manifest_path} was rendered by {self.header['generator']}, not {generator}"
+            )
+        self.results = read_results(results_path)
+        self.joined = 0
+        self.missing = []
+        self.failed = []
+        self.matched = set()
+
+    def __iter__(self):
+        for request in self.requests:
+            record = self.results.get(request["custom_id"])
+            if record is None:
+                self.missing.append(request["index"])
+                continue
+            self.matched.add(request["custom_id"])
+            output = record.get("output")
+            if record.get("error") or output is None:
+                self.failed.append((request["index"], record.get("error") or "no output"))
+                continue
+            if isinstance(output, str):
+                try:
+                    output = json.loads(output)
+                except json.JSONDecodeError as e:
+                    self.failed.append((request["index"], str(e)))
+                    continue
+            self.joined += 1
+            yield request, output
+
+    def record_failure(self, request, error):
+        """Count a yielded output the caller could not use as failed instead of joined."""
+        self.joined -= 1
+        self.failed.append((request["index"], str(error)))
+
+    @property
+    def unmatched(self):
+        """Results whose custom_id is not in the manifest (stale prompts or another manifest)."""
+        return len(set(self.results) - self.matched)
+
+    def print_report(self):
+        print(f"🔗 Joined {self.joined} results onto the manifest")
+        if self.missing:
+            preview = ", ".join(str(index) for index in self.missing[:10])
+            print(f"⚠️ {len(self.missing)} calls have no result (e.g. {preview})")
+        for index, error in self.failed[:10]:
+            print(f"❌ Call {index} failed: {error}")
+        if len(self.failed) > 10:
+            print(f"❌ ... and {len(self.failed) - 10} more failed calls")
+        if self.unmatched:
+            print(f"⚠️ {self.unmatched} results match no request in this manifest (ignored)")
+
+
+JSON_TYPES = {"string": str, "integer": int, "number": float, "boolean": bool}
+
+
+def model_from_schema(name, schema):
+    """Rebuild a flat pydantic model (scalar and list-of-scalar fields) from its JSON schema."""
+    from typing import List
+
+    from pydantic import create_model
+
+    fields = {}
+    for field, spec in schema.get("properties", {}).items():
+        if spec.get("type") == "array":
+            field_type = List[JSON_TYPES[spec.get("items", {}).get("type", "string")]]
+        else:
+            field_type = JSON_TYPES[spec.get("type", "string")]
+        fields[field] = (field_type, ...)
+    return create_model(name, **fields)
+
+
+def run_local(manifest_path, results_path, chat_model=None, workers=8):
+    """Local stand-in for a batch endpoint: answer every manifest request into a result file.
+
+    Uses the deterministic FakeChatModel unless another chat model is given. Failed calls are
+    written as error results, like a provider's batch output. Returns (succeeded, failed).
+    """
+    from shared.concurrency import run_batch
+
+    if chat_model is None:
+        from shared.fake_llm import FakeChatModel
+
+        chat_model = FakeChatModel()
+
+    header, requests = read_manifest(manifest_path)
+    structured = {
+        name: chat_model.with_structured_output(model_from_schema(name, schema))
+        for name, schema in header["schemas"].items()
+    }
+    requests = list(requests)
+
+    def answer(request, config=None):
+        return structured[request["schema"]].invoke(request["prompt"], config=config)
+
+    responses = run_batch(
+        answer,
+        requests,
+        config={"max_concurrency": workers},
+        return_exceptions=True,
+    )
+
+    failed = 0
+    temp_path = f"{results_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for request, response in zip(requests, responses):
+            record = {"custom_id": request["custom_id"]}
+            if isinstance(response, Exception):
+                record["error"] = f"{type(response).__name__}: {response}"
+                failed += 1
+            else:
+                record["output"] = response.model_dump()
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(temp_path, results_path)
+    return len(requests) - failed, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch request manifest tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    local = commands.add_parser(
+        "run-local", help="Answer a manifest with the offline fake chat model"
+    )
+    local.add_argument("manifest")
+    local.add_argument("results")
+    local.add_argument("--workers", type=int, default=8)
+    local.add_argument("--latency", type=float, default=0.0)
+    local.add_argument("--error-rate", type=float, default=0.0)
+    local.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from shared.fake_llm import FakeChatModel
+
+    succeeded, failed = run_local(
+        args.manifest,
+        args.results,
+        FakeChatModel(latency=args.latency, error_rate=args.error_rate, seed=args.seed),
+        workers=args.workers,
+    )
+    print(f"✅ {succeeded} results written to {args.results} ({failed} failed)")
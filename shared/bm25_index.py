@@ -0,0 +1,234 @@
+"""
+On-disk BM25 inverted index over the cleaned forum threads, for retrieval-grounded few-shot examples.
+
+Building tokenizes every thread (title + body) once and stores CSR postings: per term, the
+ascending doc ids and each posting's precomputed BM25 impact
+idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)), so a query is only a gather of its
+terms' postings plus one weighted bincount and an argpartition, a few milliseconds at 100k+
+threads. Long queries keep only their max_terms rarest terms.
+
+File layout (one file, so it works as a pipeline output): 8-byte magic, 8-byte header length,
+a JSON header (parameters, vocabulary, array table) and 64-byte aligned little-endian arrays,
+opened with np.memmap so only the touched postings and documents are paged in.
+
+Input data sources: threads_cleaned.json (or the .jsonl stream layout)
+Output destinations: threads.bm25
+Dependencies: numpy
+Key exports: BM25Index, build_index(), tokenize()
+Side effects: Writes the index file (build only)
+
+Usage: python shared/bm25_index.py build [THREADS] [INDEX] [--k1 1.2] [--b 0.75]
+       python shared/bm25_index.py search INDEX "query text" [--k 3]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+
+MAGIC = b"BM25IDX1"
+ALIGNMENT = 64
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset(
+    """a about above after again against all am an and any are as at be because been before
+    being below between both but by can could did do does doing down during each few for from
+    further had has have having he her here hers herself him himself his how i if in into is it
+    its itself just me more most my myself no nor not now of off on once only or other our ours
+    ourselves out over own same she should so some such than that the their theirs them
+    themselves then there these they this those through to too under until up very was we were
+    what when where which while who whom why will with would you your yours yourself
+    yourselves i'm we're i've we've it's don't""".split()
+)
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords."""
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def read_threads(path):
+    """Yield thread dicts from a cleaned store (.json with a "threads" array, or .jsonl)."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)["threads"]
+
+
+def build_index(threads, path, k1=1.2, b=0.75):
+    """Index an iterable of thread dicts into a BM25 file at path. Returns the document count."""
+    vocabulary = {}
+    term_ids = array("i")
+    doc_ids = array("i")
+    frequencies = array("i")
+    lengths = array("i")
+    documents = bytearray()
+    document_offsets = array("q", [0])
+
+    for doc_id, thread in enumerate(threads):
+        counts = Counter(
+            tokenize(f"{thread.get('thread_title', '')} {thread.get('thread_body', '')}")
+        )
+        for term, count in counts.items():
+            term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+            doc_ids.append(doc_id)
+            frequencies.append(count)
+        lengths.append(sum(counts.values()))
+        documents += json.dumps(thread, ensure_ascii=False).encode("utf-8")
+        document_offsets.append(len(documents))
+
+    document_count = len(lengths)
+    term_ids = np.frombuffer(term_ids, dtype=np.int32)
+    doc_ids = np.frombuffer(doc_ids, dtype=np.int32)
+    frequencies = np.frombuffer(frequencies, dtype=np.int32).astype(np.float32)
+    lengths = np.frombuffer(lengths, dtype=np.int32).astype(np.float32)
+
+    # Group postings by term; the stable sort keeps each term's doc ids ascending
+    order = np.argsort(term_ids, kind="stable")
+    document_frequency = np.bincount(term_ids, minlength=len(vocabulary))
+    idf = np.log1p(
+        (document_count - document_frequency + 0.5) / (document_frequency + 0.5)
+    ).astype(np.float32)
+    average_length = float(lengths.mean()) if document_count else 0.0
+    norms = k1 * (1 - b + b * lengths / max(average_length, 1e-9))
+    impacts = (
+        idf[term_ids] * frequencies * (k1 + 1) / (frequencies + norms[doc_ids])
+    ).astype(np.float32)
+
+    arrays = {
+        "posting_offsets": np.concatenate(([0], np.cumsum(document_frequency))).astype(
+            np.int64
+        ),
+        "posting_docs": doc_ids[order],
+        "posting_impacts": impacts[order],
+        "idf": idf,
+        "document_offsets": np.frombuffer(document_offsets, dtype=np.int64),
+        "documents": np.frombuffer(bytes(documents), dtype=np.uint8),
+    }
+    header = {
+        "k1": k1,
+        "b": b,
+        "documents": document_count,
+        "average_length": average_length,
+        "vocabulary": list(vocabulary),
+        "arrays": {},
+    }
+
+    # Array offsets depend on the header length, which depends on the offsets: iterate
+    header_length = 0
+    while True:
+        position = len(MAGIC) + 8 + header_length
+        for name, values in arrays.items():
+            position = -(-position // ALIGNMENT) * ALIGNMENT
+            header["arrays"][name] = [values.dtype.str, position, int(values.size)]
+            position += values.nbytes
+        encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if len(encoded) == header_length:
+            break
+        header_length = len(encoded)
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(header_length.to_bytes(8, "little"))
+        f.write(encoded)
+        for name, values in arrays.items():
+            f.write(b"\0" * (header["arrays"][name][1] - f.tell()))
+            f.write(np.ascontiguousarray(values).tobytes())
+    os.replace(temp_path, path)
+    return document_count
+
+
+class BM25Index:
+    """Read-only, memory-mapped BM25 index written by build_index()."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a BM25 index")
+            header_length = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_length))
+
+        self.path = path
+        self.k1 = header["k1"]
+        self.b = header["b"]
+        self.document_count = header["documents"]
+        self.terms = {term: i for i, term in enumerate(header["vocabulary"])}
+        for name, (dtype, offset, size) in header["arrays"].items():
+            values = (
+                np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(size,))
+                if size
+                else np.zeros(0, dtype=dtype)
+            )
+            setattr(self, name, values)
+
+    def __len__(self):
+        return self.document_count
+
+    def document(self, doc_id):
+        start, end = self.document_offsets[doc_id], self.document_offsets[doc_id + 1]
+        return json.loads(self.documents[start:end].tobytes())
+
+    def scores(self, query, max_terms=32):
+        """BM25 score of every document for a query (float array of length len(self))."""
+        term_ids = sorted({self.terms[t] for t in tokenize(query) if t in self.terms})
+        if len(term_ids) > max_terms:
+            term_ids.sort(key=lambda term_id: -self.idf[term_id])
+            term_ids = term_ids[:max_terms]
+        if not term_ids:
+            return np.zeros(self.document_count, dtype=np.float64)
+
+        slices = [
+            slice(self.posting_offsets[t], self.posting_offsets[t + 1]) for t in term_ids
+        ]
+        docs = np.concatenate([self.posting_docs[s] for s in slices])
+        impacts = np.concatenate([self.posting_impacts[s] for s in slices])
+        return np.bincount(docs, weights=impacts, minlength=self.document_count)
+
+    def search(self, query, k=3, max_terms=32):
+        """Top-k (score, thread dict) pairs for a query, best first; only positive scores."""
+        scores = self.scores(query, max_terms)
+        k = min(k, self.document_count)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[d]), self.document(int(d))) for d in top if scores[d] > 0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BM25 index over the cleaned forum threads")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Index a cleaned threads store")
+    build.add_argument("threads", nargs="?", default="threads_cleaned.json")
+    build.add_argument("index", nargs="?", default="threads.bm25")
+    build.add_argument("--k1", type=float, default=1.2)
+    build.add_argument("--b", type=float, default=0.75)
+    search = commands.add_parser("search", help="Print the best-matching threads")
+    search.add_argument("index")
+    search.add_argument("query")
+    search.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        count = build_index(read_threads(args.threads), args.index, args.k1, args.b)
+        print(
+            f"✅ Indexed {count} threads into {args.index} "
+            f"({os.path.getsize(args.index) / 1e6:.1f} MB, {time.perf_counter() - started:.1f}s)"
+        )
+    else:
+        index = BM25Index(args.index)
+        started = time.perf_counter()
+        results = index.search(args.query, args.k)
+        elapsed = (time.perf_counter() - started) * 1000
+        for score, thread in results:
+            print(f"{score:7.2f}  {thread.get('thread_title', '')}")
+        print(f"({len(results)} results in {elapsed:.2f} ms)")
@@ -0,0 +1,185 @@
+"""
+Plans which dimension combinations to generate: the full Cartesian product (streamed lazily)
+or a greedy t-wise covering array that covers every t-way value interaction in far fewer rows.
+
+Input data sources: None
+Output destinations: None
+Dependencies: itertools, random (standard library)
+Key exports: CombinationPlan, plan_combinations(), covering_array(), coverage_report()
+Side effects: None
+"""
+
+import itertools
+import math
+import random
+
+
+class CombinationPlan:
+    """Re-iterable, sized sequence of combinations (one value per dimension list).
+
+    rows=None streams the full product lazily; otherwise rows holds value indices.
+    """
+
+    def __init__(self, dimension_lists, rows=None):
+        self.dimension_lists = dimension_lists
+        self.rows = rows
+
+    def __len__(self):
+        if self.rows is None:
+            return math.prod(len(values) for values in self.dimension_lists)
+        return len(self.rows)
+
+    def __iter__(self):
+        if self.rows is None:
+            return itertools.product(*self.dimension_lists)
+        return (
+            tuple(self.dimension_lists[p][v] for p, v in enumerate(row))
+            for row in self.rows
+        )
+
+    def index_rows(self):
+        """Iterate the plan as tuples of value indices."""
+        if self.rows is None:
+            return itertools.product(*(range(len(v)) for v in self.dimension_lists))
+        return iter(self.rows)
+
+
+def tuple_weight(weights, parameters, values):
+    if weights is None:
+        return 1.0
+    return math.prod(weights[p][v] for p, v in zip(parameters, values))
+
+
+def covering_array(
+    sizes, strength=2, weights=None, max_rows=None, candidates=20, seed=0
+):
+    """Greedily build rows (tuples of value indices) covering every t-way value combination.
+
+    sizes[p] is the number of values of parameter p; weights[p][v] optionally scales how
+    much covering value v is worth, so heavier interactions are covered first (which
+    matters when max_rows cuts the array short). Each row starts from the heaviest
+    uncovered t-tuple, then fills the remaining parameters one at a time with the value
+    covering the most uncovered weight; the best of `candidates` randomized fills wins.
+    """
+    strength = min(strength, len(sizes))
+    rng = random.Random(seed)
+
+    uncovered = {}
+    for parameters in itertools.combinations(range(len(sizes)), strength):
+        uncovered[parameters] = set(
+            itertools.product(*(range(sizes[p]) for p in parameters))
+        )
+
+    parameter_sets_with = {
+        p: [parameters for parameters in uncovered if p in parameters]
+        for p in range(len(sizes))
+    }
+
+    def gain(row, parameter_sets):
+        """Uncovered weight of the given parameter sets that the (partial) row completes."""
+        total = 0.0
+        for parameters in parameter_sets:
+            if any(row[p] is None for p in parameters):
+                continue
+            values = tuple(row[p] for p in parameters)
+            if values in uncovered[parameters]:
+                total += tuple_weight(weights, parameters, values)
+        return total
+
+    rows = []
+    while any(uncovered.values()) and (max_rows is None or len(rows) < max_rows):
+        seed_parameters, seed_values = max(
+            (
+                (parameters, values)
+                for parameters, remaining in uncovered.items()
+                for values in remaining
+            ),
+            key=lambda pair: (tuple_weight(weights, *pair), [-v for v in pair[1]]),
+        )
+
+        best_row, best_gain = None, -1.0
+        for _ in range(candidates):
+            row = [None] * len(sizes)
+            for p, v in zip(seed_parameters, seed_values):
+                row[p] = v
+
+            free = [p for p in range(len(sizes)) if row[p] is None]
+            rng.shuffle(free)
+            for p in free:
+                options = list(range(sizes[p]))
+                rng.shuffle(options)
+                best_value, best_value_gain = options[0], -1.0
+                for v in options:
+                    row[p] = v
+                    value_gain = gain(row, parameter_sets_with[p])
+                    if value_gain > best_value_gain:
+                        best_value, best_value_gain = v, value_gain
+                row[p] = best_value
+
+            row_gain = gain(row, uncovered)
+            if row_gain > best_gain:
+                best_row, best_gain = tuple(row), row_gain
+
+        rows.append(best_row)
+        for parameters, remaining in uncovered.items():
+            remaining.discard(tuple(best_row[p] for p in parameters))
+
+    return rows
+
+
+def coverage_report(plan, strength=2, weights=None):
+    """Fraction of t-way value combinations (plain and weighted) covered by a plan."""
+    sizes = [len(values) for values in plan.dimension_lists]
+    strength = min(strength, len(sizes))
+    full_size = math.prod(sizes)
+
+    total = 0
+    total_weight = 0.0
+    covered = 0
+    covered_weight = 0.0
+
+    if plan.rows is None:
+        seen = None
+    else:
+        seen = {
+            parameters: {tuple(row[p] for p in parameters) for row in plan.rows}
+            for parameters in itertools.combinations(range(len(sizes)), strength)
+        }
+
+    for parameters in itertools.combinations(range(len(sizes)), strength):
+        for values in itertools.product(*(range(sizes[p]) for p in parameters)):
+            weight = tuple_weight(weights, parameters, values)
+            total += 1
+            total_weight += weight
+            if seen is None or values in seen[parameters]:
+                covered += 1
+                covered_weight += weight
+
+    return {
+        "strength": strength,
+        "rows": len(plan),
+        "full_product_rows": full_size,
+        "tuples_total": total,
+        "tuples_covered": covered,
+        "coverage": covered / total if total else 1.0,
+        "weighted_coverage": covered_weight / total_weight if total_weight else 1.0,
+    }
+
+
+def plan_combinations(
+    dimension_lists, strategy="full", strength=2, weights=None, max_rows=None
+):
+    """Return a CombinationPlan: "full" streams the product, "covering" builds a t-wise covering array."""
+    if strategy == "full":
+        return CombinationPlan(dimension_lists)
+
+    if strategy != "covering":
+        raise ValueError(f"Unknown combination strategy: {strategy}")
+
+    rows = covering_array(
+        [len(values) for values in dimension_lists],
+        strength=strength,
+        weights=weights,
+        max_rows=max_rows,
+    )
+    return CombinationPlan(dimension_lists, rows)
@@ -0,0 +1,202 @@
+"""
+Normalized, compact storage for generated questions: each dimension/category object is stored
+once in a reference table and questions point to it by id. Readers rehydrate the full
+QuestionResults schema on demand.
+
+Formats (chosen by extension):
+- .jsonl: streamable. A {"ref": id, "value": {...}} line appears before the first question
+  that uses it; question lines are {"index": n, "question": "...", "<field>": id, ...}.
+- .parquet: columns index, question and one int32 id column per reference field; the
+  reference table is stored as JSON in the schema metadata (requires pyarrow).
+
+Input data sources: Question dicts (e.g. QuestionJournal.iter_questions()), compact files
+Output destinations: <output>.jsonl / <output>.parquet, or rehydrated QuestionResults JSON
+Dependencies: pyarrow (Parquet only)
+Key exports: write_compact(), read_compact(), iter_compact(), COMPACT_FORMATS
+Side effects: Writes the output file
+
+Usage: python -m shared.compact_output <input.json|.jsonl|.parquet> <output.json|.jsonl|.parquet>
+"""
+
+import argparse
+import json
+import os
+
+COMPACT_FORMATS = ("jsonl", "parquet")
+
+
+def reference_fields_of(question):
+    """Fields holding nested objects (DimensionInfo / CategoryInfo) are normalized."""
+    return [field for field, value in question.items() if isinstance(value, dict)]
+
+
+class ReferenceTable:
+    """Assigns one integer id per distinct object, compared by canonical JSON."""
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def add(self, value):
+        """Return (id, is_new)."""
+        key = json.dumps(value, sort_keys=True, ensure_ascii=False)
+        if key in self.ids:
+            return self.ids[key], False
+        self.ids[key] = len(self.values)
+        self.values.append(value)
+        return self.ids[key], True
+
+
+def write_compact(path, indexed_questions, reference_fields=None):
+    """Write (index, question dict) pairs in the format given by the path's extension. Returns the count."""
+    extension = os.path.splitext(path)[1].lstrip(".")
+    if extension not in COMPACT_FORMATS:
+        raise ValueError(f"Unsupported compact format: {path}")
+
+    writer = write_jsonl if extension == "jsonl" else write_parquet
+    temp_path = f"{path}.tmp"
+    count = writer(temp_path, indexed_questions, reference_fields)
+    os.replace(temp_path, path)
+    return count
+
+
+def write_jsonl(path, indexed_questions, reference_fields):
+    table = ReferenceTable()
+    count = 0
+
+    with open(path, "w", encoding="utf-8") as f:
+        for index, question in indexed_questions:
+            fields = reference_fields or reference_fields_of(question)
+            row = {"index": index}
+            for field, value in question.items():
+                if field not in fields:
+                    row[field] = value
+                    continue
+
+                reference_id, is_new = table.add(value)
+                if is_new:
+                    line = json.dumps(
+                        {"ref": reference_id, "value": value}, ensure_ascii=False
+                    )
+                    f.write(line + "\n")
+                row[field] = reference_id
+
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+
+    return count
+
+
+def write_parquet(path, indexed_questions, reference_fields):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = ReferenceTable()
+    columns = {"index": []}
+
+    for index, question in indexed_questions:
+        fields = reference_fields or reference_fields_of(question)
+        columns["index"].append(index)
+        for field, value in question.items():
+            if field in fields:
+                value = table.add(value)[0]
+            columns.setdefault(field, []).append(value)
+
+    fields = reference_fields or [
+        field for field in columns if field not in ("index", "question")
+    ]
+    arrays = {
+        name: (
+            pa.array(values, type=pa.int32())
+            if name == "index" or name in fields
+            else pa.array(values)
+        )
+        for name, values in columns.items()
+    }
+    metadata = {
+        "references": json.dumps(table.values, ensure_ascii=False),
+        "reference_fields": json.dumps(fields),
+    }
+    pq.write_table(
+        pa.table(arrays).replace_schema_metadata(metadata),
+        path,
+        compression="zstd",
+    )
+    return len(columns["index"])
+
+
+def iter_compact(path, rehydrate=True):
+    """Yield question dicts from a compact file in file order.
+
+    With rehydrate=True reference ids are replaced by the full objects (the
+    original GeneratedQuestion layout); otherwise ids are left in place.
+    """
+    if path.endswith(".jsonl"):
+        references = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if "ref" in record:
+                    references[record["ref"]] = record["value"]
+                    continue
+
+                record.pop("index", None)
+                if rehydrate:
+                    for field, value in record.items():
+                        if field != "question" and isinstance(value, int):
+                            record[field] = references[value]
+                yield record
+        return
+
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.schema_arrow.metadata
+    references = json.loads(metadata[b"references"])
+    fields = json.loads(metadata[b"reference_fields"])
+
+    for batch in parquet_file.iter_batches():
+        for row in batch.to_pylist():
+            row.pop("index")
+            if rehydrate:
+                for field in fields:
+                    row[field] = references[row[field]]
+            yield row
+
+
+def read_compact(path):
+    """Load a compact file back into the QuestionResults dict ({"questions", "total_generated"})."""
+    questions = list(iter_compact(path))
+    return {"questions": questions, "total_generated": len(questions)}
+
+
+def iter_any(path):
+    """(index, question dict) pairs from a QuestionResults JSON or a compact file."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            questions = json.load(f)["questions"]
+    else:
+        questions = iter_compact(path)
+    return enumerate(questions, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert generated questions between JSON and the compact formats"
+    )
+    parser.add_argument("input")
+    parser.add_argument("output")
+    args = parser.parse_args()
+
+    if args.output.endswith(".json"):
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(read_compact(args.input), f, indent=2, ensure_ascii=False)
+    else:
+        write_compact(args.output, iter_any(args.input))
+
+    before = os.path.getsize(args.input)
+    after = os.path.getsize(args.output)
+    print(
+        f"✅ {args.input} ({before / 1024:.1f} KiB) -> {args.output} "
+        f"({after / 1024:.1f} KiB, {before / max(after, 1):.1f}x)"
+    )
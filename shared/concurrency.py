@@ -0,0 +1,158 @@
+"""
+Async helpers for running many LLM calls concurrently: token-bucket rate limiting and bounded, order-preserving fan-out.
+
+Input data sources: None
+Output destinations: None
+Dependencies: asyncio (standard library)
+Key exports: TokenBucket, RateLimiter, estimate_tokens(), prompt_text(), gather_in_order(), run_batch()
+Side effects: None
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def estimate_tokens(text, completion_tokens=0):
+    """Roughly estimate the tokens a call will consume (~4 characters per token)."""
+    return max(1, len(text) // 4) + completion_tokens
+
+
+def prompt_text(prompt):
+    """Accept a plain string or a list of messages, like the real chat models."""
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(str(getattr(message, "content", message)) for message in prompt)
+
+
+class TokenBucket:
+    """Bucket that refills continuously at rate_per_minute, up to capacity tokens."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+        self.updated_at = now
+
+    def delay(self, amount=1):
+        """Seconds until `amount` tokens are available (0.0 if they are now), without taking them."""
+        self.refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate_per_second)
+
+    def take(self, amount=1):
+        """Take `amount` tokens immediately; call after delay() returned 0.0."""
+        self.refill()
+        self.tokens -= min(amount, self.capacity)
+
+    async def acquire(self, amount=1):
+        """Wait until `amount` tokens are available and take them. Returns seconds waited."""
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        waited = 0.0
+
+        # Holding the lock while sleeping keeps waiters in FIFO order
+        async with self.lock:
+            while True:
+                self.refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+
+                delay = (amount - self.tokens) / self.rate_per_second
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class RateLimiter:
+    """Combined requests-per-minute and tokens-per-minute limiter. Either limit may be None."""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        self.request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+
+    def buckets(self, tokens):
+        return [
+            (bucket, amount)
+            for bucket, amount in (
+                (self.request_bucket, 1),
+                (self.token_bucket, tokens),
+            )
+            if bucket is not None
+        ]
+
+    def try_acquire(self, tokens=1):
+        """Take a request slot and `tokens` tokens only if both are available now.
+
+        Returns 0.0 on success, otherwise the seconds until they would be (nothing taken).
+        Not coroutine-safe against acquire(); callers serialize with their own lock.
+        """
+        needed = self.buckets(tokens)
+        delay = max((bucket.delay(amount) for bucket, amount in needed), default=0.0)
+        if delay > 0:
+            return delay
+
+        for bucket, amount in needed:
+            bucket.take(amount)
+        return 0.0
+
+    async def acquire(self, tokens=1):
+        """Wait for one request slot and `tokens` tokens. Returns seconds waited."""
+        waited = 0.0
+        if self.request_bucket is not None:
+            waited += await self.request_bucket.acquire(1)
+        if self.token_bucket is not None:
+            waited += await self.token_bucket.acquire(tokens)
+        return waited
+
+
+async def gather_in_order(indexed_items, worker, concurrency):
+    """Run `await worker(index, item)` for every (index, item) pair with at most `concurrency` in flight.
+
+    `indexed_items` may be a lazy iterator: `concurrency` workers pull from it one pair
+    at a time, so large plans are never materialized. Results are returned in the
+    same order as the items, regardless of completion order.
+    """
+    iterator = enumerate(indexed_items)
+    results = {}
+
+    async def drain():
+        for position, (index, item) in iterator:
+            results[position] = await worker(index, item)
+
+    await asyncio.gather(*(drain() for _ in range(max(1, concurrency))))
+    return [results[position] for position in range(len(results))]
+
+
+def run_batch(invoke, prompts, config=None, return_exceptions=False):
+    """Runnable.batch() semantics for a plain invoke(prompt, config=...) callable.
+
+    config may be one dict or one per prompt; its max_concurrency (default 1) sizes the
+    thread pool. With return_exceptions=True failures are returned in place.
+    """
+    configs = config if isinstance(config, list) else [config] * len(prompts)
+    workers = max(
+        ((item or {}).get("max_concurrency") or 1) for item in configs or [{}]
+    )
+
+    def call(prompt, item_config):
+        try:
+            return invoke(prompt, config=item_config)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(call, prompts, configs))
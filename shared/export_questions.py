@@ -0,0 +1,243 @@
+"""
+Streams generated questions into CSV or Parquet, detecting the schema from the first record.
+
+Replaces the two per-folder convert_json_to_csv.py scripts. QuestionResults JSON is read with an
+incremental parser (one question in memory at a time), JSONL/Parquet through
+shared.compact_output, and rows go straight to a csv writer or a Parquet row-group writer, so
+memory stays constant regardless of the number of questions.
+
+Schemas:
+- dimension (discussion-questions.py): Question, Intent/Specificity/Domain/Persona_Dimension
+- category (prompt-classify-questions.py): question, category, instruction, examples (" | "-joined)
+
+Input data sources: QuestionResults .json, compact or plain .jsonl, compact .parquet
+Output destinations: .csv or .parquet (default: the input path with .csv)
+Dependencies: pyarrow (Parquet only)
+Key exports: export_questions(), iter_questions(), detect_schema(), SCHEMAS
+Side effects: Writes the output file
+
+Usage: python shared/export_questions.py INPUT [OUTPUT] [--row-group-size N]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+# Allow running as a script from any stage directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from shared.compact_output import iter_compact
+
+
+def dimension_row(question):
+    return [
+        question.get("question", ""),
+        question.get("intent_dimension", {}).get("dimension", ""),
+        question.get("specificity_dimension", {}).get("dimension", ""),
+        question.get("domain_dimension", {}).get("dimension", ""),
+        question.get("persona_dimension", {}).get("dimension", ""),
+    ]
+
+
+def category_row(question):
+    category_info = question.get("category_info", {})
+    return [
+        question.get("question", ""),
+        category_info.get("category", ""),
+        category_info.get("instruction", ""),
+        " | ".join(category_info.get("examples") or []),
+    ]
+
+
+# schema name -> (column names, question dict -> row)
+SCHEMAS = {
+    "dimension": (
+        [
+            "Question",
+            "Intent_Dimension",
+            "Specificity_Dimension",
+            "Domain_Dimension",
+            "Persona_Dimension",
+        ],
+        dimension_row,
+    ),
+    "category": (["question", "category", "instruction", "examples"], category_row),
+}
+
+
+def detect_schema(question):
+    """Return the SCHEMAS key matching a question dict."""
+    if "category_info" in question:
+        return "category"
+    if "intent_dimension" in question:
+        return "dimension"
+    raise ValueError(f"Unrecognized question schema: fields {sorted(question)}")
+
+
+class StreamReader:
+    """Minimal pull parser over a text file: whitespace skipping and one JSON value at a time."""
+
+    def __init__(self, f, chunk_size=1 << 16):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        """Read another chunk, dropping the consumed prefix. Returns False at EOF."""
+        chunk = self.file.read(self.chunk_size)
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return bool(chunk)
+
+    def peek(self):
+        """Next non-whitespace character (not consumed), or "" at EOF."""
+        while True:
+            while self.position < len(self.buffer):
+                if not self.buffer[self.position].isspace():
+                    return self.buffer[self.position]
+                self.position += 1
+            if not self.fill():
+                return ""
+
+    def expect(self, character):
+        found = self.peek()
+        if found != character:
+            raise ValueError(f"Expected {character!r} in JSON input, found {found!r}")
+        self.position += 1
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input until it fits."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.position = end
+            return value
+
+
+def iter_json_questions(path):
+    """Yield the elements of the top-level "questions" array of a QuestionResults JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        reader = StreamReader(f)
+        reader.expect("{")
+        while reader.peek() != "}":
+            key = reader.value()
+            reader.expect(":")
+            if key != "questions":
+                reader.value()
+            else:
+                reader.expect("[")
+                while reader.peek() != "]":
+                    yield reader.value()
+                    if reader.peek() == ",":
+                        reader.expect(",")
+                reader.expect("]")
+            if reader.peek() == ",":
+                reader.expect(",")
+
+
+def iter_questions(path):
+    """Question dicts from any generated-questions file, streamed in file order."""
+    if path.endswith(".json"):
+        return iter_json_questions(path)
+    return iter_compact(path)
+
+
+def write_csv(path, columns, rows):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_parquet(path, columns, rows, row_group_size):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    count = 0
+    batch = []
+
+    def flush(writer):
+        table = pa.Table.from_arrays(
+            [pa.array(values, pa.string()) for values in zip(*batch)], schema=schema
+        )
+        writer.write_table(table)
+        batch.clear()
+
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for row in rows:
+            batch.append(row)
+            count += 1
+            if len(batch) >= row_group_size:
+                flush(writer)
+        if batch:
+            flush(writer)
+    return count
+
+
+def export_questions(input_path, output_path=None, row_group_size=10_000):
+    """Stream input_path into a .csv or .parquet file. Returns (output path, schema, row count)."""
+    if output_path is None:
+        output_path = f"{os.path.splitext(input_path)[0]}.csv"
+    extension = os.path.splitext(output_path)[1].lstrip(".")
+    if extension not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported export format: {output_path}")
+
+    questions = iter_questions(input_path)
+    first = next(questions, None)
+    # An empty input still gets a header-only file in the dimension layout
+    schema = "dimension" if first is None else detect_schema(first)
+    columns, to_row = SCHEMAS[schema]
+
+    def rows():
+        if first is None:
+            return
+        yield to_row(first)
+        for question in questions:
+            yield to_row(question)
+
+    temp_path = f"{output_path}.tmp"
+    if extension == "csv":
+        count = write_csv(temp_path, columns, rows())
+    else:
+        count = write_parquet(temp_path, columns, rows(), row_group_size)
+    os.replace(temp_path, output_path)
+    return output_path, schema, count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export generated questions (JSON/JSONL/Parquet) to CSV or Parquet"
+    )
+    parser.add_argument("input")
+    parser.add_argument(
+        "output", nargs="?", default=None, help="Output .csv or .parquet (default: INPUT.csv)"
+    )
+    parser.add_argument(
+        "--row-group-size",
+        type=int,
+        default=10_000,
+        help="Rows buffered per Parquet row group",
+    )
+    args = parser.parse_args()
+
+    output_path, schema, count = export_questions(
+        args.input, args.output, args.row_group_size
+    )
+    print(f"✅ Exported {count} questions ({schema} schema) to {output_path}")
@@ -0,0 +1,213 @@
+"""
+Local stand-in for the LangChain chat models: deterministic responses with configurable latency
+and error rate, for offline runs, routing tests and benchmarks.
+
+Responses depend only on the prompt (and seed), so reruns and cache keys are reproducible.
+Latency and errors are drawn from a seeded random stream shared by all calls of one instance.
+
+Input data sources: None
+Output destinations: None
+Dependencies: langchain_core (imported when a response message is built), pydantic
+Key exports: FakeChatModel, FakeProviderError
+Side effects: None (sleeps to simulate latency)
+"""
+
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+import typing
+
+from shared.concurrency import estimate_tokens, prompt_text, run_batch
+
+COUNT_RE = re.compile(r"generate (\d+) DISTINCT", re.IGNORECASE)
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z'-]+")
+
+
+class FakeProviderError(Exception):
+    """Simulated provider failure; status_code mimics the HTTP status of a real one."""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeChatModel:
+    """Chat model with invoke/ainvoke/batch/with_structured_output and no network access.
+
+    latency is the median seconds per call (log-normal with sigma latency_sigma);
+    error_rate is the probability that a call raises FakeProviderError(error_status).
+    With capacity set, calls beyond that many in flight are rejected with a 429, like a
+    provider's concurrency quota.
+    """
+
+    def __init__(
+        self,
+        model="fake-chat",
+        latency=0.0,
+        latency_sigma=0.5,
+        error_rate=0.0,
+        error_status=500,
+        capacity=None,
+        seed=0,
+    ):
+        self.model_name = model
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.capacity = capacity
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+
+    def draw(self):
+        """Draw (latency seconds, failed?) for the next call."""
+        with self.lock:
+            self.calls += 1
+            latency = (
+                self.latency * self.random.lognormvariate(0, self.latency_sigma)
+                if self.latency
+                else 0.0
+            )
+            return latency, self.random.random() < self.error_rate
+
+    def enter(self):
+        with self.lock:
+            if self.capacity is not None and self.in_flight >= self.capacity:
+                raise FakeProviderError(
+                    f"{self.model_name}: over capacity ({self.capacity} in flight)",
+                    status_code=429,
+                )
+            self.in_flight += 1
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def simulate(self):
+        """Sleep out one call synchronously, raising its simulated error if any."""
+        latency, failed = self.draw()
+        self.enter()
+        try:
+            time.sleep(latency)
+        finally:
+            self.leave()
+        if failed:
+            self.fail()
+
+    async def asimulate(self):
+        latency, failed = self.draw()
+        self.enter()
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            self.leave()
+        if failed:
+            self.fail()
+
+    def text_for(self, prompt, salt=""):
+        """A deterministic pseudo-question built from the prompt's own words."""
+        digest = hashlib.sha256(f"{self.seed}:{salt}:{prompt}".encode("utf-8"))
+        rng = random.Random(digest.digest())
+        words = WORD_RE.findall(prompt[-2000:]) or ["question"]
+        body = " ".join(rng.choice(words).lower() for _ in range(rng.randint(12, 24)))
+        return f"{body.capitalize()} ({digest.hexdigest()[:8]})?"
+
+    def respond(self, prompt):
+        from langchain_core.messages import AIMessage
+
+        text = self.text_for(prompt)
+        content = (
+            f'```json\n{{"Fake Category": [{{"dimension": "Fake dimension", '
+            f'"description": "{text}", "examples": []}}]}}\n```\n'
+            f"<summary>\n{text}\n</summary>"
+        )
+        return AIMessage(
+            content=content,
+            response_metadata={"model_name": self.model_name},
+            usage_metadata={
+                "input_tokens": estimate_tokens(prompt),
+                "output_tokens": estimate_tokens(content),
+                "total_tokens": estimate_tokens(prompt) + estimate_tokens(content),
+            },
+        )
+
+    def fail(self):
+        raise FakeProviderError(
+            f"{self.model_name}: simulated error {self.error_status}",
+            status_code=self.error_status,
+        )
+
+    def invoke(self, prompt, config=None, **kwargs):
+        self.simulate()
+        return self.respond(prompt_text(prompt))
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        await self.asimulate()
+        return self.respond(prompt_text(prompt))
+
+    def batch(self, prompts, config=None, return_exceptions=False, **kwargs):
+        return run_batch(self.invoke, prompts, config, return_exceptions)
+
+    def with_structured_output(self, schema, include_raw=False, **kwargs):
+        return FakeStructuredModel(self, schema, include_raw)
+
+
+class FakeStructuredModel:
+    """with_structured_output() counterpart: fills str and List[str] fields of the schema.
+
+    With include_raw=True it returns {"raw": AIMessage, "parsed": ..., "parsing_error": None}
+    like the LangChain models, the raw message carrying usage metadata.
+    """
+
+    def __init__(self, chat_model, schema, include_raw=False):
+        self.chat_model = chat_model
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def respond(self, prompt):
+        match = COUNT_RE.search(prompt)
+        count = int(match.group(1)) if match else 3
+
+        values = {}
+        for name, field in self.schema.model_fields.items():
+            if typing.get_origin(field.annotation) in (list, typing.List):
+                values[name] = [
+                    self.chat_model.text_for(prompt, f"{name}:{k}")
+                    for k in range(count)
+                ]
+            else:
+                values[name] = self.chat_model.text_for(prompt, name)
+        parsed = self.schema(**values)
+        if not self.include_raw:
+            return parsed
+
+        from langchain_core.messages import AIMessage
+
+        content = parsed.model_dump_json()
+        raw = AIMessage(
+            content=content,
+            response_metadata={"model_name": self.chat_model.model_name},
+            usage_metadata={
+                "input_tokens": estimate_tokens(prompt),
+                "output_tokens": estimate_tokens(content),
+                "total_tokens": estimate_tokens(prompt) + estimate_tokens(content),
+            },
+        )
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+    def invoke(self, prompt, config=None, **kwargs):
+        self.chat_model.simulate()
+        return self.respond(prompt_text(prompt))
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        await self.chat_model.asimulate()
+        return self.respond(prompt_text(prompt))
+
+    def batch(self, prompts, config=None, return_exceptions=False, **kwargs):
+        return run_batch(self.invoke, prompts, config, return_exceptions)
@@ -0,0 +1,128 @@
+"""
+Append-only JSONL journal for generated questions, so long runs are crash-safe and resumable.
+
+Each line is {"index": <combination/sequence index>, "question": <GeneratedQuestion dict>}.
+Compaction streams the journal into the usual QuestionResults JSON in index order,
+holding only one byte offset per question in memory.
+
+Input data sources: <output>.journal.jsonl
+Output destinations: <output>.journal.jsonl, the final QuestionResults JSON file
+Dependencies: json, os (standard library)
+Key exports: QuestionJournal, journal_path_for()
+Side effects: Creates/appends/truncates the journal file, writes the compacted JSON file
+"""
+
+import json
+import os
+import textwrap
+
+
+def journal_path_for(output_path):
+    """Return the journal path that sits next to a QuestionResults output file."""
+    root, _ = os.path.splitext(output_path)
+    return f"{root}.journal.jsonl"
+
+
+class QuestionJournal:
+    """Append-only record of completed questions, keyed by their 1-based index."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def open(self, resume=False):
+        """Open for appending. Without resume the previous journal is discarded."""
+        if resume and os.path.exists(self.path):
+            self.truncate_torn_tail()
+            self.file = open(self.path, "a", encoding="utf-8")
+        else:
+            self.file = open(self.path, "w", encoding="utf-8")
+        return self
+
+    def truncate_torn_tail(self):
+        """Drop a partially written last line left behind by a crash."""
+        with open(self.path, "rb+") as f:
+            data_end = f.seek(0, os.SEEK_END)
+            if data_end == 0:
+                return
+
+            f.seek(data_end - 1)
+            if f.read(1) == b"\n":
+                return
+
+            # Walk back to the last complete line
+            position = data_end
+            while position > 0:
+                step = min(4096, position)
+                f.seek(position - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    f.truncate(position - step + newline + 1)
+                    return
+                position -= step
+            f.truncate(0)
+
+    def append(self, index, question):
+        """Record one completed question (a dict) and flush it to disk immediately."""
+        line = json.dumps({"index": index, "question": question}, ensure_ascii=False)
+        self.file.write(line + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.file = None
+
+    def iter_entries(self):
+        """Yield (index, question dict, byte offset) for every intact journal line."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            offset = 0
+            for raw_line in f:
+                line_offset = offset
+                offset += len(raw_line)
+                try:
+                    entry = json.loads(raw_line)
+                except json.JSONDecodeError:
+                    continue
+                yield entry["index"], entry["question"], line_offset
+
+    def completed_indices(self):
+        return {index for index, _, _ in self.iter_entries()}
+
+    def iter_questions(self):
+        """Yield (index, question dict) in index order; later entries for an index win."""
+        offsets = {}
+        for index, _, offset in self.iter_entries():
+            offsets[index] = offset
+
+        with open(self.path, "rb") as journal:
+            for index in sorted(offsets):
+                journal.seek(offsets[index])
+                yield index, json.loads(journal.readline())["question"]
+
+    def compact(self, output_path):
+        """Write the journal as a QuestionResults JSON file in index order. Returns the count."""
+        # Later entries for the same index win, e.g. regenerated questions
+        count = 0
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as out:
+            # Same layout as json.dump(results.model_dump(), f, indent=2)
+            out.write('{\n  "questions": [')
+            for _, question in self.iter_questions():
+                record = json.dumps(question, indent=2, ensure_ascii=False)
+                out.write(",\n" if count else "\n")
+                out.write(textwrap.indent(record, "    "))
+                count += 1
+            if count:
+                out.write(f'\n  ],\n  "total_generated": {count}\n}}')
+            else:
+                out.write('],\n  "total_generated": 0\n}')
+
+        os.replace(temp_path, output_path)
+        return count
@@ -0,0 +1,294 @@
+"""
+Persistent, content-addressed cache of LLM responses backed by SQLite.
+
+Entries are keyed by a SHA-256 of the model name, the fully rendered prompt, the
+structured-output schema and a sample index (the n-th time the same prompt is sent
+in a run), so repeated prompts such as cycled categories still get distinct answers.
+
+Input data sources: .cache/llm_responses.sqlite3 (repo root)
+Output destinations: .cache/llm_responses.sqlite3 (repo root)
+Dependencies: sqlite3, hashlib (standard library)
+Key exports: LLMCache, CachedStructuredLLM, print_cache_stats(), DEFAULT_CACHE_PATH
+Side effects: Creates/updates the SQLite cache file
+
+Usage: python -m shared.llm_cache [stats|evict|clear]
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = (
+    Path(__file__).resolve().parent.parent / ".cache" / "llm_responses.sqlite3"
+)
+
+
+class LLMCache:
+    """Disk-backed response cache with age and size based eviction and hit/miss counters."""
+
+    def __init__(
+        self,
+        path=DEFAULT_CACHE_PATH,
+        max_entries=100_000,
+        max_bytes=512 * 1024 * 1024,
+        max_age_days=30,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                value TEXT NOT NULL
+            )"""
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used_at)"
+        )
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(model, prompt, schema=None, variant=0):
+        """Hash model, rendered prompt, output schema and sample index into a cache key."""
+        schema_json = schema.model_json_schema() if schema is not None else None
+        payload = json.dumps(
+            {
+                "model": model,
+                "prompt": prompt,
+                "schema": schema_json,
+                "variant": variant,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, model, prompt, schema=None, variant=0):
+        """Return the cached JSON value, or None on a miss or an expired entry."""
+        key = self.make_key(model, prompt, schema, variant)
+        now = time.time()
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or (
+                self.max_age_seconds and now - row[1] > self.max_age_seconds
+            ):
+                self.misses += 1
+                return None
+
+            self.conn.execute(
+                "UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key)
+            )
+            self.conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def put(self, model, prompt, value, schema=None, variant=0):
+        """Store a JSON-serializable value for this prompt."""
+        key = self.make_key(model, prompt, schema, variant)
+        encoded = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, now, now, len(encoded), encoded),
+            )
+            self.conn.commit()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones beyond the size limits."""
+        with self.lock:
+            if self.max_age_seconds:
+                self.conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?",
+                    (time.time() - self.max_age_seconds,),
+                )
+
+            if self.max_entries:
+                self.conn.execute(
+                    """DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY last_used_at DESC
+                        LIMIT -1 OFFSET ?
+                    )""",
+                    (self.max_entries,),
+                )
+
+            if self.max_bytes:
+                # Keep the most recently used entries whose running size fits the budget
+                self.conn.execute(
+                    """DELETE FROM responses WHERE key IN (
+                        SELECT key FROM (
+                            SELECT key, SUM(size) OVER (
+                                ORDER BY last_used_at DESC, key
+                            ) AS running_size
+                            FROM responses
+                        ) WHERE running_size > ?
+                    )""",
+                    (self.max_bytes,),
+                )
+
+            self.conn.commit()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            entries, total_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+class CachedStructuredLLM:
+    """Wraps a with_structured_output() runnable so invoke/ainvoke/batch consult the cache first.
+
+    Each prompt gets a sample index so a run that asks the same prompt N times gets N
+    distinct cached answers. Callers can pin it with config={"metadata": {"sample_index": k}}
+    (needed when resuming part-way through a run); otherwise it counts how often the
+    prompt has been sent through this wrapper.
+
+    With accept(response, config), only accepted responses are stored, and cached ones it
+    rejects count as misses, so a short or malformed answer is asked for again.
+    """
+
+    def __init__(self, structured_llm, cache, model, schema, accept=None):
+        self.structured_llm = structured_llm
+        self.cache = cache
+        self.model = model
+        self.schema = schema
+        self.accept = accept
+        self.occurrences = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def next_variant(self, prompt, config=None):
+        sample_index = ((config or {}).get("metadata") or {}).get("sample_index")
+        if sample_index is not None:
+            return sample_index
+
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        with self.lock:
+            variant = self.occurrences[digest]
+            self.occurrences[digest] += 1
+        return variant
+
+    def accepts(self, response, config):
+        return self.accept is None or self.accept(response, config)
+
+    def lookup(self, prompt, variant, config=None):
+        value = self.cache.get(self.model, prompt, self.schema, variant)
+        if value is None:
+            return None
+        response = self.schema.model_validate(value)
+        return response if self.accepts(response, config) else None
+
+    def store(self, prompt, variant, response, config=None):
+        if self.accepts(response, config):
+            self.cache.put(
+                self.model, prompt, response.model_dump(), self.schema, variant
+            )
+
+    def invoke(self, prompt, config=None):
+        variant = self.next_variant(prompt, config)
+        cached = self.lookup(prompt, variant, config)
+        if cached is not None:
+            return cached
+
+        response = self.structured_llm.invoke(prompt, config=config)
+        self.store(prompt, variant, response, config)
+        return response
+
+    async def ainvoke(self, prompt, config=None):
+        variant = self.next_variant(prompt, config)
+        cached = self.lookup(prompt, variant, config)
+        if cached is not None:
+            return cached
+
+        response = await self.structured_llm.ainvoke(prompt, config=config)
+        self.store(prompt, variant, response, config)
+        return response
+
+    def batch(self, prompts, config=None, return_exceptions=False):
+        # Like Runnable.batch, config may be one dict or one per prompt
+        configs = config if isinstance(config, list) else [config] * len(prompts)
+        variants = [
+            self.next_variant(prompt, item_config)
+            for prompt, item_config in zip(prompts, configs)
+        ]
+        responses = [
+            self.lookup(prompt, variant, item_config)
+            for prompt, variant, item_config in zip(prompts, variants, configs)
+        ]
+
+        missing = [i for i, response in enumerate(responses) if response is None]
+        if missing:
+            fresh = self.structured_llm.batch(
+                [prompts[i] for i in missing],
+                config=[configs[i] for i in missing],
+                return_exceptions=return_exceptions,
+            )
+            for i, response in zip(missing, fresh):
+                responses[i] = response
+                if not isinstance(response, Exception):
+                    self.store(prompts[i], variants[i], response, configs[i])
+
+        return responses
+
+
+def print_cache_stats(cache):
+    stats = cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = stats["hits"] / lookups if lookups else 0.0
+    print(
+        f"🗄️  Cache: {stats['hits']} hits, {stats['misses']} misses "
+        f"({hit_rate:.0%} hit rate), {stats['entries']} entries, "
+        f"{stats['bytes'] / 1024:.1f} KiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the LLM response cache")
+    parser.add_argument("action", choices=["stats", "evict", "clear"])
+    parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    args = parser.parse_args()
+
+    cache = LLMCache(args.path)
+    if args.action == "evict":
+        cache.evict()
+    elif args.action == "clear":
+        cache.clear()
+    print_cache_stats(cache)
+    cache.close()
@@ -0,0 +1,340 @@
+"""
+Routes chat-model calls across several providers/models by weight, with a separate rate limit,
+latency estimate and error cooldown per provider, and fails over when one saturates or errors.
+
+A provider spec is "provider:model[:key=value...]", comma-separated for several, e.g.
+    openai:gpt-5-mini:weight=3:rpm=500:tpm=200000,vertexai:gemini-2.5-flash:weight=1
+Keys: weight, rpm, tpm, concurrency; anything else is passed to the model constructor
+(e.g. fake:fake-chat:latency=0.2:error_rate=0.1 for the local FakeChatModel).
+
+Input data sources: None
+Output destinations: None
+Dependencies: langchain_openai / langchain_google_vertexai (only for the providers used)
+Key exports: LLMRouter, RoutedProvider, parse_provider_specs(), PROVIDER_FACTORIES, print_router_stats()
+Side effects: Makes LLM API calls through the configured providers
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+from shared.concurrency import RateLimiter, estimate_tokens, prompt_text, run_batch
+from shared.retry import classify_error
+
+
+def create_openai(model, **kwargs):
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model=model, **kwargs)
+
+
+def create_vertexai(model, **kwargs):
+    from langchain_google_vertexai import ChatVertexAI
+
+    return ChatVertexAI(model=model, **kwargs)
+
+
+def create_fake(model, **kwargs):
+    from shared.fake_llm import FakeChatModel
+
+    return FakeChatModel(model=model, **kwargs)
+
+
+PROVIDER_FACTORIES = {
+    "openai": create_openai,
+    "vertexai": create_vertexai,
+    "fake": create_fake,
+}
+
+
+class RoutedProvider:
+    """One provider/model behind the router, with its own limits and health statistics."""
+
+    def __init__(
+        self,
+        provider,
+        model,
+        weight=1.0,
+        requests_per_minute=None,
+        tokens_per_minute=None,
+        max_concurrency=None,
+        **model_kwargs,
+    ):
+        self.provider = provider
+        self.model = model
+        self.name = f"{provider}/{model}"
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.model_kwargs = model_kwargs
+        self.chat_model = None
+        self.structured = {}
+
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.in_flight = 0
+        self.latency = None
+        self.cooldown_until = 0.0
+
+    def runnable(self, schema=None, include_raw=False):
+        """The provider's chat model, or its with_structured_output(schema), created lazily."""
+        if self.chat_model is None:
+            self.chat_model = PROVIDER_FACTORIES[self.provider](
+                self.model, **self.model_kwargs
+            )
+        if schema is None:
+            return self.chat_model
+        key = (schema, include_raw)
+        if key not in self.structured:
+            self.structured[key] = self.chat_model.with_structured_output(
+                schema, include_raw=include_raw
+            )
+        return self.structured[key]
+
+    def record_latency(self, seconds):
+        # Exponentially weighted moving average
+        self.latency = (
+            seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+        )
+
+
+def parse_value(value):
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def parse_provider_specs(spec):
+    """Parse "provider:model[:key=value...],..." into RoutedProvider objects."""
+    option_names = {
+        "weight": "weight",
+        "rpm": "requests_per_minute",
+        "tpm": "tokens_per_minute",
+        "concurrency": "max_concurrency",
+    }
+    providers = []
+
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        provider, model, *options = entry.split(":")
+        if provider not in PROVIDER_FACTORIES:
+            raise ValueError(
+                f"Unknown provider {provider!r} (known: {', '.join(PROVIDER_FACTORIES)})"
+            )
+
+        kwargs = {}
+        for option in options:
+            key, _, value = option.partition("=")
+            kwargs[option_names.get(key, key)] = parse_value(value)
+        providers.append(RoutedProvider(provider, model, **kwargs))
+
+    if not providers:
+        raise ValueError("No providers configured")
+    return providers
+
+
+class NoProviderAvailable(Exception):
+    """Raised when every provider failed the call."""
+
+
+class LLMRouter:
+    """Drop-in for a chat model (invoke/ainvoke/batch/with_structured_output) over several providers.
+
+    Each call goes to a provider picked at random in proportion to its weight among those
+    that are not cooling down after errors, under max_concurrency, and within their rate
+    limit right now. If all are saturated the call waits for the first to free up. A
+    throttled or transient failure puts its provider in an exponential cooldown and the
+    call is retried on another; fatal errors (bad request, validation) are raised as is.
+    """
+
+    def __init__(
+        self, providers, cooldown_seconds=5.0, max_cooldown_seconds=120.0, seed=None
+    ):
+        self.providers = providers
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec, **kwargs):
+        return cls(parse_provider_specs(spec), **kwargs)
+
+    @property
+    def model_name(self):
+        """Stable label for cache keys and reports, e.g. "openai/gpt-5-mini+vertexai/gemini-2.5-flash"."""
+        return "+".join(provider.name for provider in self.providers)
+
+    def choose(self, tokens, excluded):
+        """Reserve a provider for one call: (provider, 0.0), or (None, seconds to wait)."""
+        now = time.monotonic()
+        with self.lock:
+            candidates = [
+                provider
+                for provider in self.providers
+                if provider not in excluded
+                and provider.cooldown_until <= now
+                and (
+                    provider.max_concurrency is None
+                    or provider.in_flight < provider.max_concurrency
+                )
+            ]
+
+            # Weighted draw among providers with rate-limit headroom right now
+            waits = []
+            while candidates:
+                provider = self.random.choices(
+                    candidates, weights=[p.weight for p in candidates]
+                )[0]
+                wait = provider.limiter.try_acquire(tokens)
+                if wait == 0.0:
+                    provider.in_flight += 1
+                    provider.requests += 1
+                    return provider, 0.0
+                waits.append(wait)
+                candidates.remove(provider)
+
+            cooling = [
+                provider.cooldown_until - now
+                for provider in self.providers
+                if provider not in excluded and provider.cooldown_until > now
+            ]
+            return None, min(waits + cooling, default=0.05)
+
+    def finish(self, provider, started, error=None):
+        with self.lock:
+            provider.in_flight -= 1
+            if error is None:
+                provider.consecutive_errors = 0
+                provider.record_latency(time.monotonic() - started)
+                return
+
+            provider.errors += 1
+            if classify_error(error) == "fatal":
+                # A bad request says nothing about the provider's health
+                return
+
+            provider.consecutive_errors += 1
+            cooldown = min(
+                self.max_cooldown_seconds,
+                self.cooldown_seconds * 2 ** (provider.consecutive_errors - 1),
+            )
+            provider.cooldown_until = time.monotonic() + cooldown
+            print(f"⚠️  {provider.name} failed ({error}); cooling down {cooldown:.1f}s")
+
+    def available(self, excluded):
+        return [provider for provider in self.providers if provider not in excluded]
+
+    def invoke_with(self, schema, prompt, config=None, include_raw=False):
+        tokens = estimate_tokens(prompt_text(prompt))
+        excluded = set()
+        last_error = None
+
+        while self.available(excluded):
+            provider, wait = self.choose(tokens, excluded)
+            if provider is None:
+                time.sleep(wait)
+                continue
+
+            started = time.monotonic()
+            try:
+                response = provider.runnable(schema, include_raw).invoke(
+                    prompt, config=config
+                )
+            except Exception as e:
+                self.finish(provider, started, e)
+                if classify_error(e) == "fatal":
+                    raise
+                excluded.add(provider)
+                last_error = e
+                continue
+            self.finish(provider, started)
+            return response
+
+        raise NoProviderAvailable(f"All providers failed: {last_error}") from last_error
+
+    async def ainvoke_with(self, schema, prompt, config=None, include_raw=False):
+        tokens = estimate_tokens(prompt_text(prompt))
+        excluded = set()
+        last_error = None
+
+        while self.available(excluded):
+            provider, wait = self.choose(tokens, excluded)
+            if provider is None:
+                await asyncio.sleep(wait)
+                continue
+
+            started = time.monotonic()
+            try:
+                response = await provider.runnable(schema, include_raw).ainvoke(
+                    prompt, config=config
+                )
+            except Exception as e:
+                self.finish(provider, started, e)
+                if classify_error(e) == "fatal":
+                    raise
+                excluded.add(provider)
+                last_error = e
+                continue
+            self.finish(provider, started)
+            return response
+
+        raise NoProviderAvailable(f"All providers failed: {last_error}") from last_error
+
+    def invoke(self, prompt, config=None, **kwargs):
+        return self.invoke_with(None, prompt, config)
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        return await self.ainvoke_with(None, prompt, config)
+
+    def batch(self, prompts, config=None, return_exceptions=False, **kwargs):
+        return run_batch(self.invoke, prompts, config, return_exceptions)
+
+    def with_structured_output(self, schema, include_raw=False, **kwargs):
+        return RoutedStructuredModel(self, schema, include_raw)
+
+    def stats(self):
+        return [
+            {
+                "provider": provider.name,
+                "weight": provider.weight,
+                "requests": provider.requests,
+                "errors": provider.errors,
+                "mean_latency_seconds": provider.latency,
+            }
+            for provider in self.providers
+        ]
+
+
+class RoutedStructuredModel:
+    """with_structured_output() view of an LLMRouter."""
+
+    def __init__(self, router, schema, include_raw=False):
+        self.router = router
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def invoke(self, prompt, config=None, **kwargs):
+        return self.router.invoke_with(self.schema, prompt, config, self.include_raw)
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        return await self.router.ainvoke_with(
+            self.schema, prompt, config, self.include_raw
+        )
+
+    def batch(self, prompts, config=None, return_exceptions=False, **kwargs):
+        return run_batch(self.invoke, prompts, config, return_exceptions)
+
+
+def print_router_stats(router):
+    for row in router.stats():
+        latency = row["mean_latency_seconds"]
+        latency_text = f"{latency:.2f}s" if latency is not None else "n/a"
+        print(
+            f"🔀 {row['provider']} (weight {row['weight']:g}): {row['requests']} requests, "
+            f"{row['errors']} errors, latency ~{latency_text}"
+        )
@@ -0,0 +1,298 @@
+"""
+Finds near-duplicate generated questions with hashed TF-IDF vectors and blocked NumPy cosine
+similarity, and regenerates only the flagged questions through the question journal.
+
+Every question is embedded locally (signed feature hashing of word unigrams and bigrams,
+TF-IDF weighted, L2-normalized float32), then cosine similarity is computed as row-blocked
+matrix products over the upper triangle only, so memory stays at block_size x N floats.
+Beyond exact_limit questions, random-hyperplane LSH buckets restrict the products to
+likely candidates so 100k-question sets still finish in seconds.
+Within each cluster of near-duplicates the first question is kept and the rest are flagged.
+
+Input data sources: QuestionResults JSON files, question journals
+Output destinations: Regenerated questions appended to the journal, recompacted output JSON
+Dependencies: numpy
+Key exports: hashed_tfidf(), hashed_counts(), smoothed_idf(), find_near_duplicates(), flag_duplicates(), deduplicate_journal()
+Side effects: Makes LLM calls for flagged questions (deduplicate_journal only)
+
+Usage: python -m shared.question_dedup <questions.json> [--threshold 0.9]
+"""
+
+import argparse
+import json
+import re
+import time
+import zlib
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+REGENERATE_HINT = """
+
+IMPORTANT: A question very similar to the one below has already been generated. Write a clearly different question: use a different opening, a different concrete scenario, and different wording.
+<existing_question>
+{existing}
+</existing_question>"""
+
+
+def hashed_counts(texts, n_features=256):
+    """Signed hashed term counts (float32) and bucket presence (bool), both len(texts) x n_features.
+
+    Features are lowercase word unigrams and bigrams, hashed with a sign bit so that
+    bucket collisions cancel out in expectation instead of inflating similarity.
+    """
+    vocabulary = {}
+    word_ids = []
+    lengths = []
+
+    for text in texts:
+        words = TOKEN_RE.findall(text.lower())
+        word_ids.extend(
+            [vocabulary.setdefault(word, len(vocabulary)) for word in words]
+        )
+        lengths.append(len(words))
+
+    # Hash each distinct word once; bigram hashes are combined from their word hashes
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode("utf-8")) for word in vocabulary),
+        dtype=np.int64,
+        count=len(vocabulary),
+    )
+    unigrams = word_hashes[np.asarray(word_ids, dtype=np.int64)]
+    n = len(texts)
+    unigram_rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+
+    same_text = unigram_rows[1:] == unigram_rows[:-1]
+    bigrams = (unigrams[:-1] * 1_000_003 + unigrams[1:])[same_text] & 0xFFFFFFFF
+    features = np.concatenate([unigrams, bigrams])
+    rows = np.concatenate([unigram_rows, unigram_rows[1:][same_text]])
+
+    cells = rows * n_features + features % n_features
+    signs = np.where(features >> 31, 1.0, -1.0)
+
+    # Signed term counts per (document, bucket), accumulated over the occupied cells only
+    occupied, inverse = np.unique(cells, return_inverse=True)
+    vectors = np.zeros(n * n_features, dtype=np.float32)
+    vectors[occupied] = np.bincount(inverse, weights=signs, minlength=len(occupied))
+    present = np.zeros(n * n_features, dtype=bool)
+    present[occupied] = True
+    return vectors.reshape(n, n_features), present.reshape(n, n_features)
+
+
+def smoothed_idf(document_frequency, n):
+    """Smoothed IDF per hashed bucket (float32), from bucket document frequencies over n texts."""
+    return (np.log((1 + n) / (1 + document_frequency)) + 1).astype(np.float32)
+
+
+def l2_normalize(vectors):
+    """Scale rows to unit length in place (all-zero rows are left as is)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors /= norms
+    return vectors
+
+
+def hashed_tfidf(texts, n_features=256):
+    """Embed texts as L2-normalized hashed TF-IDF vectors (float32, shape len(texts) x n_features).
+
+    See hashed_counts() for the features; IDF is smoothed over the hashed buckets.
+    """
+    vectors, present = hashed_counts(texts, n_features)
+    vectors *= smoothed_idf(present.sum(axis=0), len(texts))
+    return l2_normalize(vectors)
+
+
+def blocked_pairs(vectors, threshold, block_size=512):
+    """Exact all-pairs search: every block of rows against itself and all later rows."""
+    found_pairs = []
+    found_similarities = []
+
+    for start in range(0, len(vectors), block_size):
+        block = vectors[start : start + block_size]
+        similarities = block @ vectors[start:].T
+        block_rows, block_columns = np.nonzero(similarities >= threshold)
+
+        # Keep the strict upper triangle (drops self-matches and mirrored pairs)
+        upper = block_columns > block_rows
+        block_rows = block_rows[upper]
+        block_columns = block_columns[upper]
+
+        found_similarities.append(similarities[block_rows, block_columns])
+        found_pairs.append(np.stack([block_rows + start, block_columns + start], 1))
+
+    return found_pairs, found_similarities
+
+
+def bucketed_pairs(vectors, threshold, bands=20, bits=12, seed=0, block_size=512):
+    """Random-hyperplane LSH: only rows sharing a `bits`-bit signature band are compared.
+
+    Each band sorts the rows by signature; every bucket is then scored with the same
+    blocked matrix products as the exact search. A pair at cosine 0.9 shares a band
+    with probability ~97% at the defaults; random pairs almost never do.
+    """
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((vectors.shape[1], bands * bits)).astype(np.float32)
+    signature_bits = (vectors @ planes > 0).reshape(len(vectors), bands, bits)
+    keys = signature_bits.astype(np.int64) @ (1 << np.arange(bits, dtype=np.int64))
+
+    found_pairs = []
+    found_similarities = []
+
+    for band in range(bands):
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(order)]])
+
+        for start, end in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+            members = order[start:end]
+            bucket_pairs, bucket_similarities = blocked_pairs(
+                vectors[members], threshold, block_size
+            )
+            for pairs, similarities in zip(bucket_pairs, bucket_similarities):
+                if len(pairs):
+                    found_pairs.append(np.sort(members[pairs], axis=1))
+                    found_similarities.append(similarities)
+
+    if found_pairs:
+        # The same pair can collide in several bands
+        pairs = np.concatenate(found_pairs)
+        _, first = np.unique(
+            pairs[:, 0] * len(vectors) + pairs[:, 1], return_index=True
+        )
+        return [pairs[first]], [np.concatenate(found_similarities)[first]]
+    return found_pairs, found_similarities
+
+
+def find_near_duplicates(vectors, threshold=0.9, exact_limit=20_000, **lsh_options):
+    """Return (pairs, similarities) for every i < j with cosine(vectors[i], vectors[j]) >= threshold.
+
+    Rows must be L2-normalized. Up to exact_limit rows every pair is scored; larger
+    sets are narrowed to LSH candidate buckets first (see bucketed_pairs()).
+    """
+    if len(vectors) <= exact_limit:
+        found_pairs, found_similarities = blocked_pairs(vectors, threshold)
+    else:
+        found_pairs, found_similarities = bucketed_pairs(
+            vectors, threshold, **lsh_options
+        )
+
+    if not found_pairs:
+        return np.empty((0, 2), dtype=np.int64), np.empty(0, dtype=np.float32)
+    return np.concatenate(found_pairs), np.concatenate(found_similarities)
+
+
+def flag_duplicates(count, pairs):
+    """Group pairs into clusters and return {flagged position: kept position}.
+
+    The lowest position in each cluster is kept; every other member is flagged.
+    """
+    parent = list(range(count))
+
+    def find(position):
+        while parent[position] != position:
+            parent[position] = parent[parent[position]]
+            position = parent[position]
+        return position
+
+    for a, b in pairs.tolist():
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    return {
+        position: find(position)
+        for position in sorted(set(pairs.ravel().tolist()))
+        if find(position) != position
+    }
+
+
+def deduplicate_journal(
+    journal,
+    structured_llm,
+    render_prompt,
+    threshold=0.9,
+    max_rounds=3,
+    workers=8,
+    n_features=256,
+):
+    """Regenerate near-duplicate questions until none remain or max_rounds is reached.
+
+    render_prompt(question_dict) must rebuild the original prompt for a question.
+    Each flagged question is regenerated with a hint naming the question it collided
+    with and appended to the (closed) journal under its original index, so the next
+    compaction picks it up. Returns the number of questions still flagged.
+    """
+    flagged = {}
+
+    for round_number in range(1, max_rounds + 1):
+        indices, questions = [], []
+        for index, question in journal.iter_questions():
+            indices.append(index)
+            questions.append(question)
+
+        started = time.perf_counter()
+        vectors = hashed_tfidf([q["question"] for q in questions], n_features)
+        pairs, _ = find_near_duplicates(vectors, threshold)
+        flagged = flag_duplicates(len(questions), pairs)
+        print(
+            f"🔁 Dedup round {round_number}: {len(flagged)} of {len(questions)} questions "
+            f"flagged at cosine >= {threshold} ({time.perf_counter() - started:.2f}s)"
+        )
+        if not flagged:
+            break
+
+        positions = list(flagged)
+        prompts = [
+            render_prompt(questions[position])
+            + REGENERATE_HINT.format(existing=questions[flagged[position]]["question"])
+            for position in positions
+        ]
+        responses = structured_llm.batch(
+            prompts, config={"max_concurrency": workers}, return_exceptions=True
+        )
+
+        journal.open(resume=True)
+        try:
+            for position, response in zip(positions, responses):
+                if isinstance(response, Exception):
+                    print(
+                        f"Error regenerating question {indices[position]}: {response}"
+                    )
+                    continue
+                question = dict(questions[position], question=response.question)
+                journal.append(indices[position], question)
+        finally:
+            journal.close()
+
+    return len(flagged)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Report near-duplicate questions in a QuestionResults JSON file"
+    )
+    parser.add_argument("path")
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--features", type=int, default=256)
+    args = parser.parse_args()
+
+    with open(args.path, "r", encoding="utf-8") as f:
+        texts = [q["question"] for q in json.load(f)["questions"]]
+
+    started = time.perf_counter()
+    pairs, similarities = find_near_duplicates(
+        hashed_tfidf(texts, args.features), args.threshold
+    )
+    flagged = flag_duplicates(len(texts), pairs)
+    print(
+        f"{len(pairs)} near-duplicate pairs, {len(flagged)} of {len(texts)} questions "
+        f"flagged ({time.perf_counter() - started:.2f}s)"
+    )
+    for (a, b), similarity in sorted(
+        zip(pairs.tolist(), similarities.tolist()), key=lambda item: -item[1]
+    )[:20]:
+        print(f"  {similarity:.3f}  #{a + 1}: {texts[a][:70]!r}")
+        print(f"         #{b + 1}: {texts[b][:70]!r}")
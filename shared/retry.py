@@ -0,0 +1,211 @@
+"""
+Retry with jittered exponential backoff, error classification, and an AIMD concurrency controller.
+
+Errors are classified as "throttle" (429 / quota exhausted), "transient" (timeouts, connection
+errors, 5xx, incomplete responses) or "fatal" (bad requests, auth, validation) so only the first
+two are retried.
+AIMDController adapts how many calls may be in flight: +1 per window of successes, halved on
+throttling, so a run finds the provider's sustainable concurrency on its own.
+
+Input data sources: None
+Output destinations: None
+Dependencies: asyncio, random (standard library)
+Key exports: RetryPolicy, AIMDController, IncompleteResponseError, classify_error(), call_with_retry(), acall_with_retry()
+Side effects: Sleeps between attempts
+"""
+
+import asyncio
+import random
+import time
+
+THROTTLE_NAMES = ("RateLimit", "ResourceExhausted", "TooManyRequests")
+TRANSIENT_NAMES = (
+    "Timeout",
+    "Connect",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "DeadlineExceeded",
+    "Unavailable",
+)
+
+
+class IncompleteResponseError(Exception):
+    """A response that parsed but holds fewer items than requested; retried as transient."""
+
+
+TRANSIENT_TYPES = (
+    TimeoutError,
+    ConnectionError,
+    asyncio.TimeoutError,
+    IncompleteResponseError,
+)
+
+
+def status_code_of(error):
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify_error(error):
+    """Return "throttle", "transient" or "fatal" for an exception from an LLM call."""
+    status = status_code_of(error)
+    if status is not None:
+        if status == 429:
+            return "throttle"
+        if status in (408, 409) or status >= 500:
+            return "transient"
+        return "fatal"
+
+    name = type(error).__name__
+    if any(part in name for part in THROTTLE_NAMES):
+        return "throttle"
+    if isinstance(error, TRANSIENT_TYPES) or any(
+        part in name for part in TRANSIENT_NAMES
+    ):
+        return "transient"
+
+    # Routers and wrappers chain the provider's error
+    if error.__cause__ is not None:
+        return classify_error(error.__cause__)
+    return "fatal"
+
+
+def retry_after_seconds(error):
+    """The server's Retry-After hint in seconds, if the error carries one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Full-jitter exponential backoff: failed attempt n sleeps uniform(0, min(max_delay, base_delay * 2**(n-1))).
+
+    A Retry-After header on the error raises the sleep to at least that long.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0, seed=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.random = random.Random(seed)
+
+    def should_retry(self, error, attempt):
+        return attempt < self.max_attempts and classify_error(error) != "fatal"
+
+    def delay(self, attempt, error=None):
+        """Seconds to sleep after failed attempt number `attempt` (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        hint = retry_after_seconds(error) if error is not None else None
+        return max(hint or 0.0, self.random.uniform(0, ceiling))
+
+
+def call_with_retry(call, policy, on_retry=None):
+    """Run call() until it succeeds, the error is fatal, or attempts run out (then re-raise)."""
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return call()
+        except Exception as e:
+            if not policy.should_retry(e, attempt):
+                raise
+            delay = policy.delay(attempt, e)
+            if on_retry is not None:
+                on_retry(e, attempt, delay)
+            time.sleep(delay)
+
+
+async def acall_with_retry(call, policy, controller=None, on_retry=None):
+    """Async call_with_retry; with a controller each attempt holds one of its slots."""
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            if controller is None:
+                return await call()
+            async with controller.slot():
+                return await call()
+        except Exception as e:
+            if not policy.should_retry(e, attempt):
+                raise
+            delay = policy.delay(attempt, e)
+            if on_retry is not None:
+                on_retry(e, attempt, delay)
+            await asyncio.sleep(delay)
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease limit on in-flight calls.
+
+    Every `limit` successes raise the limit by `increase`; a throttling error multiplies it
+    by `decrease`, at most once per round trip (errors from calls started before the last
+    decrease are ignored, like TCP congestion control).
+
+    The limit outlives event loops: the asyncio.Condition guarding the slots is created
+    for the running loop, and again whenever a later asyncio.run() round uses the
+    controller from a new loop.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, increase=1.0, decrease=0.5):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.in_flight = 0
+        self.decreased_at = 0.0
+        self.peak = self.limit
+        self.condition = None
+        self.loop = None
+
+    def on_success(self):
+        self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+        self.peak = max(self.peak, self.limit)
+
+    def on_error(self, error, started_at):
+        if classify_error(error) != "throttle" or started_at < self.decreased_at:
+            return
+        self.limit = max(self.minimum, self.limit * self.decrease)
+        self.decreased_at = time.monotonic()
+
+    def slot(self):
+        return ControllerSlot(self)
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        if self.condition is None or self.loop is not loop:
+            self.condition = asyncio.Condition()
+            self.loop = loop
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self):
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+
+class ControllerSlot:
+    """async with controller.slot(): ... holds one in-flight slot and reports the outcome."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.started_at = None
+
+    async def __aenter__(self):
+        await self.controller.acquire()
+        self.started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, error_type, error, traceback):
+        if error is None:
+            self.controller.on_success()
+        elif isinstance(error, Exception):
+            self.controller.on_error(error, self.started_at)
+        await self.controller.release()
+        return False
@@ -0,0 +1,391 @@
+"""
+Per-call LLM telemetry: wall time, queue wait, token usage, retries and outcome of every
+generation call, tagged with its dimension combination, category or shard.
+
+Call sites bracket each logical call with CallMetrics.start()/finish() and pass
+config={"metadata": {"call_id": ...}}; the MeteredChatModel wrapper (below the response
+cache) times each attempt and reads the provider's token usage from the raw message
+(with_structured_output(..., include_raw=True)), estimating it when the model reports none.
+Queue wait is the time from start() to the first attempt reaching the model (rate limiter,
+concurrency slot or batch pool); cache hits never reach the model and are recorded as "cached".
+
+Input data sources: None
+Output destinations: <output>.metrics.jsonl (one record per call), <output>.prom (Prometheus textfile)
+Dependencies: Standard library only at import time
+Key exports: CallMetrics, MeteredChatModel, metrics_paths_for(), usage_of()
+Side effects: Writes the metrics files, prints the end-of-run summary
+"""
+
+import bisect
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+
+from shared.concurrency import estimate_tokens, prompt_text, run_batch
+from shared.retry import classify_error
+from shared.token_budget import DEFAULT_PROFILE, MODEL_PROFILES
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, math.inf)
+
+
+def metrics_paths_for(output_path):
+    """(JSONL records path, Prometheus textfile path) next to an output file."""
+    root, _ = os.path.splitext(output_path)
+    return f"{root}.metrics.jsonl", f"{root}.prom"
+
+
+def usage_of(message):
+    """(input tokens, output tokens) reported on a LangChain message, or None."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    # Older integrations only fill response_metadata["token_usage"]
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage")
+    if token_usage:
+        return token_usage.get("prompt_tokens", 0), token_usage.get(
+            "completion_tokens", 0
+        )
+    return None
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+class CallMetrics:
+    """Collects one record per logical LLM call and writes them as JSONL as they finish."""
+
+    def __init__(self, path, script, model):
+        self.path = path
+        self.script = script
+        self.model = model
+        profile = MODEL_PROFILES.get(model, DEFAULT_PROFILE)
+        self.input_cost = profile["input_cost_per_million"] / 1_000_000
+        self.output_cost = profile["output_cost_per_million"] / 1_000_000
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.records = []
+        self.file = open(path, "w", encoding="utf-8") if path else None
+
+    def start(self, call_id, tag):
+        """Begin a call; a retried batch item keeps its original start time."""
+        with self.lock:
+            self.calls.setdefault(
+                call_id,
+                {
+                    "tag": tag,
+                    "started": time.monotonic(),
+                    "first_attempt": None,
+                    "attempts": 0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                    "tokens_estimated": False,
+                },
+            )
+
+    def attempt_started(self, call_id):
+        now = time.monotonic()
+        with self.lock:
+            call = self.calls[call_id]
+            call["attempts"] += 1
+            if call["first_attempt"] is None:
+                call["first_attempt"] = now
+
+    def attempt_finished(self, call_id, usage, estimated=False):
+        with self.lock:
+            call = self.calls[call_id]
+            if usage is not None:
+                call["input_tokens"] += usage[0]
+                call["output_tokens"] += usage[1]
+                call["tokens_estimated"] |= estimated
+
+    def finish(self, call_id, error=None, questions=0):
+        """Close a call: outcome is ok, cached (no attempt reached the model) or the error class."""
+        finished = time.monotonic()
+        with self.lock:
+            call = self.calls.pop(call_id, None)
+            if call is None:
+                return
+            if error is not None:
+                outcome = classify_error(error)
+            elif call["attempts"] == 0:
+                outcome = "cached"
+            else:
+                outcome = "ok"
+
+            first_attempt = call["first_attempt"] or finished
+            record = {
+                "timestamp": time.time(),
+                "script": self.script,
+                "model": self.model,
+                "call_id": call_id,
+                "tag": call["tag"],
+                "outcome": outcome,
+                "error": str(error)[:300] if error is not None else None,
+                "wall_seconds": round(finished - call["started"], 4),
+                "queue_wait_seconds": round(first_attempt - call["started"], 4),
+                "attempts": call["attempts"],
+                "retries": max(0, call["attempts"] - 1),
+                "input_tokens": call["input_tokens"],
+                "output_tokens": call["output_tokens"],
+                "tokens_estimated": call["tokens_estimated"],
+                "cost_usd": round(
+                    call["input_tokens"] * self.input_cost
+                    + call["output_tokens"] * self.output_cost,
+                    6,
+                ),
+                "questions": questions,
+            }
+            self.records.append(record)
+            if self.file is not None:
+                self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.file.flush()
+
+    def close(self):
+        # Calls a crashed loop never finished are flushed as incomplete
+        for call_id in list(self.calls):
+            self.finish(call_id, error=RuntimeError("call did not finish"))
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def write_prometheus(self, path):
+        """Write a node_exporter textfile-collector summary (atomically)."""
+        labels = f'script="{self.script}",model="{self.model}"'
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        outcomes = defaultdict(int)
+        for record in self.records:
+            outcomes[record["outcome"]] += 1
+        metric(
+            "llm_calls_total",
+            "counter",
+            "LLM calls by outcome.",
+            [
+                f'llm_calls_total{{{labels},outcome="{outcome}"}} {count}'
+                for outcome, count in sorted(outcomes.items())
+            ],
+        )
+
+        walls = [record["wall_seconds"] for record in self.records]
+        buckets = []
+        for bound in LATENCY_BUCKETS:
+            le = "+Inf" if bound == math.inf else f"{bound:g}"
+            count = sum(1 for wall in walls if wall <= bound)
+            buckets.append(
+                f'llm_call_duration_seconds_bucket{{{labels},le="{le}"}} {count}'
+            )
+        buckets.append(f"llm_call_duration_seconds_sum{{{labels}}} {sum(walls):.4f}")
+        buckets.append(f"llm_call_duration_seconds_count{{{labels}}} {len(walls)}")
+        metric(
+            "llm_call_duration_seconds",
+            "histogram",
+            "Wall time per LLM call, including queue wait and retries.",
+            buckets,
+        )
+
+        totals = {
+            "llm_queue_wait_seconds_total": (
+                "Time calls waited before their first attempt.",
+                sum(record["queue_wait_seconds"] for record in self.records),
+            ),
+            "llm_retries_total": (
+                "Retried attempts.",
+                sum(record["retries"] for record in self.records),
+            ),
+            "llm_input_tokens_total": (
+                "Input tokens.",
+                sum(record["input_tokens"] for record in self.records),
+            ),
+            "llm_output_tokens_total": (
+                "Output tokens.",
+                sum(record["output_tokens"] for record in self.records),
+            ),
+            "llm_cost_usd_total": (
+                "Estimated cost in USD from the model's price profile.",
+                sum(record["cost_usd"] for record in self.records),
+            ),
+            "llm_questions_total": (
+                "Questions produced.",
+                sum(record["questions"] for record in self.records),
+            ),
+        }
+        for name, (help_text, value) in totals.items():
+            metric(name, "counter", help_text, [f"{name}{{{labels}}} {value:g}"])
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, path)
+
+    def print_summary(self, slowest=5):
+        """End-of-run latency histogram, slowest tags by p95 and cost per question."""
+        if not self.records:
+            return
+
+        walls = sorted(record["wall_seconds"] for record in self.records)
+        print(
+            f"⏱️  {len(walls)} calls: p50 {percentile(walls, 50):.2f}s, "
+            f"p95 {percentile(walls, 95):.2f}s, p99 {percentile(walls, 99):.2f}s, "
+            f"max {walls[-1]:.2f}s"
+        )
+
+        counts = [0] * len(LATENCY_BUCKETS)
+        for wall in walls:
+            counts[bisect.bisect_left(LATENCY_BUCKETS, wall)] += 1
+        for position, count in enumerate(counts):
+            if not count:
+                continue
+            bound = LATENCY_BUCKETS[position]
+            label = (
+                f"> {LATENCY_BUCKETS[-2]:g}s" if bound == math.inf else f"≤ {bound:g}s"
+            )
+            bar = "█" * max(1, round(40 * count / max(counts)))
+            print(f"   {label:>8} {bar} {count}")
+
+        by_tag = defaultdict(list)
+        for record in self.records:
+            if record["outcome"] != "cached":
+                by_tag[record["tag"]].append(record["wall_seconds"])
+        ranked = sorted(
+            by_tag.items(), key=lambda item: -percentile(sorted(item[1]), 95)
+        )
+        if ranked:
+            print("🐢 Slowest tags (p95):")
+            for tag, tag_walls in ranked[:slowest]:
+                print(
+                    f"   {percentile(sorted(tag_walls), 95):6.2f}s  {tag} ({len(tag_walls)} calls)"
+                )
+
+        cost = sum(record["cost_usd"] for record in self.records)
+        questions = sum(record["questions"] for record in self.records)
+        input_tokens = sum(record["input_tokens"] for record in self.records)
+        output_tokens = sum(record["output_tokens"] for record in self.records)
+        estimated = any(record["tokens_estimated"] for record in self.records)
+        print(
+            f"💵 {input_tokens:,} input / {output_tokens:,} output tokens"
+            f"{' (partly estimated)' if estimated else ''}, ${cost:.4f}"
+            + (f" (${cost / questions:.5f} per question)" if questions else "")
+        )
+
+
+class MeteredChatModel:
+    """Wraps a chat model (or the LLM router) and reports every attempt to a CallMetrics."""
+
+    def __init__(self, chat_model, metrics):
+        self.chat_model = chat_model
+        self.metrics = metrics
+        self.model_name = getattr(chat_model, "model_name", metrics.model)
+        self.untracked = itertools.count(1)
+
+    def begin(self, config):
+        """Register an attempt; calls without a call_id (e.g. dedup regeneration) are their own record."""
+        call_id = ((config or {}).get("metadata") or {}).get("call_id")
+        tracked = call_id is not None
+        if not tracked:
+            call_id = f"untracked-{next(self.untracked)}"
+            self.metrics.start(call_id, "untracked")
+        self.metrics.attempt_started(call_id)
+        return call_id, tracked
+
+    def end(self, call_id, tracked, prompt, output=None, usage=None, error=None):
+        estimated = error is None and usage is None
+        if estimated:
+            usage = (
+                estimate_tokens(prompt_text(prompt)),
+                estimate_tokens(output_text(output)),
+            )
+        self.metrics.attempt_finished(call_id, usage, estimated)
+        if not tracked:
+            self.metrics.finish(call_id, error=error)
+
+    def invoke(self, prompt, config=None, **kwargs):
+        call_id, tracked = self.begin(config)
+        try:
+            message = self.chat_model.invoke(prompt, config=config)
+        except Exception as e:
+            self.end(call_id, tracked, prompt, error=e)
+            raise
+        self.end(call_id, tracked, prompt, message, usage_of(message))
+        return message
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        call_id, tracked = self.begin(config)
+        try:
+            message = await self.chat_model.ainvoke(prompt, config=config)
+        except Exception as e:
+            self.end(call_id, tracked, prompt, error=e)
+            raise
+        self.end(call_id, tracked, prompt, message, usage_of(message))
+        return message
+
+    def batch(self, prompts, config=None, return_exceptions=False, **kwargs):
+        return run_batch(self.invoke, prompts, config, return_exceptions)
+
+    def with_structured_output(self, schema, **kwargs):
+        return MeteredStructuredModel(
+            self, self.chat_model.with_structured_output(schema, include_raw=True)
+        )
+
+
+class MeteredStructuredModel:
+    """Structured view of a MeteredChatModel; returns the parsed object like the plain runnable."""
+
+    def __init__(self, metered, structured_llm):
+        self.metered = metered
+        self.structured_llm = structured_llm
+
+    def invoke(self, prompt, config=None, **kwargs):
+        call_id, tracked = self.metered.begin(config)
+        try:
+            parsed, usage = unwrap_structured(
+                self.structured_llm.invoke(prompt, config=config)
+            )
+        except Exception as e:
+            self.metered.end(call_id, tracked, prompt, error=e)
+            raise
+        self.metered.end(call_id, tracked, prompt, parsed, usage)
+        return parsed
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        call_id, tracked = self.metered.begin(config)
+        try:
+            parsed, usage = unwrap_structured(
+                await self.structured_llm.ainvoke(prompt, config=config)
+            )
+        except Exception as e:
+            self.metered.end(call_id, tracked, prompt, error=e)
+            raise
+        self.metered.end(call_id, tracked, prompt, parsed, usage)
+        return parsed
+
+    def batch(self, prompts, config=None, return_exceptions=False, **kwargs):
+        return run_batch(self.invoke, prompts, config, return_exceptions)
+
+
+def unwrap_structured(response):
+    """(parsed, usage) from an include_raw=True response; models without include_raw return parsed directly."""
+    if isinstance(response, dict) and "parsed" in response:
+        if response.get("parsing_error") is not None:
+            raise response["parsing_error"]
+        return response["parsed"], usage_of(response.get("raw"))
+    return response, None
+
+
+def output_text(response):
+    if hasattr(response, "model_dump_json"):
+        return response.model_dump_json()
+    return str(getattr(response, "content", response))
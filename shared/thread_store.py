@@ -0,0 +1,335 @@
+"""
+Columnar, memory-mapped store of the cleaned forum threads (ids, dates, authors, titles, bodies),
+so downstream stages can select date windows or author subsets without parsing the corpus.
+
+Ingest (process_threads.py) writes it next to threads_cleaned.json with ColumnarThreadWriter,
+which needs only the standard library: numeric columns stay in memory (a few bytes per thread)
+and the text columns are spooled to temporary files. ThreadStore opens it with np.memmap. A date
+window is two binary searches in a date-sorted copy of the dates, and an author subset is a few
+slices of a rows-by-author index; only the selected rows' text is ever decoded.
+
+File layout (same scheme as shared/bm25_index.py): 8-byte magic, 8-byte header length, a JSON
+header (row count, ingest metadata, author vocabulary, array table) and 64-byte aligned
+little-endian arrays:
+  dates          int64  microseconds since the epoch (UTC); MISSING_DATE when unknown
+  date_order     int32  rows in date order (stable); sorted_dates int64 is dates[date_order]
+  author_codes   int32  index into the header's author list; -1 when unknown
+  author_order   int32  rows grouped by author code, CSR offsets in author_offsets (int64)
+  id/title/body  text columns: <name>_offsets int64 (rows + 1) and <name>_bytes (UTF-8)
+
+Input data sources: Cleaned thread dicts (thread_id, thread_date, author_id, thread_title, thread_body)
+Output destinations: threads_cleaned.cols
+Dependencies: Standard library (writing); numpy (reading)
+Key exports: ColumnarThreadWriter, ThreadStore, parse_thread_date()
+Side effects: Writes the store file and its temporary spool files (writer only)
+
+Usage: python -m shared.thread_store info STORE
+       python -m shared.thread_store select STORE [--since DATE] [--until DATE] [--author ID ...] [--show N]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+
+MAGIC = b"THRDCOL1"
+ALIGNMENT = 64
+MISSING_DATE = -(2**63)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+TEXT_COLUMNS = {"id": "thread_id", "title": "thread_title", "body": "thread_body"}
+SHORT_OFFSET_RE = re.compile(r"([+-]\d{2})$")
+
+
+def parse_thread_date(value):
+    """Microseconds since the epoch for an export timestamp; naive times count as UTC.
+
+    Accepts datetimes and ISO strings such as "2025-06-02 00:03:28.47559+00".
+    Empty values give MISSING_DATE.
+    """
+    if not value:
+        return MISSING_DATE
+    if not isinstance(value, datetime):
+        # fromisoformat before 3.11 wants a full "+HH:MM" offset and 3 or 6 fraction digits
+        text = SHORT_OFFSET_RE.sub(r"\1:00", value.strip())
+        text = re.sub(
+            r"\.(\d{1,6})", lambda match: "." + match.group(1).ljust(6, "0"), text
+        )
+        value = datetime.fromisoformat(text)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def format_thread_date(microseconds):
+    if microseconds == MISSING_DATE:
+        return None
+    return (EPOCH + timedelta(microseconds=int(microseconds))).isoformat(sep=" ")
+
+
+def little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class ColumnarThreadWriter:
+    """Writes the columnar store one thread at a time; close(metadata) finishes the file.
+
+    Same write()/close(metadata) interface as the JSON thread writers in process_threads.py.
+    A thread_date that does not parse is stored as MISSING_DATE, like an empty one, and
+    the number of such rows is added to the metadata as "invalid_dates".
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.invalid_dates = 0
+        self.dates = array("q")
+        self.author_codes = array("i")
+        self.authors = {}
+        self.offsets = {name: array("q", [0]) for name in TEXT_COLUMNS}
+        self.spools = {
+            name: open(f"{path}.{name}.tmp", "wb") for name in TEXT_COLUMNS
+        }
+
+    def write(self, thread):
+        try:
+            date = parse_thread_date(thread.get("thread_date"))
+        except ValueError:
+            date = MISSING_DATE
+            self.invalid_dates += 1
+        self.dates.append(date)
+        author = thread.get("author_id")
+        self.author_codes.append(
+            -1
+            if author in (None, "")
+            else self.authors.setdefault(str(author), len(self.authors))
+        )
+        for name, field in TEXT_COLUMNS.items():
+            encoded = str(thread.get(field) or "").encode("utf-8")
+            self.spools[name].write(encoded)
+            self.offsets[name].append(self.offsets[name][-1] + len(encoded))
+        self.count += 1
+
+    def close(self, metadata=None):
+        for spool in self.spools.values():
+            spool.close()
+
+        rows = range(self.count)
+        date_order = array("i", sorted(rows, key=self.dates.__getitem__))
+        by_author = sorted(
+            (row for row in rows if self.author_codes[row] >= 0),
+            key=self.author_codes.__getitem__,
+        )
+        author_counts = [0] * len(self.authors)
+        for row in by_author:
+            author_counts[self.author_codes[row]] += 1
+        author_offsets = array("q", [0])
+        for count in author_counts:
+            author_offsets.append(author_offsets[-1] + count)
+
+        # name -> (dtype, item count, array in memory or spool path)
+        columns = {
+            "dates": ("<i8", self.count, self.dates),
+            "date_order": ("<i4", self.count, date_order),
+            "sorted_dates": (
+                "<i8",
+                self.count,
+                array("q", (self.dates[row] for row in date_order)),
+            ),
+            "author_codes": ("<i4", self.count, self.author_codes),
+            "author_order": ("<i4", len(by_author), array("i", by_author)),
+            "author_offsets": ("<i8", len(author_offsets), author_offsets),
+        }
+        for name in TEXT_COLUMNS:
+            columns[f"{name}_offsets"] = ("<i8", self.count + 1, self.offsets[name])
+            columns[f"{name}_bytes"] = (
+                "|u1",
+                self.offsets[name][-1],
+                self.spools[name].name,
+            )
+
+        metadata = dict(metadata or {})
+        if self.invalid_dates:
+            metadata["invalid_dates"] = self.invalid_dates
+        header = {
+            "rows": self.count,
+            "metadata": metadata,
+            "authors": list(self.authors),
+            "arrays": {},
+        }
+
+        # Array offsets depend on the header length, which depends on the offsets: iterate
+        header_length = 0
+        while True:
+            position = len(MAGIC) + 8 + header_length
+            for name, (dtype, size, _) in columns.items():
+                position = -(-position // ALIGNMENT) * ALIGNMENT
+                header["arrays"][name] = [dtype, position, size]
+                position += size * int(dtype[2:])
+            encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+            if len(encoded) == header_length:
+                break
+            header_length = len(encoded)
+
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(header_length.to_bytes(8, "little"))
+            f.write(encoded)
+            for name, (_, _, values) in columns.items():
+                f.write(b"\0" * (header["arrays"][name][1] - f.tell()))
+                if isinstance(values, str):
+                    with open(values, "rb") as spool:
+                        shutil.copyfileobj(spool, f)
+                else:
+                    little_endian(values).tofile(f)
+        os.replace(temp_path, self.path)
+        for spool in self.spools.values():
+            os.remove(spool.name)
+
+
+class ThreadStore:
+    """Read-only, memory-mapped view of a store written by ColumnarThreadWriter."""
+
+    def __init__(self, path):
+        import numpy as np
+
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a columnar thread store")
+            header_length = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_length))
+
+        self.path = path
+        self.rows = header["rows"]
+        self.metadata = header["metadata"]
+        self.authors = header["authors"]
+        self.author_index = {author: code for code, author in enumerate(self.authors)}
+        for name, (dtype, offset, size) in header["arrays"].items():
+            values = (
+                np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(size,))
+                if size
+                else np.zeros(0, dtype=dtype)
+            )
+            setattr(self, name, values)
+
+    def __len__(self):
+        return self.rows
+
+    def text(self, name, row):
+        """Decode one text column ("id", "title" or "body") of one row."""
+        offsets = getattr(self, f"{name}_offsets")
+        start, end = offsets[row], offsets[row + 1]
+        return getattr(self, f"{name}_bytes")[start:end].tobytes().decode("utf-8")
+
+    def thread(self, row):
+        """The thread dict of one row, in the threads_cleaned.json field layout."""
+        code = int(self.author_codes[row])
+        return {
+            "thread_id": self.text("id", row) or None,
+            "thread_date": format_thread_date(self.dates[row]),
+            "author_id": self.authors[code] if code >= 0 else None,
+            "thread_title": self.text("title", row),
+            "thread_body": self.text("body", row),
+        }
+
+    def threads(self, rows=None):
+        """Yield thread dicts for the given rows (default: all, in ingest order)."""
+        for row in range(self.rows) if rows is None else rows:
+            yield self.thread(int(row))
+
+    def rows_between(self, since=None, until=None):
+        """Rows dated in [since, until), ascending; threads without a date never match."""
+        import numpy as np
+
+        start = np.searchsorted(
+            self.sorted_dates,
+            parse_thread_date(since) if since else MISSING_DATE + 1,
+            side="left",
+        )
+        end = (
+            np.searchsorted(self.sorted_dates, parse_thread_date(until), side="left")
+            if until
+            else self.rows
+        )
+        return np.sort(self.date_order[start:end])
+
+    def rows_by_authors(self, author_ids):
+        """Rows written by any of the given author ids, ascending."""
+        import numpy as np
+
+        codes = sorted(
+            {
+                self.author_index[str(author)]
+                for author in author_ids
+                if str(author) in self.author_index
+            }
+        )
+        if not codes:
+            return np.zeros(0, dtype=np.int32)
+        return np.sort(
+            np.concatenate(
+                [
+                    self.author_order[self.author_offsets[c] : self.author_offsets[c + 1]]
+                    for c in codes
+                ]
+            )
+        )
+
+    def select(self, since=None, until=None, authors=None):
+        """Rows matching every given predicate (date window, author subset), ascending."""
+        import numpy as np
+
+        rows = None
+        if since or until:
+            rows = self.rows_between(since, until)
+        if authors is not None:
+            by_author = self.rows_by_authors(authors)
+            rows = (
+                by_author
+                if rows is None
+                else np.intersect1d(rows, by_author, assume_unique=True)
+            )
+        return np.arange(self.rows, dtype=np.int32) if rows is None else rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Columnar forum thread store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="Row count, date range, authors and metadata")
+    info.add_argument("store")
+    select = commands.add_parser("select", help="Print the threads matching the filters")
+    select.add_argument("store")
+    select.add_argument("--since", default=None, help="Earliest thread_date (inclusive)")
+    select.add_argument("--until", default=None, help="Latest thread_date (exclusive)")
+    select.add_argument("--author", action="append", default=None, metavar="ID")
+    select.add_argument("--show", type=int, default=10, help="Threads to print")
+    args = parser.parse_args()
+
+    store = ThreadStore(args.store)
+    if args.command == "info":
+        # Undated rows sort first (MISSING_DATE is the smallest int64)
+        undated = int(store.sorted_dates.searchsorted(MISSING_DATE + 1))
+        dated = store.sorted_dates[undated:]
+        first = format_thread_date(dated[0]) if len(dated) else None
+        last = format_thread_date(dated[-1]) if len(dated) else None
+        print(f"{args.store}: {len(store)} threads by {len(store.authors)} authors")
+        print(f"Dates: {first} .. {last} ({undated} undated)")
+        print(json.dumps(store.metadata, indent=2, ensure_ascii=False)[:2000])
+    else:
+        started = time.perf_counter()
+        rows = store.select(args.since, args.until, args.author)
+        elapsed = (time.perf_counter() - started) * 1000
+        for thread in store.threads(rows[: args.show]):
+            print(
+                f"{thread['thread_date']}  {thread['author_id'] or '-':>8}  "
+                f"{thread['thread_title']}"
+            )
+        print(f"({len(rows)} of {len(store)} threads selected in {elapsed:.2f} ms)")
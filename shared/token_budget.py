@@ -0,0 +1,154 @@
+"""
+Pre-flight token accounting: count the tokens every prompt of a run will send, estimate cost
+and latency, and enforce a configured budget before any API call is made.
+
+Tokens are counted with tiktoken when it is installed (Gemini prompts use the o200k_base
+encoding as an approximation) and fall back to the ~4 characters/token estimate otherwise.
+
+Input data sources: None
+Output destinations: None
+Dependencies: tiktoken (optional)
+Key exports: count_tokens(), preflight(), check_budget(), print_preflight_report(), BudgetExceeded, MODEL_PROFILES
+Side effects: None
+"""
+
+import functools
+import math
+
+from shared.concurrency import estimate_tokens
+
+# USD per 1M tokens, context window, typical output tokens per call (including reasoning)
+# and rough throughput figures used for the latency estimate.
+MODEL_PROFILES = {
+    "gpt-5-mini": {
+        "input_cost_per_million": 0.25,
+        "output_cost_per_million": 2.00,
+        "context_tokens": 272_000,
+        "expected_output_tokens": 1_200,
+        "output_tokens_per_second": 80,
+    },
+    "gemini-2.5-pro": {
+        "input_cost_per_million": 1.25,
+        "output_cost_per_million": 10.00,
+        "context_tokens": 1_048_576,
+        "expected_output_tokens": 8_000,
+        "output_tokens_per_second": 60,
+    },
+}
+
+DEFAULT_PROFILE = {
+    "input_cost_per_million": 0.0,
+    "output_cost_per_million": 0.0,
+    "context_tokens": 128_000,
+    "expected_output_tokens": 1_000,
+    "output_tokens_per_second": 60,
+}
+
+# Fixed per-call overhead and prompt processing rate for the latency estimate
+CALL_OVERHEAD_SECONDS = 0.8
+INPUT_TOKENS_PER_SECOND = 5_000
+
+
+class BudgetExceeded(Exception):
+    """Raised when a run's prompts exceed the configured token budget."""
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model):
+    """Return a tiktoken encoding for the model, or None when tiktoken is unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        encoding_name = tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        encoding_name = "o200k_base"
+
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception:
+        # Encoding files could not be loaded (e.g. offline); use the estimate instead
+        return None
+
+
+def count_tokens(text, model):
+    encoding = get_encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def preflight(prompts, model, concurrency=1, expected_output_tokens=None):
+    """Count the tokens of every prompt (an iterable, consumed once) and estimate cost and latency."""
+    profile = MODEL_PROFILES.get(model, DEFAULT_PROFILE)
+    if expected_output_tokens is None:
+        expected_output_tokens = profile["expected_output_tokens"]
+
+    calls = 0
+    total_input_tokens = 0
+    max_input_tokens = 0
+    for prompt in prompts:
+        tokens = count_tokens(prompt, model)
+        calls += 1
+        total_input_tokens += tokens
+        max_input_tokens = max(max_input_tokens, tokens)
+
+    total_output_tokens = calls * expected_output_tokens
+    cost = (
+        total_input_tokens * profile["input_cost_per_million"]
+        + total_output_tokens * profile["output_cost_per_million"]
+    ) / 1_000_000
+
+    serial_seconds = (
+        calls * CALL_OVERHEAD_SECONDS
+        + total_input_tokens / INPUT_TOKENS_PER_SECOND
+        + total_output_tokens / profile["output_tokens_per_second"]
+    )
+
+    return {
+        "model": model,
+        "tokenizer": "tiktoken" if get_encoding(model) is not None else "estimate",
+        "calls": calls,
+        "total_input_tokens": total_input_tokens,
+        "max_input_tokens": max_input_tokens,
+        "mean_input_tokens": total_input_tokens / calls if calls else 0,
+        "estimated_output_tokens": total_output_tokens,
+        "estimated_cost_usd": cost,
+        "estimated_seconds": serial_seconds / max(1, min(concurrency, calls or 1)),
+        "context_tokens": profile["context_tokens"],
+    }
+
+
+def check_budget(report, max_total_tokens=None, max_call_tokens=None):
+    """Raise BudgetExceeded if the report breaks the total or per-call limit (default: context window)."""
+    if max_call_tokens is None:
+        max_call_tokens = report["context_tokens"]
+
+    if report["max_input_tokens"] > max_call_tokens:
+        raise BudgetExceeded(
+            f"largest prompt is {report['max_input_tokens']:,} tokens, "
+            f"over the per-call limit of {max_call_tokens:,}"
+        )
+
+    if max_total_tokens is not None and report["total_input_tokens"] > max_total_tokens:
+        raise BudgetExceeded(
+            f"run would send {report['total_input_tokens']:,} input tokens, "
+            f"over the budget of {max_total_tokens:,}"
+        )
+
+
+def print_preflight_report(report):
+    minutes = math.ceil(report["estimated_seconds"] / 60)
+    print(f"🧮 Pre-flight for {report['model']} ({report['tokenizer']} token counts):")
+    print(f"   Calls: {report['calls']:,}")
+    print(
+        f"   Input tokens: {report['total_input_tokens']:,} total, "
+        f"{report['max_input_tokens']:,} max/call, "
+        f"{report['mean_input_tokens']:,.0f} mean/call "
+        f"(context window {report['context_tokens']:,})"
+    )
+    print(f"   Estimated output tokens: {report['estimated_output_tokens']:,}")
+    print(f"   Estimated cost: ${report['estimated_cost_usd']:,.2f}")
+    print(f"   Estimated wall time: ~{minutes} min")
@@ -0,0 +1,64 @@
+"""
+Shared pytest fixtures: a fake monotonic clock and loaders for the pipeline scripts, whose
+file names (discussion-questions.py, ...) are not importable as modules.
+
+Input data sources: The pipeline scripts (imported by path)
+Output destinations: None
+Dependencies: pytest
+Key exports: load_script(), clock fixture
+Side effects: Adds the repo root and the loaded scripts' directories to sys.path
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Make the repo-level shared helpers importable however pytest is invoked
+sys.path.insert(0, REPO_DIR)
+
+SCRIPTS = {
+    "process_threads": "1-discussion-forum/process_threads.py",
+    "dimensions": "1-discussion-forum/generate-questions/final-dimensions/generate-dimensions.py",
+    "discussion": "1-discussion-forum/generate-questions/questions/discussion-questions.py",
+    "classification": "2-prompt-classification/generate-questions/prompt-classify-questions.py",
+    "classify_threads": "2-prompt-classification/classify_threads.py",
+}
+
+_modules = {}
+
+
+def load_script(name):
+    """Import one of the pipeline scripts by path (once per test session)."""
+    if name not in _modules:
+        path = os.path.join(REPO_DIR, SCRIPTS[name])
+        spec = importlib.util.spec_from_file_location(f"script_{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        sys.path.insert(0, os.path.dirname(path))
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return _modules[name]
+
+
+class FakeClock:
+    """Stand-in for time.monotonic() that only moves when a test advances it."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A FakeClock patched in as time.monotonic()."""
+    fake = FakeClock()
+    monkeypatch.setattr("time.monotonic", fake)
+    return fake
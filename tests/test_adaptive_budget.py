@@ -0,0 +1,77 @@
+import itertools
+import json
+
+from conftest import load_script
+from shared.adaptive_budget import AdaptiveBudget
+from shared.fake_llm import FakeChatModel
+
+WORDS = [f"word{i}" for i in range(400)]
+
+
+def fresh_text(k):
+    """A question sharing no word with any other fresh_text()."""
+    return " ".join(WORDS[8 * k : 8 * k + 8])
+
+
+def test_saturated_slices_stop_getting_calls():
+    budget = AdaptiveBudget(
+        {"repeats": itertools.repeat("r"), "varied": itertools.repeat("v")},
+        max_calls=40,
+        round_calls=6,
+        min_novelty=0.6,
+    )
+    counter = itertools.count()
+
+    first = budget.next_round()
+    assert sorted(first) == [("repeats", "r")] * 2 + [("varied", "v")] * 2
+    for key, _ in first:
+        text = "same question" if key == "repeats" else fresh_text(next(counter))
+        budget.observe(key, text)
+
+    second = budget.next_round()
+    assert budget.saturated == {"repeats"}
+    assert second == [("varied", "v")] * 6
+    assert budget.rates == {"repeats": 0.5, "varied": 1.0}
+
+
+def test_stops_at_the_diversity_target_or_when_slices_run_out():
+    budget = AdaptiveBudget(
+        {"a": range(3), "b": range(3)}, max_calls=10, diversity_target=3
+    )
+    calls = budget.next_round()
+    assert len(calls) == 3  # only as many calls as novel questions are still missing
+    for k, (key, _) in enumerate(calls):
+        budget.observe(key, fresh_text(k))
+    assert budget.next_round() == []
+    assert budget.stop_reason == "reached 3 novel questions"
+
+    budget = AdaptiveBudget({"a": range(1), "b": range(1)}, max_calls=10)
+    for k, (key, _) in enumerate(budget.next_round()):
+        budget.observe(key, fresh_text(k))
+    assert budget.next_round() == []
+    assert budget.exhausted == {"a", "b"}
+
+
+def test_async_adaptive_rounds_keep_every_call_under_aimd(tmp_path, capsys):
+    discussion = load_script("discussion")
+    output_path = tmp_path / "questions.json"
+
+    # Several asyncio.run() rounds share one AIMD controller; the fake latency makes
+    # calls queue for its slots, so every round waits on the controller's condition
+    results = discussion.generate_questions(
+        llm=FakeChatModel(latency=0.003, seed=1),
+        use_async=True,
+        adaptive=True,
+        concurrency=8,
+        diversity_target=40,
+        round_calls=12,
+        use_cache=False,
+        output_path=str(output_path),
+    )
+
+    output = capsys.readouterr().out
+    assert "🎯 Round 3:" in output
+    with open(tmp_path / "questions.metrics.jsonl", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert {record["outcome"] for record in records} == {"ok"}
+    assert results.total_generated == len(records) >= 40
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from conftest import load_script
+from shared.batch_jobs import (
+    ResultJoin,
+    model_from_schema,
+    read_manifest,
+    run_local,
+    write_manifest,
+)
+from shared.fake_llm import FakeChatModel
+
+
+def write_lines(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    classification = load_script("classification")
+    path = tmp_path / "manifest.jsonl"
+    write_manifest(
+        str(path),
+        "prompt-classify-questions",
+        "model",
+        {"SimpleQuestion": classification.SimpleQuestion},
+        ((i, "SimpleQuestion", f"prompt {i}", {"i": i}) for i in range(1, 5)),
+    )
+    return path
+
+
+def test_custom_ids_change_with_the_prompt(manifest, tmp_path):
+    header, requests = read_manifest(str(manifest))
+    requests = list(requests)
+    assert header["generator"] == "prompt-classify-questions"
+    assert [request["index"] for request in requests] == [1, 2, 3, 4]
+
+    classification = load_script("classification")
+    edited = tmp_path / "edited.jsonl"
+    write_manifest(
+        str(edited),
+        "prompt-classify-questions",
+        "model",
+        {"SimpleQuestion": classification.SimpleQuestion},
+        [(1, "SimpleQuestion", "prompt 1", {}), (2, "SimpleQuestion", "edited", {})],
+    )
+    _, edited_requests = read_manifest(str(edited))
+    edited_ids = [request["custom_id"] for request in edited_requests]
+    assert edited_ids[0] == requests[0]["custom_id"]
+    assert edited_ids[1] != requests[1]["custom_id"]
+
+
+def test_join_parses_text_outputs_and_reports_every_kind_of_failure(manifest, tmp_path):
+    _, requests = read_manifest(str(manifest))
+    ids = [request["custom_id"] for request in requests]
+    results = tmp_path / "results.jsonl"
+    write_lines(
+        results,
+        [
+            {"custom_id": ids[0], "error": "timeout"},
+            {"custom_id": ids[0], "output": '{"question": "retried"}'},
+            {"custom_id": ids[1], "output": "not json"},
+            {"custom_id": ids[2], "error": "server error"},
+            {"custom_id": "9-stale", "output": {"question": "x"}},
+        ],
+    )
+
+    join = ResultJoin(str(manifest), str(results), "prompt-classify-questions")
+    joined = list(join)
+    assert [(request["index"], output) for request, output in joined] == [
+        (1, {"question": "retried"})
+    ]
+    assert join.missing == [4]
+    assert [index for index, _ in join.failed] == [2, 3]
+    assert join.unmatched == 1
+    assert join.joined == 1
+
+    # An output the caller rejects is a failure, not a join
+    join.record_failure(joined[0][0], ValueError("no question"))
+    assert join.joined == 0
+    assert [index for index, _ in join.failed] == [2, 3, 1]
+
+    with pytest.raises(ValueError, match="not discussion-questions"):
+        ResultJoin(str(manifest), str(results), "discussion-questions")
+
+
+def test_model_from_schema_rebuilds_list_fields():
+    classification = load_script("classification")
+    schema = classification.QuestionList.model_json_schema()
+    rebuilt = model_from_schema("QuestionList", schema)
+    assert rebuilt(questions=["a", "b"]).model_dump() == {"questions": ["a", "b"]}
+
+
+def test_render_run_local_and_ingest_into_a_new_directory(tmp_path):
+    classification = load_script("classification")
+    manifest = str(tmp_path / "manifest.jsonl")
+    results = str(tmp_path / "results.jsonl")
+    assert classification.render_manifest(manifest, target_count=7, questions_per_call=3) == 3
+
+    succeeded, failed = run_local(
+        manifest, results, FakeChatModel(error_rate=0.4, error_status=400, seed=2)
+    )
+    assert succeeded + failed == 3 and succeeded and failed
+
+    output_path = tmp_path / "nested" / "out" / "questions.json"
+    classification.ingest_results(manifest, results, str(output_path))
+    with open(output_path, encoding="utf-8") as f:
+        output = json.load(f)
+    slots_per_call = [3, 3, 1]
+    with open(results, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    answered = [int(r["custom_id"].split("-")[0]) for r in records if "output" in r]
+    assert output["total_generated"] == sum(slots_per_call[i - 1] for i in answered)
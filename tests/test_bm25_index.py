@@ -0,0 +1,77 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from shared.bm25_index import BM25Index, build_index, read_threads, tokenize
+
+THREADS = [
+    {"thread_title": "Employment counsel", "thread_body": "severance dispute in California"},
+    {"thread_title": "SaaS renewals", "thread_body": "vendor contract template auto renew"},
+    {"thread_title": "Vendor contract", "thread_body": "vendor vendor vendor liability cap"},
+    {"thread_title": "Privacy program", "thread_body": "board benchmark privacy audit"},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "threads.bm25")
+    assert build_index(THREADS, path) == 4
+    return BM25Index(path)
+
+
+def naive_bm25(query, threads, k1=1.2, b=0.75):
+    documents = [tokenize(f"{t['thread_title']} {t['thread_body']}") for t in threads]
+    average_length = sum(map(len, documents)) / len(documents)
+    scores = []
+    for document in documents:
+        score = 0.0
+        for term in set(tokenize(query)):
+            frequency = document.count(term)
+            containing = sum(term in d for d in documents)
+            if not frequency:
+                continue
+            idf = math.log1p((len(documents) - containing + 0.5) / (containing + 0.5))
+            norm = k1 * (1 - b + b * len(document) / average_length)
+            score += idf * frequency * (k1 + 1) / (frequency + norm)
+        scores.append(score)
+    return scores
+
+
+def test_scores_match_the_bm25_formula(index):
+    query = "Which vendor contract template for a liability cap?"
+    assert np.allclose(index.scores(query), naive_bm25(query, THREADS), rtol=1e-5)
+
+
+def test_search_ranks_best_first_and_drops_non_matching_threads(index):
+    results = index.search("vendor contract", k=4)
+    assert [thread["thread_title"] for _, thread in results] == [
+        "Vendor contract",
+        "SaaS renewals",
+    ]
+    assert results[0][0] > results[1][0] > 0
+    assert index.search("the and of", k=3) == []
+    assert index.search("unknownword", k=3) == []
+
+
+def test_long_queries_keep_their_rarest_terms(index):
+    # "vendor" is in two threads; "severance" only in the first
+    assert index.search("vendor severance", k=1, max_terms=1)[0][1] == THREADS[0]
+
+
+def test_empty_index_and_jsonl_input(tmp_path):
+    path = str(tmp_path / "empty.bm25")
+    assert build_index([], path) == 0
+    assert len(BM25Index(path)) == 0 and BM25Index(path).search("vendor") == []
+
+    jsonl = tmp_path / "threads.jsonl"
+    jsonl.write_text("".join(json.dumps(t) + "\n" for t in THREADS) + "\n")
+    assert list(read_threads(str(jsonl))) == THREADS
+
+
+def test_file_without_magic_is_rejected(tmp_path):
+    path = tmp_path / "bogus.bm25"
+    path.write_bytes(b"not an index")
+    with pytest.raises(ValueError, match="not a BM25 index"):
+        BM25Index(str(path))
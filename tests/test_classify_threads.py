@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pytest
+
+from conftest import load_script
+
+
+@pytest.fixture
+def classify(tmp_path):
+    module = load_script("classify_threads")
+    categories = module.load_categories()
+
+    # One thread per category example, plus two that share no word with any category
+    threads = [
+        {"thread_id": i, "thread_title": "", "thread_body": example}
+        for i, example in enumerate(
+            example for data in categories.values() for example in data["examples"]
+        )
+    ]
+    threads.append({"thread_id": "stopwords", "thread_title": "the", "thread_body": "and of"})
+    threads.append({"thread_id": "unrelated", "thread_title": "", "thread_body": "zzyzx qqxq"})
+    threads_path = tmp_path / "threads.jsonl"
+    threads_path.write_text("".join(json.dumps(t) + "\n" for t in threads))
+
+    def run(**options):
+        output_path = tmp_path / "labels.jsonl"
+        frequencies = module.classify_threads(
+            threads_path=str(threads_path),
+            output_path=str(output_path),
+            frequencies_path=str(tmp_path / "frequencies.json"),
+            **options,
+        )
+        with open(output_path, encoding="utf-8") as f:
+            labels = {record["thread_id"]: record for record in map(json.loads, f)}
+        return labels, frequencies
+
+    return module, run
+
+
+def test_threads_matching_no_category_are_never_labeled(classify):
+    _, run = classify
+    labels, frequencies = run(min_similarity=0.0)
+    for thread_id in ("stopwords", "unrelated"):
+        assert labels[thread_id]["category"] is None
+        assert labels[thread_id]["confidence"] is None
+        assert labels[thread_id]["similarity"] == 0.0
+
+    others = [record for key, record in labels.items() if isinstance(key, int)]
+    assert all(record["category"] is not None for record in others)
+    assert sum(frequencies.values()) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_default_threshold_leaves_the_weakest_matches_unlabeled(classify):
+    module, run = classify
+    labels, _ = run()
+    matched = [r["similarity"] for r in labels.values() if r["similarity"] > 0]
+    threshold = np.percentile(np.array(matched, dtype=np.float32), module.UNLABELED_PERCENTILE)
+
+    for record in labels.values():
+        expected = record["similarity"] > 0 and record["similarity"] >= threshold - 1e-4
+        assert (record["category"] is not None) == expected
+    unlabeled = sum(record["category"] is None for record in labels.values())
+    assert 2 < unlabeled < 2 + 0.1 * len(matched)
+
+
+def test_examples_mostly_land_in_their_own_category(classify):
+    module, run = classify
+    labels, _ = run(min_similarity=0.0)
+    expected = [
+        key for key, data in module.load_categories().items() for _ in data["examples"]
+    ]
+    hits = sum(labels[i]["category"] == key for i, key in enumerate(expected))
+    assert hits >= 0.8 * len(expected)
@@ -0,0 +1,114 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import REPO_DIR
+
+CLI = os.path.join(REPO_DIR, "cli.py")
+
+# Seconds per subcommand (best of two fresh interpreters); render --output and batch load
+# the generators' pydantic schemas, the rest only the standard library and shared helpers
+BUDGET = 0.25
+SCHEMA_BUDGET = 1.0
+HEAVY = {"langchain", "langchain_core", "langchain_openai", "dotenv", "numpy"}
+
+# name -> (arguments, budget, may import pydantic); in order, batch needs the manifest
+COMMANDS = {
+    "help": ([], BUDGET, False),
+    "ingest": (
+        [
+            "ingest",
+            "--stream",
+            "--input",
+            "{dir}/threads.csv",
+            "--output",
+            "{dir}/threads.json",
+            "--no-columnar",
+        ],
+        BUDGET,
+        False,
+    ),
+    "plan": (["plan", "--show", "0"], BUDGET, False),
+    "render": (["render", "discussion", "--index", "1"], BUDGET, False),
+    "render-manifest": (
+        ["render", "classification", "--count", "6", "--output", "{dir}/manifest.jsonl"],
+        SCHEMA_BUDGET,
+        True,
+    ),
+    "batch-run-local": (
+        ["batch", "run-local", "{dir}/manifest.jsonl", "{dir}/results.jsonl"],
+        SCHEMA_BUDGET,
+        True,
+    ),
+    "batch-ingest": (
+        [
+            "batch",
+            "ingest",
+            "{dir}/manifest.jsonl",
+            "{dir}/results.jsonl",
+            "--output",
+            "{dir}/ingested.json",
+        ],
+        SCHEMA_BUDGET,
+        True,
+    ),
+    "convert": (["convert", "{dir}/questions.json", "{dir}/questions.jsonl"], BUDGET, False),
+    "stats": (["stats", "{dir}/questions.json"], BUDGET, False),
+}
+
+
+def command(name, directory, *python_flags):
+    arguments = [part.format(dir=directory) for part in COMMANDS[name][0]]
+    return subprocess.run(
+        [sys.executable, *python_flags, CLI, *arguments],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+    )
+
+
+@pytest.fixture(scope="module")
+def workdir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("cli")
+    (directory / "threads.csv").write_text(
+        '"thread_id","thread_date","author_id","thread_title","thread_body"\n'
+        '1,"2025-08-01 09:30:00+00",7,"Title","Looking for employment counsel"\n'
+    )
+    category = {"category": "c", "instruction": "i", "examples": []}
+    questions = [{"question": f"Q{i}?", "category_info": category} for i in range(5)]
+    (directory / "questions.json").write_text(
+        json.dumps({"questions": questions, "total_generated": 5})
+    )
+    for name in ("render-manifest", "batch-run-local"):
+        assert command(name, directory).returncode == 0
+    return directory
+
+
+def imported_packages(completed):
+    """Top-level package names from -X importtime output."""
+    return {
+        line.rsplit("|", 1)[1].strip().split(".")[0]
+        for line in completed.stderr.splitlines()
+        if line.startswith("import time:") and line.count("|") == 2
+    }
+
+
+@pytest.mark.parametrize("name", list(COMMANDS))
+def test_subcommand_starts_within_its_budget(name, workdir):
+    _, budget, uses_schemas = COMMANDS[name]
+
+    traced = command(name, workdir, "-X", "importtime")
+    assert traced.returncode == 0, traced.stderr[-2000:]
+    heavy = HEAVY if uses_schemas else HEAVY | {"pydantic"}
+    assert imported_packages(traced) & heavy == set()
+
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        assert command(name, workdir).returncode == 0
+        timings.append(time.perf_counter() - started)
+    assert min(timings) <= budget, f"cli.py {name}: {min(timings):.3f}s > {budget}s"
@@ -0,0 +1,74 @@
+import itertools
+import math
+
+import pytest
+
+from conftest import load_script
+from shared.combination_planner import (
+    CombinationPlan,
+    coverage_report,
+    covering_array,
+    plan_combinations,
+)
+
+
+def interactions(rows, parameters):
+    return {tuple(row[p] for p in parameters) for row in rows}
+
+
+@pytest.mark.parametrize(
+    "sizes, strength", [([3, 3, 3, 3], 2), ([2, 4, 3, 6], 2), ([3, 2, 3, 2], 3)]
+)
+def test_covering_array_covers_every_t_way_interaction(sizes, strength):
+    rows = covering_array(sizes, strength=strength)
+    for parameters in itertools.combinations(range(len(sizes)), strength):
+        expected = set(itertools.product(*(range(sizes[p]) for p in parameters)))
+        assert interactions(rows, parameters) == expected
+    # Never fewer rows than the largest t-way product, far fewer than the full product
+    assert len(rows) >= math.prod(sorted(sizes)[-strength:])
+    assert len(rows) < math.prod(sizes)
+
+
+def test_covering_array_is_deterministic_for_a_seed():
+    assert covering_array([3, 4, 5], seed=7) == covering_array([3, 4, 5], seed=7)
+
+
+def test_weights_decide_what_a_capped_array_covers_first():
+    sizes = [4, 4, 4]
+    # Value 0 of parameter 0 is the only interaction that matters much
+    weights = [[100, 1, 1, 1], [1, 1, 1, 1], [1, 1, 1, 1]]
+    rows = covering_array(sizes, weights=weights, max_rows=4)
+    assert len(rows) == 4
+    assert all(row[0] == 0 for row in rows)
+
+    plan = CombinationPlan([list("abcd")] * 3, rows)
+    report = coverage_report(plan, weights=weights)
+    assert report["weighted_coverage"] > report["coverage"]
+
+
+def test_plans_expose_values_and_report_coverage():
+    lists = [["a", "b"], ["x", "y", "z"], ["1", "2"]]
+    full = plan_combinations(lists)
+    assert len(full) == 12
+    assert list(full) == list(itertools.product(*lists))
+    assert coverage_report(full)["coverage"] == 1.0
+
+    covering = plan_combinations(lists, strategy="covering")
+    assert len(covering) < 12
+    assert set(next(iter(covering))) <= {v for values in lists for v in values}
+    report = coverage_report(covering)
+    assert report["coverage"] == 1.0 and report["full_product_rows"] == 12
+
+    with pytest.raises(ValueError):
+        plan_combinations(lists, strategy="random")
+
+
+def test_the_discussion_dimensions_need_far_fewer_pairwise_rows():
+    discussion = load_script("discussion")
+    dimensions = discussion.load_dimensions()
+    full = discussion.generate_dimension_combinations(dimensions)
+    covering = discussion.generate_dimension_combinations(
+        dimensions, strategy="covering", strength=2
+    )
+    assert len(covering) < len(full) / 3
+    assert coverage_report(covering, strength=2)["coverage"] == 1.0
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from shared.compact_output import iter_any, iter_compact, read_compact, write_compact
+
+LEGAL = {"category": "legal", "instruction": "i", "examples": ["a", "b"]}
+TAX = {"category": "tax", "instruction": "j", "examples": []}
+
+QUESTIONS = [
+    {"question": "q1", "category_info": LEGAL},
+    {"question": "q2", "category_info": TAX},
+    {"question": "q3", "category_info": dict(LEGAL)},
+    {"question": "q4", "category_info": LEGAL},
+]
+
+
+def test_jsonl_stores_each_reference_once_and_round_trips(tmp_path):
+    path = str(tmp_path / "questions.jsonl")
+    assert write_compact(path, enumerate(QUESTIONS, 1)) == 4
+
+    with open(path, encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["ref"] for line in lines if "ref" in line] == [0, 1]
+    assert [line["category_info"] for line in lines if "index" in line] == [0, 1, 0, 0]
+
+    assert read_compact(path) == {"questions": QUESTIONS, "total_generated": 4}
+    assert [q["category_info"] for q in iter_compact(path, rehydrate=False)] == [0, 1, 0, 0]
+
+
+def test_json_and_compact_inputs_yield_the_same_pairs(tmp_path):
+    json_path = tmp_path / "questions.json"
+    json_path.write_text(json.dumps({"questions": QUESTIONS, "total_generated": 4}))
+    compact_path = str(tmp_path / "questions.jsonl")
+    write_compact(compact_path, iter_any(str(json_path)))
+
+    assert list(iter_any(compact_path)) == list(iter_any(str(json_path)))
+
+
+def test_unknown_extension_is_rejected_without_writing(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported compact format"):
+        write_compact(str(tmp_path / "questions.csv"), enumerate(QUESTIONS, 1))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_parquet_round_trips(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "questions.parquet")
+    assert write_compact(path, enumerate(QUESTIONS, 1)) == 4
+    assert read_compact(path)["questions"] == QUESTIONS
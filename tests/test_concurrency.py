@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from shared.concurrency import (
+    RateLimiter,
+    TokenBucket,
+    estimate_tokens,
+    gather_in_order,
+    prompt_text,
+    run_batch,
+)
+
+
+def test_token_bucket_starts_full_and_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate_per_minute=60)  # one token per second, capacity 60
+
+    assert bucket.delay(60) == 0.0
+    bucket.take(60)
+    assert bucket.delay(1) == pytest.approx(1.0)
+    assert bucket.delay(5) == pytest.approx(5.0)
+
+    clock.advance(2.5)
+    assert bucket.delay(1) == 0.0
+    assert bucket.delay(5) == pytest.approx(2.5)
+
+
+def test_token_bucket_never_refills_past_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=10)
+    clock.advance(3600)
+    bucket.refill()
+    assert bucket.tokens == 10
+
+
+def test_token_bucket_caps_oversized_requests_at_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60, capacity=10)
+    # More than the bucket can ever hold would otherwise wait forever
+    assert bucket.delay(1000) == 0.0
+    bucket.take(1000)
+    assert bucket.tokens == 0
+    assert bucket.delay(1000) == pytest.approx(10.0)
+
+
+def test_rate_limiter_try_acquire_takes_nothing_unless_both_buckets_allow(clock):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600)
+    limiter.token_bucket.take(600)
+
+    delay = limiter.try_acquire(tokens=100)
+    assert delay == pytest.approx(10.0)
+    # The request bucket was not charged for the refused call
+    assert limiter.request_bucket.tokens == 60
+
+    clock.advance(10)
+    assert limiter.try_acquire(tokens=100) == 0.0
+    assert limiter.request_bucket.tokens == 59
+
+
+def test_rate_limiter_acquire_waits_for_the_missing_tokens(clock, monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        clock.advance(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    limiter = RateLimiter(requests_per_minute=60)
+    limiter.request_bucket.take(60)
+
+    waited = asyncio.run(limiter.acquire())
+    assert waited == pytest.approx(1.0)
+    assert slept == [pytest.approx(1.0)]
+
+
+def test_gather_in_order_keeps_item_order_and_bounds_concurrency():
+    in_flight = 0
+    peak = 0
+
+    async def worker(index, item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Later items finish first
+        await asyncio.sleep(0.001 * (10 - index))
+        in_flight -= 1
+        return item * 2
+
+    items = ((i, i) for i in range(10))
+    results = asyncio.run(gather_in_order(items, worker, concurrency=3))
+    assert results == [i * 2 for i in range(10)]
+    assert peak == 3
+
+
+def test_run_batch_returns_exceptions_in_place():
+    def invoke(prompt, config=None):
+        if prompt == "bad":
+            raise ValueError(prompt)
+        return prompt.upper()
+
+    results = run_batch(
+        invoke, ["a", "bad", "c"], {"max_concurrency": 2}, return_exceptions=True
+    )
+    assert results[0] == "A" and results[2] == "C"
+    assert isinstance(results[1], ValueError)
+    with pytest.raises(ValueError):
+        run_batch(invoke, ["bad"])
+
+
+def test_prompt_text_and_token_estimate():
+    class Message:
+        content = "hello"
+
+    assert prompt_text("plain") == "plain"
+    assert prompt_text([Message(), Message()]) == "hello\nhello"
+    assert estimate_tokens("x" * 40) == 10
+    assert estimate_tokens("", completion_tokens=5) == 6
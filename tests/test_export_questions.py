@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+
+import pytest
+
+from shared.compact_output import write_compact
+from shared.export_questions import StreamReader, export_questions, iter_json_questions
+
+DIMENSION = {"dimension": "d", "description": "x", "examples": []}
+DIMENSION_QUESTION = {
+    "question": 'Say "hi", then, leave',
+    "intent_dimension": DIMENSION,
+    "specificity_dimension": DIMENSION,
+    "domain_dimension": DIMENSION,
+    "persona_dimension": dict(DIMENSION, dimension="p"),
+}
+CATEGORY_QUESTION = {
+    "question": "q",
+    "category_info": {"category": "c", "instruction": "i", "examples": ["a", "b"]},
+}
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_stream_reader_decodes_values_split_across_chunks():
+    text = '  [12345, "long string", {"a": [1, 2]}]'
+    reader = StreamReader(io.StringIO(text), chunk_size=3)
+    reader.expect("[")
+    values = []
+    while reader.peek() != "]":
+        values.append(reader.value())
+        if reader.peek() == ",":
+            reader.expect(",")
+    assert values == [12345, "long string", {"a": [1, 2]}]
+
+
+def test_json_questions_are_streamed_whatever_the_key_order(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text(
+        json.dumps({"total_generated": 2, "questions": [CATEGORY_QUESTION] * 2, "x": [1]})
+    )
+    assert list(iter_json_questions(str(path))) == [CATEGORY_QUESTION] * 2
+
+
+def test_dimension_json_exports_to_csv(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps({"questions": [DIMENSION_QUESTION], "total_generated": 1}))
+
+    output_path, schema, count = export_questions(str(path))
+    assert (schema, count) == ("dimension", 1)
+    assert output_path == str(tmp_path / "questions.csv")
+    assert read_csv(output_path) == [
+        [
+            "Question",
+            "Intent_Dimension",
+            "Specificity_Dimension",
+            "Domain_Dimension",
+            "Persona_Dimension",
+        ],
+        ['Say "hi", then, leave', "d", "d", "d", "p"],
+    ]
+
+
+def test_compact_category_input_exports_with_joined_examples(tmp_path):
+    path = str(tmp_path / "questions.jsonl")
+    write_compact(path, enumerate([CATEGORY_QUESTION] * 3, 1))
+
+    output_path, schema, count = export_questions(path, str(tmp_path / "out.csv"))
+    assert (schema, count) == ("category", 3)
+    assert read_csv(output_path)[1] == ["q", "c", "i", "a | b"]
+
+
+def test_empty_input_gets_a_header_only_file(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text('{"questions": [], "total_generated": 0}')
+    output_path, _, count = export_questions(str(path))
+    assert count == 0 and len(read_csv(output_path)) == 1
+
+
+def test_unrecognized_schema_and_format_are_rejected(tmp_path):
+    path = tmp_path / "questions.json"
+    path.write_text(json.dumps({"questions": [{"question": "q"}]}))
+    with pytest.raises(ValueError, match="Unrecognized question schema"):
+        export_questions(str(path))
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        export_questions(str(path), str(tmp_path / "out.xlsx"))
@@ -0,0 +1,133 @@
+import pytest
+from langchain_core.messages import AIMessage
+
+from conftest import load_script
+from shared.fake_llm import FakeChatModel, FakeProviderError
+from shared.llm_cache import LLMCache
+from shared.telemetry import CallMetrics
+
+
+@pytest.fixture
+def dimensions():
+    return load_script("dimensions")
+
+
+def threads(count):
+    return [
+        {"thread_title": f"Thread {i}", "thread_body": f"Question number {i} " * 40}
+        for i in range(count)
+    ]
+
+
+class ShardModel(FakeChatModel):
+    """FakeChatModel that fails every shard whose prompt contains `poison`."""
+
+    def __init__(self, poison=None, malformed=False):
+        super().__init__(model="gemini-2.5-pro")
+        self.poison = poison
+        self.malformed = malformed
+        self.prompts = []
+
+    async def ainvoke(self, prompt, config=None, **kwargs):
+        text = prompt[0].content
+        self.prompts.append(text)
+        if self.poison and self.poison in text:
+            if self.malformed:
+                # A truncated answer: the call succeeds but the JSON does not parse
+                return AIMessage(content='```json\n{"Fake Category": [{"dimen')
+            raise FakeProviderError("bad shard", status_code=400)
+        return await super().ainvoke(prompt, config, **kwargs)
+
+
+def test_shards_keep_thread_order_and_fit_the_budget(dimensions):
+    shards = dimensions.shard_threads(threads(30), max_tokens_per_shard=1000)
+    assert len(shards) > 1
+    assert [t for shard in shards for t in shard] == threads(30)
+    for shard in shards:
+        text = dimensions.prepare_conversations_text({"threads": shard})
+        assert len(shard) == 1 or dimensions.count_tokens(
+            text, dimensions.MODEL_NAME
+        ) <= 1000 + 10
+
+
+def test_merge_dimensions_unifies_names_and_dedupes_examples(dimensions):
+    first_shard = {
+        "Intent & Task": [
+            {"dimension": "Referral", "description": "short", "examples": ["Need a  lawyer"]}
+        ]
+    }
+    second_shard = {
+        "intent and task": [
+            {"dimension": "Policy", "description": "d", "examples": []},
+            {
+                "dimension": "referral",
+                "description": "a longer description",
+                "examples": ["need a lawyer", "Any firm in Austin?"],
+            },
+        ]
+    }
+    merged = dimensions.merge_dimensions([first_shard, second_shard])
+    assert merged == {
+        "Intent & Task": [
+            {
+                "dimension": "Referral",
+                "description": "a longer description",
+                "examples": ["Need a  lawyer", "Any firm in Austin?"],
+            },
+            {"dimension": "Policy", "description": "d", "examples": []},
+        ]
+    }
+
+
+def test_finished_shards_are_cached_even_when_another_shard_fails(
+    dimensions, tmp_path, monkeypatch
+):
+    prompts = dimensions.create_shard_prompts(threads(30), shard_tokens=1000)
+    assert len(prompts) >= 3
+    cache = LLMCache(tmp_path / "cache.sqlite3")
+    metrics = CallMetrics(None, "generate-dimensions", dimensions.MODEL_NAME)
+
+    # The last shard fails after the others have finished
+    poison = "Question number 29"
+    failing = ShardModel(poison)
+    monkeypatch.setattr(dimensions, "create_llm", lambda: failing)
+    with pytest.raises(FakeProviderError):
+        dimensions.run_sharded_analysis(prompts, 30, 1, cache, metrics)
+    assert cache.stats()["entries"] == len(prompts) - 1
+
+    # The re-run only pays for the failed shard
+    healthy = ShardModel()
+    monkeypatch.setattr(dimensions, "create_llm", lambda: healthy)
+    result = dimensions.run_sharded_analysis(prompts, 30, 4, cache, metrics)
+    assert len(healthy.prompts) == 1 and poison in healthy.prompts[0]
+    assert f"merged from {len(prompts)} shards of 30 threads" in result
+    cache.close()
+
+
+def test_unparseable_shards_are_not_cached(dimensions, tmp_path, monkeypatch):
+    prompts = dimensions.create_shard_prompts(threads(30), shard_tokens=1000)
+    cache = LLMCache(tmp_path / "cache.sqlite3")
+    metrics = CallMetrics(None, "generate-dimensions", dimensions.MODEL_NAME)
+
+    poison = "Question number 29"
+    monkeypatch.setattr(dimensions, "create_llm", lambda: ShardModel(poison, True))
+    with pytest.raises(ValueError, match="no usable dimensions JSON"):
+        dimensions.run_sharded_analysis(prompts, 30, 1, cache, metrics)
+    assert cache.stats()["entries"] == len(prompts) - 1
+    assert [r["outcome"] for r in metrics.records].count("ok") == len(prompts) - 1
+
+    # The re-run asks the model again for the malformed shard instead of failing on it
+    healthy = ShardModel()
+    monkeypatch.setattr(dimensions, "create_llm", lambda: healthy)
+    result = dimensions.run_sharded_analysis(prompts, 30, 4, cache, metrics)
+    assert len(healthy.prompts) == 1 and poison in healthy.prompts[0]
+    assert f"merged from {len(prompts)} shards of 30 threads" in result
+    cache.close()
+
+
+def test_shard_responses_need_dimension_entries(dimensions):
+    valid = '```json\n{"Intent": [{"dimension": "Referral"}], "notes": "x"}\n```'
+    assert dimensions.parse_shard_dimensions(valid)["Intent"][0]["dimension"] == "Referral"
+    for text in ["no json here", '```json\n{"Intent": [{"name": "Referral"}]}\n```', "[1]"]:
+        with pytest.raises(ValueError):
+            dimensions.parse_shard_dimensions(text)
@@ -0,0 +1,93 @@
+import json
+
+from conftest import load_script
+from shared.fake_llm import FakeChatModel
+from shared.journal import QuestionJournal, journal_path_for
+
+
+def question(text):
+    category = {"category": "c", "instruction": "i", "examples": []}
+    return {"question": text, "category_info": category}
+
+
+def test_journal_path_sits_next_to_the_output():
+    assert journal_path_for("out/questions.json") == "out/questions.journal.jsonl"
+
+
+def test_compact_matches_the_question_results_layout(tmp_path):
+    journal = QuestionJournal(str(tmp_path / "q.journal.jsonl")).open()
+    journal.append(2, question("second"))
+    journal.append(1, question("first"))
+    journal.append(2, question("second, regenerated"))  # later entries win
+    journal.close()
+
+    output = tmp_path / "q.json"
+    assert journal.compact(str(output)) == 2
+    expected = {
+        "questions": [question("first"), question("second, regenerated")],
+        "total_generated": 2,
+    }
+    assert output.read_text(encoding="utf-8") == json.dumps(
+        expected, indent=2, ensure_ascii=False
+    )
+
+
+def test_compact_of_an_empty_journal_is_valid_json(tmp_path):
+    journal = QuestionJournal(str(tmp_path / "q.journal.jsonl")).open()
+    journal.close()
+    output = tmp_path / "q.json"
+    assert journal.compact(str(output)) == 0
+    assert json.loads(output.read_text()) == {"questions": [], "total_generated": 0}
+
+
+def test_resume_drops_a_torn_last_line_and_keeps_completed_entries(tmp_path):
+    path = tmp_path / "q.journal.jsonl"
+    journal = QuestionJournal(str(path)).open()
+    journal.append(1, question("one"))
+    journal.append(2, question("two"))
+    journal.close()
+    # A crash mid-write leaves half a line behind
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"index": 3, "question": {"quest')
+
+    journal = QuestionJournal(str(path))
+    assert journal.completed_indices() == {1, 2}
+    journal.open(resume=True)
+    journal.append(3, question("three"))
+    journal.close()
+    assert [index for index, _ in journal.iter_questions()] == [1, 2, 3]
+
+
+def test_open_without_resume_discards_the_previous_journal(tmp_path):
+    path = str(tmp_path / "q.journal.jsonl")
+    journal = QuestionJournal(path).open()
+    journal.append(1, question("old"))
+    journal.close()
+    journal.open()
+    journal.close()
+    assert journal.completed_indices() == set()
+
+
+def test_generator_resume_only_retries_the_failed_calls(tmp_path):
+    classification = load_script("classification")
+    output_path = str(tmp_path / "questions.json")
+    options = classification.GenerationOptions(
+        target_count=12, use_cache=False, output_path=output_path
+    )
+
+    # A fatal error is not retried, so roughly a third of the calls are simply lost
+    flaky = FakeChatModel(error_rate=0.35, error_status=400, seed=3)
+    first = classification.generate_questions(options, llm=flaky)
+    assert 0 < first.total_generated < 12
+
+    steady = FakeChatModel(seed=3)
+    resumed = classification.generate_questions(options, llm=steady, resume=True)
+    assert steady.calls == 12 - first.total_generated
+    assert resumed.total_generated == 12
+    assert isinstance(resumed, classification.QuestionResults)
+
+    # Questions that survived the first run are kept, not regenerated
+    kept = {q.question for q in first.questions}
+    assert kept <= {q.question for q in resumed.questions}
+    with open(output_path, encoding="utf-8") as f:
+        assert json.load(f)["total_generated"] == 12
@@ -0,0 +1,104 @@
+import time
+
+from pydantic import BaseModel
+
+from shared.fake_llm import FakeChatModel
+from shared.llm_cache import CachedStructuredLLM, LLMCache
+
+
+class Answer(BaseModel):
+    question: str
+
+
+class CountingModel:
+    """Structured runnable that counts the calls reaching it."""
+
+    def __init__(self):
+        self.calls = 0
+        self.inner = FakeChatModel().with_structured_output(Answer)
+
+    def invoke(self, prompt, config=None):
+        self.calls += 1
+        return self.inner.respond(prompt + str(self.calls))
+
+    def batch(self, prompts, config=None, return_exceptions=False):
+        return [self.invoke(prompt) for prompt in prompts]
+
+
+def test_get_after_put_is_a_hit_and_keys_cover_model_schema_and_variant(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite3")
+    cache.put("m", "prompt", {"question": "q"}, Answer)
+
+    assert cache.get("m", "prompt", Answer) == {"question": "q"}
+    assert cache.get("other-model", "prompt", Answer) is None
+    assert cache.get("m", "prompt", None) is None
+    assert cache.get("m", "prompt", Answer, variant=1) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+    cache.close()
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = LLMCache(path)
+    cache.put("m", "prompt", {"question": "q"})
+    cache.close()
+
+    cache = LLMCache(path)
+    assert cache.get("m", "prompt") == {"question": "q"}
+    cache.close()
+
+
+def test_expired_entries_miss_and_are_evicted(tmp_path, monkeypatch):
+    cache = LLMCache(tmp_path / "cache.sqlite3", max_age_days=1)
+    cache.put("m", "old", {"question": "q"})
+    real_time = time.time
+    monkeypatch.setattr(time, "time", lambda: real_time() + 2 * 86400)
+
+    assert cache.get("m", "old") is None
+    cache.evict()
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+
+def test_eviction_keeps_the_most_recently_used_entries(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite3", max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.put("m", name, {"question": name})
+        time.sleep(0.01)
+    cache.get("m", "a")  # a is now the most recently used
+    cache.evict()
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get("m", "a") is not None
+    assert cache.get("m", "b") is None
+    cache.close()
+
+
+def test_repeated_prompts_get_distinct_cached_samples(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite3")
+    model = CountingModel()
+    cached = CachedStructuredLLM(model, cache, "m", Answer)
+    first = [cached.invoke("same prompt") for _ in range(3)]
+    assert model.calls == 3
+    assert len({answer.question for answer in first}) == 3
+
+    # A fresh wrapper (a rerun) replays the same three samples without calling the model
+    rerun = CachedStructuredLLM(model, cache, "m", Answer)
+    assert [rerun.invoke("same prompt") for _ in range(3)] == first
+    assert model.calls == 3
+
+    # A pinned sample index picks one answer regardless of the call order
+    pinned = rerun.invoke("same prompt", config={"metadata": {"sample_index": 1}})
+    assert pinned == first[1]
+    cache.close()
+
+
+def test_batch_only_calls_the_model_for_misses(tmp_path):
+    cache = LLMCache(tmp_path / "cache.sqlite3")
+    model = CountingModel()
+    CachedStructuredLLM(model, cache, "m", Answer).invoke("a")
+
+    responses = CachedStructuredLLM(model, cache, "m", Answer).batch(["a", "b", "c"])
+    assert len(responses) == 3
+    assert model.calls == 3  # one for "a" earlier, then only "b" and "c"
+    cache.close()
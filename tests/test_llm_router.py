@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from shared.fake_llm import FakeProviderError
+from shared.llm_router import LLMRouter, NoProviderAvailable, parse_provider_specs
+
+
+def test_specs_map_short_keys_and_pass_the_rest_to_the_model():
+    first, second = parse_provider_specs(
+        "fake:a:weight=3:rpm=60:concurrency=2, fake:b:error_rate=0.5"
+    )
+    assert (first.name, first.weight, first.max_concurrency) == ("fake/a", 3, 2)
+    assert first.limiter.request_bucket is not None
+    assert second.model_kwargs == {"error_rate": 0.5}
+    assert second.runnable().error_rate == 0.5
+
+    with pytest.raises(ValueError, match="Unknown provider"):
+        parse_provider_specs("nope:model")
+    with pytest.raises(ValueError, match="No providers"):
+        parse_provider_specs(" , ")
+
+
+def test_calls_are_spread_by_weight():
+    router = LLMRouter.from_spec("fake:heavy:weight=3,fake:light:weight=1", seed=1)
+    for k in range(400):
+        router.invoke(f"prompt {k}")
+
+    requests = {row["provider"]: row["requests"] for row in router.stats()}
+    assert sum(requests.values()) == 400
+    assert 250 < requests["fake/heavy"] < 350
+
+
+def test_failing_provider_cools_down_and_calls_fail_over(clock):
+    router = LLMRouter.from_spec(
+        "fake:bad:weight=100:error_rate=1.0,fake:good", seed=0, cooldown_seconds=5.0
+    )
+    bad, good = router.providers
+
+    router.invoke("first")
+    assert bad.errors == 1 and good.requests == 1
+    assert bad.cooldown_until == pytest.approx(clock.now + 5.0)
+
+    # While the bad provider cools down, every call goes straight to the good one
+    for k in range(5):
+        router.invoke(f"prompt {k}")
+    assert bad.requests == 1 and good.requests == 6
+
+    # A second consecutive failure doubles the cooldown
+    clock.advance(5.0)
+    router.invoke("again")
+    assert bad.cooldown_until == pytest.approx(clock.now + 10.0)
+
+
+def test_fatal_errors_are_raised_without_failover_or_cooldown():
+    router = LLMRouter.from_spec("fake:bad:error_rate=1.0:error_status=400")
+    with pytest.raises(FakeProviderError):
+        router.invoke("prompt")
+    assert router.providers[0].errors == 1
+    assert router.providers[0].cooldown_until == 0.0
+
+
+def test_every_provider_failing_raises_no_provider_available():
+    router = LLMRouter.from_spec("fake:a:error_rate=1.0,fake:b:error_rate=1.0")
+    with pytest.raises(NoProviderAvailable):
+        asyncio.run(router.ainvoke("prompt"))
+    assert [p.errors for p in router.providers] == [1, 1]
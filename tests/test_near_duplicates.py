@@ -0,0 +1,68 @@
+import pytest
+
+from conftest import load_script
+
+TEXT = (
+    "We are renegotiating our master services agreement with a cloud vendor and want to "
+    "cap liability at twelve months of fees while carving out data breaches and "
+    "confidentiality obligations. How have others structured the super cap and did the "
+    "vendor accept mutual indemnities for third party intellectual property claims?"
+)
+
+
+@pytest.fixture
+def near_duplicates():
+    load_script("process_threads")  # puts 1-discussion-forum on sys.path
+    import near_duplicates
+
+    return near_duplicates
+
+
+def test_choose_bands_puts_the_s_curve_midpoint_near_the_threshold(near_duplicates):
+    for threshold in (0.5, 0.8, 0.9):
+        bands, rows = near_duplicates.choose_bands(threshold, 128)
+        assert bands * rows <= 128
+        assert abs((1 / bands) ** (1 / rows) - threshold) < 0.05
+
+
+def test_signature_agreement_estimates_jaccard_similarity(near_duplicates):
+    index = near_duplicates.NearDuplicateIndex(threshold=0.8, num_perm=256)
+    words = TEXT.split()
+    edited = " ".join(words[:-6] + ["thanks", "in", "advance", "for", "any", "pointers"])
+
+    a, b = set(), set()
+    for text, shingles in ((TEXT, a), (edited, b)):
+        tokens = near_duplicates.WORD_PATTERN.findall(text.lower())
+        shingles.update(" ".join(tokens[i : i + 5]) for i in range(len(tokens) - 4))
+    jaccard = len(a & b) / len(a | b)
+
+    estimate = (index.signature(TEXT) == index.signature(edited)).mean()
+    assert estimate == pytest.approx(jaccard, abs=0.1)
+
+
+def test_check_flags_reposts_but_keeps_distinct_threads(near_duplicates):
+    index = near_duplicates.NearDuplicateIndex(threshold=0.8)
+    assert index.check(TEXT) is None
+    assert index.check("How do you staff a two person team at a fintech?") is None
+
+    # Whitespace, case and punctuation changes do not change the shingles
+    kept_id, similarity = index.check("  " + TEXT.upper().replace("?", "!!") + "\n")
+    assert kept_id == 0 and similarity == 1.0
+
+    # Reposts are not indexed themselves, so the kept ids stay dense
+    assert len(index.signatures) == 2
+
+
+def test_cluster_report_groups_duplicates_under_the_kept_thread(near_duplicates):
+    index = near_duplicates.NearDuplicateIndex(threshold=0.8)
+    index.check(TEXT)
+    kept_id, similarity = index.check(TEXT + " Thanks!")
+    index.record_duplicate(kept_id, "Repost", similarity)
+    assert index.cluster_report() == [
+        {
+            "kept_thread_index": 0,
+            "duplicates": [
+                {"thread_title": "Repost", "similarity": round(similarity, 3)}
+            ],
+        }
+    ]
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from conftest import load_script
+from shared.fake_llm import FakeChatModel, FakeStructuredModel
+from shared.journal import QuestionJournal
+from shared.llm_cache import LLMCache
+from shared.retry import IncompleteResponseError
+
+CATEGORY = {"category": "c", "instruction": "i", "examples": ["e"]}
+
+
+def test_slots_cover_the_target_count_exactly_once():
+    classification = load_script("classification")
+    slots = [list(classification.question_slots(i, 3, 7)) for i in range(1, 4)]
+    assert slots == [[1, 2, 3], [4, 5, 6], [7]]
+
+
+def test_prompt_asks_for_the_call_count_only_when_batching():
+    classification = load_script("classification")
+    template = "{category_name} {category_instruction}\n{category_examples}"
+    assert classification.fill_prompt(template, CATEGORY) == "c i\n- e"
+    assert "generate 4 DISTINCT questions" in classification.fill_prompt(
+        template, CATEGORY, count=4
+    )
+
+
+def test_record_questions_fans_a_list_out_and_drops_extras(tmp_path):
+    classification = load_script("classification")
+    journal = QuestionJournal(str(tmp_path / "q.journal.jsonl")).open()
+    response = classification.QuestionList(questions=["a", "b", "c"])
+    assert classification.record_questions(journal, response, CATEGORY, range(7, 9)) == 2
+    journal.close()
+
+    recorded = dict(journal.iter_questions())
+    assert {index: q["question"] for index, q in recorded.items()} == {7: "a", 8: "b"}
+    assert recorded[7]["category_info"]["category"] == "c"
+
+
+@pytest.mark.parametrize(
+    "questions", [["a", "b"], ["a", "a", "b"], ["a", " b", "b ", ""]]
+)
+def test_short_or_repetitive_lists_are_rejected(tmp_path, questions):
+    classification = load_script("classification")
+    journal = QuestionJournal(str(tmp_path / "q.journal.jsonl")).open()
+    response = classification.QuestionList(questions=questions)
+    with pytest.raises(IncompleteResponseError, match="expected 3 distinct questions, got 2"):
+        classification.record_questions(journal, response, CATEGORY, range(1, 4))
+    journal.close()
+    assert list(journal.iter_questions()) == []
+    assert classification.question_texts(response, range(1, 3)) == ["a", "b"]
+
+
+REAL_SLEEP = asyncio.sleep
+
+
+async def sleep_briefly(seconds):
+    await REAL_SLEEP(0)
+
+
+class ForgetfulModel(FakeChatModel):
+    """FakeChatModel whose first answer to each prompt repeats one question."""
+
+    def with_structured_output(self, schema, include_raw=False, **kwargs):
+        model = self
+        seen = set()
+
+        class Structured(FakeStructuredModel):
+            def respond(self, prompt):
+                response = super().respond(prompt)
+                parsed = response["parsed"] if self.include_raw else response
+                if prompt not in seen:
+                    seen.add(prompt)
+                    parsed.questions[1:] = [parsed.questions[0]] * 3
+                return response
+
+        return Structured(model, schema, include_raw)
+
+
+def test_short_answers_are_retried_and_never_cached(tmp_path, monkeypatch):
+    classification = load_script("classification")
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    cache_path = tmp_path / "cache.sqlite3"
+    monkeypatch.setattr(classification, "LLMCache", lambda: LLMCache(cache_path))
+
+    llm = ForgetfulModel(seed=5)
+    results = classification.generate_questions(
+        llm=llm,
+        target_count=10,
+        questions_per_call=4,
+        output_path=str(tmp_path / "questions.json"),
+    )
+    # Every call is asked twice: the repetitive first answer is retried
+    assert llm.calls == 6
+    assert results.total_generated == 10
+    assert len({q.question for q in results.questions}) == 10
+    # Only the complete answers were cached: a rerun is served entirely from the cache
+    assert LLMCache(cache_path).stats()["entries"] == 3
+    rerun = classification.generate_questions(
+        llm=llm,
+        target_count=10,
+        questions_per_call=4,
+        output_path=str(tmp_path / "rerun.json"),
+    )
+    assert llm.calls == 6 and rerun.total_generated == 10
+
+
+def test_generator_makes_one_call_per_batch_of_questions(tmp_path):
+    classification = load_script("classification")
+    llm = FakeChatModel(seed=5)
+    results = classification.generate_questions(
+        llm=llm,
+        target_count=10,
+        questions_per_call=4,
+        use_cache=False,
+        output_path=str(tmp_path / "questions.json"),
+    )
+    assert llm.calls == 3
+    assert results.total_generated == 10
+    assert len({q.question for q in results.questions}) == 10
+
+
+def test_async_discussion_calls_retry_repetitive_lists(tmp_path, monkeypatch):
+    discussion = load_script("discussion")
+    monkeypatch.setattr("asyncio.sleep", sleep_briefly)
+    llm = ForgetfulModel(seed=3)
+    results = discussion.generate_questions(
+        llm=llm,
+        plan="covering",
+        max_rows=4,
+        questions_per_call=3,
+        use_async=True,
+        use_cache=False,
+        output_path=str(tmp_path / "questions.json"),
+    )
+    assert llm.calls == 8
+    assert results.total_generated == 12
+    assert len({q.question for q in results.questions}) == 12
@@ -0,0 +1,83 @@
+import copy
+import os
+import re
+
+import pipeline
+
+SHARED_IMPORT = re.compile(r"^\s*from shared\.(\w+) import", re.MULTILINE)
+
+
+def relative(paths):
+    return {os.path.relpath(path, pipeline.REPO_DIR) for path in paths}
+
+
+def test_every_stage_fingerprints_the_shared_modules_its_script_imports():
+    for stage in pipeline.STAGES:
+        with open(stage.code[0], encoding="utf-8") as f:
+            imported = {f"shared/{name}.py" for name in SHARED_IMPORT.findall(f.read())}
+        assert imported <= relative(stage.code), stage.name
+
+
+def test_question_stages_cover_lazily_imported_helpers():
+    by_name = {stage.name: stage for stage in pipeline.STAGES}
+    for name in ("discussion-questions", "classification-questions"):
+        code = relative(by_name[name].code)
+        for module in ("journal", "llm_cache", "concurrency", "retry", "question_dedup"):
+            assert f"shared/{module}.py" in code
+        assert "shared/adaptive_budget.py" in code
+
+
+def test_local_imports_follow_sibling_modules_transitively(tmp_path):
+    (tmp_path / "main.py").write_text("import helper\nimport json\n")
+    (tmp_path / "helper.py").write_text("def f():\n    from inner import g\n")
+    (tmp_path / "inner.py").write_text("from shared.journal import QuestionJournal\n")
+
+    found = pipeline.local_imports(str(tmp_path / "main.py"))
+    assert found == sorted(
+        [
+            str(tmp_path / "helper.py"),
+            str(tmp_path / "inner.py"),
+            os.path.join(pipeline.REPO_DIR, "shared", "journal.py"),
+        ]
+    )
+
+
+def test_editing_an_imported_module_changes_the_fingerprint(tmp_path, monkeypatch):
+    (tmp_path / "run.py").write_text("import helper\n")
+    (tmp_path / "helper.py").write_text("X = 1\n")
+    monkeypatch.setattr(pipeline, "REPO_DIR", str(tmp_path))
+    stage = pipeline.Stage("s", ".", "run.py", inputs=[], outputs=[])
+
+    before = pipeline.fingerprint(stage)
+    (tmp_path / "helper.py").write_text("X = 2\n")
+    assert pipeline.fingerprint(stage) != before
+
+
+def test_file_arguments_become_inputs_and_link_their_producer():
+    stages = {stage.name: stage for stage in copy.deepcopy(pipeline.STAGES)}
+    outputs = {path for stage in stages.values() for path in stage.outputs}
+    questions = stages["discussion-questions"]
+    questions.add_args(
+        ["--async", "--concurrency", "16", "--thread-index", "../../threads.bm25"],
+        outputs,
+    )
+
+    assert questions.args[-2:] == ["--thread-index", "../../threads.bm25"]
+    assert "1-discussion-forum/threads.bm25" in relative(questions.inputs)
+    assert "1-discussion-forum/generate-questions/questions/16" not in relative(
+        questions.inputs
+    )
+    upstream = pipeline.upstream_of(list(stages.values()))
+    assert "thread-index" in [stage.name for stage in upstream["discussion-questions"]]
+
+
+def test_rebuilding_a_file_argument_makes_the_stage_stale(tmp_path, monkeypatch):
+    (tmp_path / "run.py").write_text("X = 1\n")
+    (tmp_path / "index.bin").write_bytes(b"v1")
+    monkeypatch.setattr(pipeline, "REPO_DIR", str(tmp_path))
+    stage = pipeline.Stage("s", ".", "run.py", inputs=[], outputs=[])
+    stage.add_args(["--index=index.bin", "--verbose"])
+
+    before = pipeline.fingerprint(stage)
+    (tmp_path / "index.bin").write_bytes(b"v2")
+    assert pipeline.fingerprint(stage) != before
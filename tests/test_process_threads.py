@@ -0,0 +1,189 @@
+import csv
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import REPO_DIR, SCRIPTS, load_script
+
+FIELDS = ["thread_id", "thread_date", "author_id", "thread_title", "thread_body"]
+BODIES = [
+    "Looking for employment counsel in California for a small severance dispute "
+    "with a former executive",
+    "Which vendor contract template do you use for SaaS renewals with auto-renew "
+    "clauses and caps",
+    "Board asked for a privacy program benchmark; what do you report quarterly to "
+    "the audit committee",
+]
+
+
+@pytest.fixture
+def process_threads():
+    return load_script("process_threads")
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(FIELDS)
+        writer.writerows(rows)
+
+
+def row(thread_id, body, title=None, author=7, date="2025-08-01 09:30:00.5+00"):
+    return [thread_id, date, author, title or f"Thread {thread_id}", body]
+
+
+@pytest.fixture
+def export(tmp_path, monkeypatch):
+    """The default input CSV in a scratch directory: 3 unique bodies, 1 repost, 1 empty."""
+    monkeypatch.chdir(tmp_path)
+    write_csv(
+        tmp_path / "recent_threads_Aug2025.csv",
+        [
+            row(1, BODIES[0]),
+            row(2, BODIES[1]),
+            row(3, BODIES[0], title="Repost"),
+            row(4, ""),
+            row(5, BODIES[2]),
+        ],
+    )
+    return tmp_path
+
+
+def test_clean_drops_exact_duplicates_and_empty_rows(process_threads, export):
+    result = process_threads.clean_and_extract_threads()
+    assert [t["thread_body"] for t in result["threads"]] == BODIES
+    assert result["metadata"] == {"total_unique_threads": 3, "duplicates_removed": 1}
+    with open("threads_cleaned.json", encoding="utf-8") as f:
+        assert json.load(f) == result
+
+
+def test_stream_writes_the_same_bytes_as_the_in_memory_mode(process_threads, export):
+    process_threads.clean_and_extract_threads()
+    expected = (export / "threads_cleaned.json").read_bytes()
+
+    process_threads.stream_clean_threads(output_path="streamed.json")
+    assert (export / "streamed.json").read_bytes() == expected
+
+
+def test_stream_jsonl_writes_one_thread_per_line_and_a_metadata_sidecar(
+    process_threads, export
+):
+    metadata = process_threads.stream_clean_threads(output_path="threads.jsonl")
+    lines = (export / "threads.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["thread_body"] for line in lines] == BODIES
+    with open(export / "threads.meta.json", encoding="utf-8") as f:
+        assert json.load(f) == metadata
+    assert list(process_threads.read_thread_store("threads.jsonl")) == [
+        json.loads(line) for line in lines
+    ]
+
+
+def test_incremental_ingest_adds_updates_and_skips_by_thread_id(
+    process_threads, tmp_path
+):
+    store = str(tmp_path / "threads.json")
+    index = str(tmp_path / "index.sqlite3")
+    first = tmp_path / "june.csv"
+    write_csv(first, [row(1, BODIES[0]), row(2, BODIES[1])])
+    process_threads.incremental_ingest(str(first), store, index)
+
+    second = tmp_path / "july.csv"
+    write_csv(
+        second,
+        [
+            row(1, BODIES[0]),  # unchanged
+            row(2, BODIES[1] + " (edited)"),  # same id, new body
+            row(3, BODIES[0]),  # another id reposting thread 1
+            row(4, BODIES[2]),  # new
+        ],
+    )
+    metadata = process_threads.incremental_ingest(str(second), store, index)
+
+    assert metadata["last_ingest"] == {
+        "source": "july.csv",
+        "added": 1,
+        "updated": 1,
+        "skipped": 1,
+        "duplicates": 1,
+    }
+    threads = list(process_threads.read_thread_store(store))
+    assert [t["thread_id"] for t in threads] == ["1", "2", "4"]
+    assert threads[1]["thread_body"] == BODIES[1] + " (edited)"
+    assert metadata["total_unique_threads"] == 3
+
+
+def test_incremental_ingest_adopts_threads_from_a_store_without_an_index(
+    process_threads, export
+):
+    process_threads.clean_and_extract_threads()
+    metadata = process_threads.incremental_ingest(
+        "recent_threads_Aug2025.csv", "threads_cleaned.json", "index.sqlite3"
+    )
+    # Every thread is already in the store: ids are attached, nothing is re-added
+    assert metadata["last_ingest"]["added"] == 0
+    threads = list(process_threads.read_thread_store("threads_cleaned.json"))
+    assert [t["thread_id"] for t in threads] == ["1", "2", "5"]
+
+
+def test_incremental_rejects_the_near_duplicate_threshold(export):
+    script = f"{REPO_DIR}/{SCRIPTS['process_threads']}"
+    completed = subprocess.run(
+        [sys.executable, script, "--incremental", "--near-dup-threshold", "0.8"],
+        capture_output=True,
+        text=True,
+    )
+    assert completed.returncode == 2
+    assert "not supported with --incremental" in completed.stderr
+    assert not (export / "threads_cleaned.json").exists()
+
+
+def test_incremental_ingest_keeps_the_last_row_of_a_repeated_thread_id(
+    process_threads, tmp_path
+):
+    store = str(tmp_path / "threads.json")
+    index = str(tmp_path / "index.sqlite3")
+    first = tmp_path / "june.csv"
+    write_csv(first, [row(1, BODIES[0])])
+    process_threads.incremental_ingest(str(first), store, index)
+
+    # Thread 1 is edited twice and the new thread 2 once within the same export
+    second = tmp_path / "july.csv"
+    write_csv(
+        second,
+        [
+            row(1, BODIES[0] + " (draft)"),
+            row(2, BODIES[1]),
+            row(1, BODIES[0] + " (final)"),
+            row(2, BODIES[2]),
+        ],
+    )
+    metadata = process_threads.incremental_ingest(str(second), store, index)
+    assert metadata["last_ingest"]["added"] == 1
+    assert metadata["last_ingest"]["updated"] == 1
+    threads = list(process_threads.read_thread_store(store))
+    assert [(t["thread_id"], t["thread_body"]) for t in threads] == [
+        ("1", BODIES[0] + " (final)"),
+        ("2", BODIES[2]),
+    ]
+
+    # The index agrees with the store: the final bodies are now unchanged threads
+    third = tmp_path / "august.csv"
+    write_csv(third, [row(1, BODIES[0] + " (final)"), row(2, BODIES[2])])
+    metadata = process_threads.incremental_ingest(str(third), store, index)
+    assert metadata["last_ingest"]["skipped"] == 2
+    assert list(process_threads.read_thread_store(store)) == threads
+
+
+def test_columnar_ingest_survives_an_unparseable_date(process_threads, tmp_path):
+    from shared.thread_store import ThreadStore
+
+    source = tmp_path / "export.csv"
+    write_csv(source, [row(1, BODIES[0], date="08/01/2025"), row(2, BODIES[1])])
+    process_threads.stream_clean_threads(
+        str(source), str(tmp_path / "threads.json"), columnar_path=str(tmp_path / "t.cols")
+    )
+    store = ThreadStore(str(tmp_path / "t.cols"))
+    assert len(store) == 2 and store.metadata["invalid_dates"] == 1
+    assert [t["thread_date"] for t in store.threads()][0] is None
@@ -0,0 +1,103 @@
+import numpy as np
+
+from conftest import load_script
+from shared.fake_llm import FakeChatModel
+from shared.journal import QuestionJournal
+from shared.question_dedup import (
+    REGENERATE_HINT,
+    blocked_pairs,
+    bucketed_pairs,
+    deduplicate_journal,
+    find_near_duplicates,
+    flag_duplicates,
+    hashed_tfidf,
+)
+
+QUESTIONS = [
+    "What should we cap liability at in a SaaS vendor agreement?",
+    "How do you staff a two person legal team at a fintech startup?",
+    "what should we cap liability at in a SaaS vendor agreement",
+    "Any recommendations for employment counsel in Austin for a severance dispute?",
+    "What should we cap liability at in our SaaS vendor agreement?",
+]
+
+
+def test_vectors_are_unit_length_and_rephrasings_are_closer_than_other_questions():
+    vectors = hashed_tfidf(QUESTIONS, n_features=1024)
+    assert vectors.shape == (5, 1024) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+
+    similarities = vectors @ vectors.T
+    assert similarities[0, 2] > 0.99  # case and punctuation only
+    assert similarities[0, 4] > 0.7
+    assert similarities[0, 1] < 0.3 and similarities[0, 3] < 0.3
+
+
+def test_find_near_duplicates_returns_each_upper_triangle_pair_once():
+    pairs, similarities = find_near_duplicates(hashed_tfidf(QUESTIONS, 1024), 0.7)
+    assert sorted(map(tuple, pairs.tolist())) == [(0, 2), (0, 4), (2, 4)]
+    assert (similarities >= 0.7).all()
+
+
+def test_blocking_does_not_change_the_result():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 32)).astype(np.float32)
+    vectors[150] = vectors[3] + 0.01
+    vectors[299] = vectors[3]
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    one_block = blocked_pairs(vectors, 0.95, block_size=1000)
+    small_blocks = blocked_pairs(vectors, 0.95, block_size=7)
+    def as_set(found):
+        return {tuple(p) for part in found[0] for p in part.tolist()}
+
+    expected = {(3, 150), (3, 299), (150, 299)}
+    assert as_set(one_block) == as_set(small_blocks) == expected
+
+    # LSH candidates find the same close pairs
+    assert as_set(bucketed_pairs(vectors, 0.95)) == as_set(one_block)
+
+
+def test_flag_duplicates_keeps_the_first_member_of_each_cluster():
+    pairs = np.array([[4, 2], [2, 0], [5, 7]])
+    assert flag_duplicates(8, pairs) == {2: 0, 4: 0, 7: 5}
+    assert flag_duplicates(3, np.empty((0, 2), dtype=np.int64)) == {}
+
+
+def test_deduplicate_journal_regenerates_only_the_flagged_questions(tmp_path):
+    classification = load_script("classification")
+
+    journal = QuestionJournal(str(tmp_path / "q.journal.jsonl")).open()
+    category = {"category": "c", "instruction": "i", "examples": []}
+    for index, text in enumerate(QUESTIONS, 1):
+        journal.append(index, {"question": text, "category_info": category})
+    journal.close()
+
+    prompts = []
+
+    class Recorder:
+        def __init__(self):
+            self.model = FakeChatModel().with_structured_output(
+                classification.SimpleQuestion
+            )
+
+        def batch(self, batch_prompts, config=None, return_exceptions=False):
+            prompts.extend(batch_prompts)
+            return self.model.batch(batch_prompts, config, return_exceptions)
+
+    remaining = deduplicate_journal(
+        journal, Recorder(), lambda question: "Prompt", threshold=0.7, max_rounds=3
+    )
+    assert remaining == 0
+    # Round 1 regenerates questions 3 and 5, which collided with question 1, with a
+    # hint naming it (the fake model's rewrites may collide again in later rounds)
+    first_round = prompts[:2]
+    hint = "Prompt" + REGENERATE_HINT[:40]
+    assert all(prompt.startswith(hint) for prompt in first_round)
+    assert all(QUESTIONS[0] in prompt for prompt in first_round)
+
+    final = dict(journal.iter_questions())
+    assert final[1]["question"] == QUESTIONS[0]
+    assert final[3]["question"] != QUESTIONS[2]
+    assert final[5]["question"] != QUESTIONS[4]
+    assert final[2]["question"] == QUESTIONS[1]
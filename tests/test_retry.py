@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from shared.fake_llm import FakeProviderError
+from shared.retry import (
+    AIMDController,
+    RetryPolicy,
+    acall_with_retry,
+    call_with_retry,
+    classify_error,
+)
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class HintedError(Exception):
+    def __init__(self, retry_after):
+        super().__init__("throttled")
+        self.status_code = 429
+        self.response = Response({"retry-after": retry_after})
+
+
+def test_errors_are_classified_by_status_then_name_then_cause():
+    assert classify_error(FakeProviderError("x", 429)) == "throttle"
+    assert classify_error(FakeProviderError("x", 503)) == "transient"
+    assert classify_error(FakeProviderError("x", 408)) == "transient"
+    assert classify_error(FakeProviderError("x", 401)) == "fatal"
+    assert classify_error(RateLimitError()) == "throttle"
+    assert classify_error(TimeoutError()) == "transient"
+    assert classify_error(ValueError()) == "fatal"
+
+    try:
+        raise RuntimeError("wrapped") from FakeProviderError("x", 429)
+    except RuntimeError as wrapped:
+        assert classify_error(wrapped) == "throttle"
+
+
+def test_backoff_ceiling_doubles_up_to_the_cap_and_honours_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, seed=0)
+    for attempt, ceiling in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (9, 5.0)]:
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert 0.0 <= min(delays) and max(delays) <= ceiling
+        assert max(delays) > 0.8 * ceiling
+
+    assert policy.delay(1, HintedError("30")) == 30.0
+    assert policy.delay(1, HintedError("soon")) <= 1.0
+
+
+def test_call_with_retry_retries_transient_errors_and_stops_on_fatal(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    policy = RetryPolicy(max_attempts=4, seed=0)
+
+    outcomes = [FakeProviderError("x", 503), FakeProviderError("x", 429), "ok"]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    retries = []
+    assert call_with_retry(flaky, policy, lambda *args: retries.append(args[1])) == "ok"
+    assert retries == [1, 2] and len(sleeps) == 2
+
+    calls = []
+
+    def fatal():
+        calls.append(1)
+        raise FakeProviderError("x", 400)
+
+    with pytest.raises(FakeProviderError):
+        call_with_retry(fatal, policy)
+    assert len(calls) == 1
+
+    def always_down():
+        calls.append(1)
+        raise FakeProviderError("x", 500)
+
+    calls.clear()
+    with pytest.raises(FakeProviderError):
+        call_with_retry(always_down, policy)
+    assert len(calls) == 4
+
+
+def test_aimd_grows_by_one_per_window_and_halves_once_per_round_trip(clock):
+    controller = AIMDController(initial=4, maximum=6)
+    for _ in range(4):
+        controller.on_success()
+    assert controller.limit == pytest.approx(5.0, abs=0.2)
+
+    throttle = FakeProviderError("x", 429)
+    started = clock.now
+    clock.advance(1.0)
+    limit = controller.limit
+    controller.on_error(throttle, started)
+    assert controller.limit == pytest.approx(limit / 2)
+
+    # A second error from a call started before the decrease is ignored
+    controller.on_error(throttle, started)
+    assert controller.limit == pytest.approx(limit / 2)
+    # Fatal errors never shrink the limit
+    controller.on_error(FakeProviderError("x", 400), clock.now + 1)
+    assert controller.limit == pytest.approx(limit / 2)
+
+    for _ in range(100):
+        controller.on_success()
+    assert controller.limit == 6 and controller.peak == 6
+
+
+def test_controller_slots_cap_concurrent_calls():
+    controller = AIMDController(initial=3, maximum=3)
+    policy = RetryPolicy(seed=0)
+    active = []
+    peak = []
+
+    async def call():
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.001)
+        active.pop()
+        return True
+
+    async def main():
+        return await asyncio.gather(
+            *(acall_with_retry(call, policy, controller) for _ in range(20))
+        )
+
+    assert all(asyncio.run(main()))
+    assert max(peak) == 3 and controller.in_flight == 0
+
+
+def test_controller_serves_several_event_loops():
+    controller = AIMDController(initial=2, maximum=2)
+
+    async def call():
+        async with controller.slot():
+            await asyncio.sleep(0.001)
+        return True
+
+    async def main():
+        return await asyncio.gather(*(call() for _ in range(6)))
+
+    # Each adaptive round is its own asyncio.run(); the slots must work in all of them
+    for _ in range(3):
+        assert all(asyncio.run(main()))
+    assert controller.in_flight == 0
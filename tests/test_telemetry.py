@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from shared.fake_llm import FakeChatModel, FakeProviderError
+from shared.telemetry import CallMetrics, MeteredChatModel, metrics_paths_for, usage_of
+
+
+class Answer(BaseModel):
+    question: str
+
+
+def test_usage_is_read_from_either_metadata_layout():
+    assert usage_of(AIMessage(content="x")) is None
+    legacy = AIMessage(
+        content="x",
+        response_metadata={"token_usage": {"prompt_tokens": 7, "completion_tokens": 2}},
+    )
+    assert usage_of(legacy) == (7, 2)
+
+
+def test_records_time_queue_wait_retries_and_cost(tmp_path, clock):
+    path = str(tmp_path / "out.metrics.jsonl")
+    metrics = CallMetrics(path, "script", "gpt-5-mini")
+
+    metrics.start(1, "legal")
+    clock.advance(2.0)
+    metrics.attempt_started(1)
+    metrics.attempt_finished(1, (1000, 100))
+    clock.advance(1.0)
+    metrics.attempt_started(1)
+    metrics.attempt_finished(1, (1000, 100))
+    metrics.finish(1, questions=1)
+
+    metrics.start(2, "tax")
+    metrics.finish(2)
+    metrics.start(3, "tax")
+    metrics.attempt_started(3)
+    metrics.close()
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    first, cached, unfinished = records
+    assert first["wall_seconds"] == 3.0 and first["queue_wait_seconds"] == 2.0
+    assert (first["attempts"], first["retries"]) == (2, 1)
+    assert (first["input_tokens"], first["output_tokens"]) == (2000, 200)
+    expected_cost = 2000 * metrics.input_cost + 200 * metrics.output_cost
+    assert first["cost_usd"] == pytest.approx(expected_cost)
+    assert cached["outcome"] == "cached"
+    assert unfinished["outcome"] == "fatal" and "did not finish" in unfinished["error"]
+
+
+def test_metered_model_reports_usage_and_errors_per_call():
+    metrics = CallMetrics(None, "script", "fake-chat")
+    structured = MeteredChatModel(FakeChatModel(), metrics).with_structured_output(
+        Answer
+    )
+
+    metrics.start("a", "tag")
+    assert isinstance(structured.invoke("prompt", {"metadata": {"call_id": "a"}}), Answer)
+    metrics.finish("a", questions=1)
+    assert metrics.records[0]["input_tokens"] > 0
+    assert not metrics.records[0]["tokens_estimated"]
+
+    # Calls without a call_id are recorded on their own
+    failing = MeteredChatModel(FakeChatModel(error_rate=1.0, error_status=429), metrics)
+    with pytest.raises(FakeProviderError):
+        failing.invoke("prompt")
+    assert metrics.records[1]["tag"] == "untracked"
+    assert metrics.records[1]["outcome"] == "throttle"
+
+
+def test_prometheus_textfile_has_cumulative_buckets(tmp_path, clock):
+    jsonl_path, prom_path = metrics_paths_for(str(tmp_path / "questions.json"))
+    assert jsonl_path.endswith("questions.metrics.jsonl")
+    metrics = CallMetrics(jsonl_path, "script", "fake-chat")
+    for call_id, seconds in enumerate([0.1, 0.4, 3.0]):
+        metrics.start(call_id, "tag")
+        metrics.attempt_started(call_id)
+        clock.advance(seconds)
+        metrics.finish(call_id)
+    metrics.close()
+    metrics.write_prometheus(prom_path)
+
+    with open(prom_path, encoding="utf-8") as f:
+        text = f.read()
+    labels = 'script="script",model="fake-chat"'
+    assert f'llm_call_duration_seconds_bucket{{{labels},le="0.25"}} 1' in text
+    assert f'llm_call_duration_seconds_bucket{{{labels},le="5"}} 3' in text
+    assert f'llm_call_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    assert f'llm_calls_total{{{labels},outcome="ok"}} 3' in text
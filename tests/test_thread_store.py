@@ -0,0 +1,142 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import REPO_DIR
+from shared.thread_store import (
+    MISSING_DATE,
+    ColumnarThreadWriter,
+    ThreadStore,
+    parse_thread_date,
+)
+
+# Ingest order is deliberately not date order; two threads have no date
+THREADS = [
+    {"thread_id": "t0", "thread_date": "2025-08-03 10:00:00+00", "author_id": "7", "thread_title": "Vendor", "thread_body": "liability cap"},
+    {"thread_id": "t1", "thread_date": "2025-06-02 00:03:28.47559+00", "author_id": "3", "thread_title": "Privacy", "thread_body": "audit ✓"},
+    {"thread_id": "t2", "thread_date": "", "author_id": "7", "thread_title": "Undated", "thread_body": ""},
+    {"thread_id": "t3", "thread_date": "2025-07-15 12:00:00", "author_id": None, "thread_title": "Anonymous", "thread_body": "naive time"},
+    {"thread_id": "t4", "thread_date": "2025-07-01 00:00:00+00", "author_id": "3", "thread_title": "Boundary", "thread_body": "on since"},
+    {"thread_id": "t5", "thread_date": "2025-08-01 00:00:00+00", "author_id": "9", "thread_title": "Boundary", "thread_body": "on until"},
+    {"thread_id": "t6", "thread_date": None, "author_id": "9", "thread_title": "Also undated", "thread_body": "x"},
+]
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = str(tmp_path / "threads.cols")
+    writer = ColumnarThreadWriter(path)
+    for thread in THREADS:
+        writer.write(thread)
+    writer.close({"source": "test"})
+    return path
+
+
+def naive_select(since=None, until=None, authors=None):
+    rows = []
+    for row, thread in enumerate(THREADS):
+        date = parse_thread_date(thread["thread_date"])
+        if since and (date == MISSING_DATE or date < parse_thread_date(since)):
+            continue
+        if until and (date == MISSING_DATE or date >= parse_thread_date(until)):
+            continue
+        if authors is not None and thread["author_id"] not in map(str, authors):
+            continue
+        rows.append(row)
+    return rows
+
+
+def test_round_trip_keeps_every_field(store_path, tmp_path):
+    store = ThreadStore(store_path)
+    assert len(store) == len(THREADS) and store.metadata == {"source": "test"}
+    assert store.authors == ["7", "3", "9"]
+
+    threads = list(store.threads())
+    assert [t["thread_id"] for t in threads] == [t["thread_id"] for t in THREADS]
+    assert threads[1]["thread_body"] == "audit ✓"
+    assert threads[1]["thread_date"] == "2025-06-02 00:03:28.475590+00:00"
+    assert threads[3]["thread_date"] == "2025-07-15 12:00:00+00:00"
+    assert threads[2]["thread_date"] is None and threads[3]["author_id"] is None
+
+    # The spool files are removed once the store is written
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["threads.cols"]
+
+
+def test_date_window_is_half_open_and_skips_undated_rows(store_path):
+    store = ThreadStore(store_path)
+    assert list(store.rows_between("2025-07-01", "2025-08-01")) == [3, 4]
+    assert list(store.rows_between(since="2025-08-01")) == [0, 5]
+    assert list(store.rows_between(until="2025-07-01")) == [1]
+    assert list(store.rows_between()) == [0, 1, 3, 4, 5]
+    assert list(store.rows_between("2026-01-01")) == []
+
+
+def test_author_rows_ignore_unknown_ids(store_path):
+    store = ThreadStore(store_path)
+    assert list(store.rows_by_authors(["7"])) == [0, 2]
+    assert list(store.rows_by_authors([9, "3", "unknown"])) == [1, 4, 5, 6]
+    assert list(store.rows_by_authors(["unknown"])) == []
+
+
+@pytest.mark.parametrize(
+    "since, until, authors",
+    [
+        (None, None, None),
+        ("2025-07-01", None, None),
+        (None, "2025-08-01", ["3"]),
+        ("2025-06-01", "2025-09-01", ["7", "9"]),
+        (None, None, ["9"]),
+        (None, None, []),
+        ("2025-07-02", "2025-07-31", ["3"]),
+    ],
+)
+def test_select_matches_a_naive_filter(store_path, since, until, authors):
+    rows = ThreadStore(store_path).select(since, until, authors)
+    assert list(rows) == naive_select(since, until, authors)
+
+
+def test_empty_store_and_bad_magic(tmp_path):
+    path = str(tmp_path / "empty.cols")
+    ColumnarThreadWriter(path).close()
+    store = ThreadStore(path)
+    assert len(store) == 0 and list(store.select("2025-01-01")) == []
+
+    bogus = tmp_path / "bogus.cols"
+    bogus.write_bytes(b"not a store")
+    with pytest.raises(ValueError, match="not a columnar thread store"):
+        ThreadStore(str(bogus))
+
+
+def test_info_reports_the_dated_range(store_path):
+    result = subprocess.run(
+        [sys.executable, "-m", "shared.thread_store", "info", store_path],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert "7 threads by 3 authors" in result.stdout
+    assert (
+        "Dates: 2025-06-02 00:03:28.475590+00:00 .. 2025-08-03 10:00:00+00:00 (2 undated)"
+        in result.stdout
+    )
+
+
+def test_unparseable_dates_are_stored_as_undated_and_counted(tmp_path):
+    path = str(tmp_path / "bad.cols")
+    writer = ColumnarThreadWriter(path)
+    for thread in THREADS[:2]:
+        writer.write(thread)
+    writer.write({**THREADS[3], "thread_date": "garbage"})
+    writer.write({**THREADS[4], "thread_date": "08/01/2025"})
+    writer.close({"source": "test"})
+
+    store = ThreadStore(path)
+    assert store.metadata == {"source": "test", "invalid_dates": 2}
+    assert [t["thread_date"] for t in store.threads()][2:] == [None, None]
+    assert list(store.rows_between()) == [0, 1]
+
+    # Bad filter values are still the caller's error
+    with pytest.raises(ValueError):
+        store.rows_between("garbage")
@@ -0,0 +1,58 @@
+import pytest
+
+from shared import token_budget
+from shared.token_budget import BudgetExceeded, check_budget, preflight
+
+
+@pytest.fixture(autouse=True)
+def estimated_counts(monkeypatch):
+    """Count with the ~4 characters/token estimate whether or not tiktoken is installed."""
+    monkeypatch.setattr(token_budget, "get_encoding", lambda model: None)
+
+
+def test_preflight_totals_cost_and_latency():
+    prompts = ["x" * 4000, "x" * 400, "x" * 40]  # 1000, 100 and 10 tokens
+    report = preflight(iter(prompts), "gpt-5-mini", concurrency=1)
+
+    assert report["tokenizer"] == "estimate"
+    assert report["calls"] == 3
+    assert report["total_input_tokens"] == 1110
+    assert report["max_input_tokens"] == 1000
+    assert report["mean_input_tokens"] == 370
+    assert report["estimated_output_tokens"] == 3 * 1200
+    assert report["estimated_cost_usd"] == pytest.approx(
+        (1110 * 0.25 + 3600 * 2.00) / 1_000_000
+    )
+    serial = 3 * 0.8 + 1110 / 5000 + 3600 / 80
+    assert report["estimated_seconds"] == pytest.approx(serial)
+
+    parallel = preflight(iter(prompts), "gpt-5-mini", concurrency=8)
+    # Never more parallel than there are calls
+    assert parallel["estimated_seconds"] == pytest.approx(serial / 3)
+
+
+def test_unknown_models_use_the_default_profile():
+    report = preflight(["x" * 40], "some-local-model", expected_output_tokens=5)
+    assert report["estimated_cost_usd"] == 0.0
+    assert report["estimated_output_tokens"] == 5
+    assert report["context_tokens"] == 128_000
+
+
+def test_empty_runs_report_zero():
+    report = preflight([], "gpt-5-mini")
+    assert report["calls"] == 0 and report["mean_input_tokens"] == 0
+
+
+def test_check_budget_enforces_the_per_call_and_total_limits():
+    report = preflight(["x" * 4000, "x" * 4000], "gpt-5-mini")
+    check_budget(report, max_total_tokens=2000, max_call_tokens=1000)
+
+    with pytest.raises(BudgetExceeded, match="per-call limit of 999"):
+        check_budget(report, max_call_tokens=999)
+    with pytest.raises(BudgetExceeded, match="budget of 1,999"):
+        check_budget(report, max_total_tokens=1999)
+
+    # Without a per-call limit the model's context window applies
+    huge = preflight(["x" * 4 * 300_000], "gpt-5-mini")
+    with pytest.raises(BudgetExceeded, match="272,000"):
+        check_budget(huge)